@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark aggregation: legacy groupby().resample().agg(mean) vs vectorized floor+groupby engine.
+
+Generates one reading per minute per device for the given number of days and reports the
+time for each interval. The legacy path computes only means; the new engine computes
+mean/min/max/count/last for every numeric column in the same run.
+
+Usage:
+  python scripts/bench_aggregation.py --devices 35 --days 7 --intervals 15min,h,D
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.data_collection.aggregation import aggregate_frame  # noqa: E402
+from src.data_collection.clients.tsi_parser import MEASUREMENT_FIELDS  # noqa: E402
+
+
+def synth_frame(devices: int, days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    per_device = days * 1440
+    ts = pd.date_range('2025-08-01', periods=per_device, freq='min', tz='UTC')
+    df = pd.DataFrame({
+        'device_id': np.repeat([f'dev-{i}' for i in range(devices)], per_device),
+        'timestamp': np.tile(ts, devices),
+    })
+    for col in MEASUREMENT_FIELDS:
+        df[col] = rng.random(len(df)) * 100
+    return df
+
+
+def legacy_aggregate(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    raw = df.set_index('timestamp')
+    agg = {col: 'mean' for col in raw.select_dtypes(include='number').columns}
+    return raw.groupby('device_id').resample(interval).agg(agg).reset_index()
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--devices', type=int, default=35)
+    p.add_argument('--days', type=int, default=7)
+    p.add_argument('--intervals', default='15min,h,D')
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    df = synth_frame(args.devices, args.days)
+    print(f"rows={len(df):,} ({args.devices} devices x {args.days} days x 1440/day, {len(MEASUREMENT_FIELDS)} metrics)")
+    for interval in args.intervals.split(','):
+        legacy = legacy_aggregate(df, interval)
+        new = aggregate_frame(df, 'device_id', 'timestamp', interval)
+        pd.testing.assert_frame_equal(new[legacy.columns], legacy, check_dtype=False)
+        legacy_s = _time(lambda: legacy_aggregate(df, interval), args.repeat)
+        means_s = _time(lambda: aggregate_frame(df, 'device_id', 'timestamp', interval, stats=('mean',)), args.repeat)
+        all_s = _time(lambda: aggregate_frame(df, 'device_id', 'timestamp', interval), args.repeat)
+        print(f"{interval:>6}: legacy mean {legacy_s:7.3f}s | engine mean {means_s:7.3f}s ({legacy_s / means_s:4.1f}x)"
+              f" | engine mean/min/max/count/last {all_s:7.3f}s ({legacy_s / all_s:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Load-test the WU/TSI clients and cleaning offline against the synthetic API.
+
+Runs the real client code (work queue, adaptive limiter, retries, parsing) and the
+collector's per-day fetch + clean against clients.replay.SyntheticAPI for N stations x
+M devices x D days, with optional per-request latency and injected 429/503 errors.
+Host rate limits are disabled unless --rate-limit is given, so the numbers show client
+and parsing throughput rather than the API budget.
+
+Usage:
+  python scripts/bench_collector.py --stations 20 --devices 35 --days 7 --latency 0.05 --error-rate 0.02
+  python scripts/bench_collector.py --replay fixtures/api_2025-10-01.jsonl.gz --start 2025-10-01 --days 1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.data_collection import daily_data_collector as dc  # noqa: E402
+from src.data_collection.clients.rate_limit import RetryPolicy  # noqa: E402
+from src.data_collection.clients.replay import FixtureArchive, ReplayTransport, SyntheticAPI  # noqa: E402
+from src.data_collection.clients.tsi_client import TSIClient  # noqa: E402
+from src.data_collection.clients.wu_client import WUClient  # noqa: E402
+
+
+def _build_clients(args: argparse.Namespace, http_client: httpx.AsyncClient) -> tuple[WUClient, TSIClient]:
+    wu = WUClient(api_key='bench', base_url='https://api.weather.com/v2/pws', http_client=http_client)
+    tsi = TSIClient(client_id='bench', client_secret='bench', auth_url='https://api-prd.tsilink.com/oauth/token',
+                    http_client=http_client)
+    if not args.replay:
+        wu.stations = [{'stationId': f'KSYN{i:04d}'} for i in range(args.stations)]
+        tsi.device_ids = [f'syn-device-{i}' for i in range(args.devices)]
+    for client in (wu, tsi):
+        client.retry_policy = RetryPolicy(max_retries=5, base_delay=0.01, max_delay=0.1)
+        if not args.rate_limit:
+            client.rate_limiter = None
+    return wu, tsi
+
+
+async def _run(args: argparse.Namespace) -> None:
+    if args.replay:
+        transport: httpx.AsyncBaseTransport = ReplayTransport(FixtureArchive.load(args.replay))
+        api = None
+    else:
+        api = SyntheticAPI(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+        transport = api.transport()
+    start = pd.Timestamp(args.start) if args.start else pd.Timestamp.now(tz='UTC').normalize().tz_localize(None) - pd.Timedelta(days=args.days)
+    day_strs = [(start + pd.Timedelta(days=i)).strftime('%Y-%m-%d') for i in range(args.days)]
+    slots = asyncio.Semaphore(args.max_concurrent_days)
+    totals = {'wu_rows': 0, 'tsi_rows': 0, 'fetch_s': 0.0, 'clean_s': 0.0}
+
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        wu, tsi = _build_clients(args, http_client)
+        async with wu, tsi:
+            async def _day(day: str) -> None:
+                async with slots:
+                    fetched = time.perf_counter()
+                    wu_raw, tsi_raw = await dc._fetch_with_clients(wu, tsi, day, day, False, 'h')
+                    cleaned = time.perf_counter()
+                    await asyncio.to_thread(dc._clean, wu_raw, tsi_raw)
+                    totals['fetch_s'] += cleaned - fetched
+                    totals['clean_s'] += time.perf_counter() - cleaned
+                    totals['wu_rows'] += len(wu_raw)
+                    totals['tsi_rows'] += len(tsi_raw)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(_day(d) for d in day_strs))
+            wall = time.perf_counter() - started
+
+    requests = sum(v for k, v in api.counts.items() if k not in ('429', '503')) if api else len(transport.archive.records)
+    print(f"days={args.days} stations={len(wu.stations)} devices={len(tsi.device_ids)} "
+          f"latency={args.latency}s error_rate={args.error_rate} throttle_rate={args.throttle_rate}")
+    print(f"wall {wall:7.2f}s | requests {requests:,} ({requests / wall:,.0f}/s) | "
+          f"rows WU={totals['wu_rows']:,} TSI={totals['tsi_rows']:,} ({(totals['wu_rows'] + totals['tsi_rows']) / wall:,.0f}/s)")
+    print(f"summed per-day fetch {totals['fetch_s']:.2f}s, clean {totals['clean_s']:.2f}s | retries WU={wu.retries} TSI={tsi.retries}")
+    if api is not None:
+        print(f"injected errors: 429={api.counts['429']} 503={api.counts['503']}")
+    print(f"final concurrency windows: WU={wu.limiter.window} TSI={tsi.limiter.window}")
+    for label, client in (('WU', wu), ('TSI', tsi)):
+        decode = client.decode_stats.snapshot()
+        print(f"{label} decode ({decode['decoder']}): {decode['requests']} bodies, {decode['bytes'] / 1e6:.1f} MB, "
+              f"mean {decode['mean_ms']} ms, max {decode['max_ms']} ms, {decode['mb_per_s']} MB/s")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--stations', type=int, default=20)
+    p.add_argument('--devices', type=int, default=35)
+    p.add_argument('--days', type=int, default=3)
+    p.add_argument('--start', help='First day YYYY-MM-DD (default: --days before today)')
+    p.add_argument('--max-concurrent-days', type=int, default=1)
+    p.add_argument('--latency', type=float, default=0.0, help='Mean seconds per synthetic response')
+    p.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    p.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    p.add_argument('--rate-limit', action='store_true', help='Keep the per-host token buckets enabled')
+    p.add_argument('--replay', help='Replay a fixture archive recorded with API_RECORD_ARCHIVE instead of synthesizing')
+    args = p.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmark the wide-to-long conversion feeding the DB sink and BigQuery staging.
+
+The legacy path (merge with the deployment map, pd.to_numeric per column, pd.melt,
+drop_duplicates) ran once in insert_data_to_db and again in _write_bq_staging for the same
+day. The shared engine (long_format.LongReadings) stacks the metric columns with NumPy and
+builds the long frame once for both sinks. Both outputs are checked to hold the same readings.
+Memory is reported for the legacy frame (object metric names, int64/float64) and the compact
+long frame with float64 and float32 values.
+
+Usage:
+  python scripts/bench_long_format.py --stations 20 --devices 35 --days 3
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.data_collection.clients.tsi_parser import MEASUREMENT_FIELDS  # noqa: E402
+from src.data_collection.long_format import LongReadings  # noqa: E402
+
+WU_METRICS = ('temperature', 'temperature_high', 'temperature_low', 'humidity', 'dew_point_avg', 'wind_speed_avg',
+              'wind_gust_high', 'wind_direction_avg', 'pressure_max', 'pressure_min', 'precip_rate', 'precip_total',
+              'solar_radiation', 'uv_high', 'heat_index_avg', 'qc_status')
+
+
+def synth_frame(prefix: str, sensors: int, days: int, freq: str, metrics: tuple[str, ...], seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range('2025-08-01', periods=int(days * pd.Timedelta('1D') / pd.Timedelta(freq)), freq=freq, tz='UTC')
+    df = pd.DataFrame({
+        'native_sensor_id': np.repeat([f'{prefix}{i}' for i in range(sensors)], len(stamps)),
+        'timestamp': np.tile(stamps, sensors),
+    })
+    df['ts'] = df['timestamp']
+    for col in metrics:
+        values = rng.random(len(df)) * 100
+        values[rng.random(len(df)) < 0.05] = np.nan
+        df[col] = values
+    df['obsTimeLocal'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def legacy_long(df: pd.DataFrame, deployment_map: pd.DataFrame, typ: str) -> pd.DataFrame:
+    merged = df.merge(deployment_map[deployment_map.sensor_type == typ], on='native_sensor_id', how='inner')
+    merged = merged.rename(columns={'deployment_pk': 'deployment_fk'})
+    id_vars = ['timestamp', 'deployment_fk']
+    numeric_vars = []
+    for col in [c for c in merged.columns if c not in id_vars + ['native_sensor_id', 'sensor_type']]:
+        coerced = pd.to_numeric(merged[col], errors='coerce')
+        if coerced.notna().any():
+            merged[col] = coerced
+            numeric_vars.append(col)
+    long_df = pd.melt(merged, id_vars=id_vars, value_vars=numeric_vars, var_name='metric_name', value_name='value')
+    long_df['value'] = pd.to_numeric(long_df['value'], errors='coerce')
+    return long_df.dropna(subset=['value']).drop_duplicates(subset=['timestamp', 'deployment_fk', 'metric_name'], keep='last')
+
+
+def legacy_both_sinks(wu: pd.DataFrame, tsi: pd.DataFrame, deployment_map: pd.DataFrame) -> pd.DataFrame:
+    for _ in ('db', 'bq'):
+        out = pd.concat([legacy_long(wu, deployment_map, 'WU'), legacy_long(tsi, deployment_map, 'TSI')], ignore_index=True)
+    return out
+
+
+def shared_both_sinks(wu: pd.DataFrame, tsi: pd.DataFrame, deployment_map: pd.DataFrame,
+                      value_dtype: str = 'float64') -> pd.DataFrame:
+    long = LongReadings(wu, tsi, value_dtype)
+    for _ in ('db', 'bq'):
+        long.build(deployment_map)
+        out = long.combined()
+    return out
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--stations', type=int, default=20)
+    p.add_argument('--devices', type=int, default=35)
+    p.add_argument('--days', type=int, default=3)
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    wu = synth_frame('KST', args.stations, args.days, '5min', WU_METRICS, seed=0)
+    tsi = synth_frame('dev-', args.devices, args.days, '1min', tuple(MEASUREMENT_FIELDS), seed=1)
+    deployment_map = pd.DataFrame({
+        'deployment_pk': np.arange(args.stations + args.devices),
+        'native_sensor_id': [f'KST{i}' for i in range(args.stations)] + [f'dev-{i}' for i in range(args.devices)],
+        'sensor_type': ['WU'] * args.stations + ['TSI'] * args.devices,
+    })
+    print(f"wide rows WU={len(wu):,} TSI={len(tsi):,} ({len(WU_METRICS)} / {len(MEASUREMENT_FIELDS)} metrics)")
+
+    legacy = legacy_both_sinks(wu, tsi, deployment_map)
+    shared = shared_both_sinks(wu, tsi, deployment_map)
+    key = ['deployment_fk', 'metric_name', 'timestamp']
+    expected = legacy[legacy.metric_name != 'ts'].sort_values(key).reset_index(drop=True)  # legacy also melted the ts copy
+    got = shared.astype({'metric_name': str}).sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+
+    legacy_s = _time(lambda: legacy_both_sinks(wu, tsi, deployment_map), args.repeat)
+    one_s = _time(lambda: shared_both_sinks(wu, tsi, deployment_map), args.repeat)
+    print(f"long rows={len(shared):,} | legacy (DB + BQ melts) {legacy_s:7.3f}s | shared engine {one_s:7.3f}s ({legacy_s / one_s:4.1f}x)")
+    compact = shared_both_sinks(wu, tsi, deployment_map, 'float32')
+    assert np.allclose(compact['value'], shared['value'], rtol=1e-6)
+    print("long frame memory (MB):")
+    for label, frame in (('legacy', legacy), ('compact float64', shared), ('compact float32', compact)):
+        per_column = frame.memory_usage(deep=True, index=False) / 1e6
+        detail = ', '.join(f"{col} {per_column[col]:,.0f} ({frame[col].dtype})" for col in per_column.index)
+        print(f"  {label:>15}: {per_column.sum():7,.0f} | {detail}")
+
+
+if __name__ == '__main__':
+    main()
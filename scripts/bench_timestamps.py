@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark BigQuery staging timestamp preparation: legacy per-value passes vs vectorized normalizer.
+
+The legacy staging writer converted each day's timestamps through several Python-level passes
+(per-value _ensure_py_datetime, to_pydatetime generators, .apply type checks, strftime per
+row). daily_data_collector._staging_day_frames now does one normalize_timestamps pass and
+loads native UTC timestamps. Runs both on a synthetic day of long readings with the
+timestamps given as tz-aware datetimes, epoch seconds and ISO strings, and checks they
+produce the same instants (compared as the legacy strings).
+
+Usage:
+  python scripts/bench_timestamps.py --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.data_collection import daily_data_collector as dc  # noqa: E402
+from src.utils.timestamps import utc_timestamp_strings  # noqa: E402
+
+
+def _ensure_py_datetime(value: Any) -> Optional[datetime]:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None) if value.tzinfo is not None else value
+    if isinstance(value, pd.Timestamp):
+        ts_val = value.tz_convert('UTC') if value.tzinfo is not None else value.tz_localize('UTC')
+        return ts_val.to_pydatetime().replace(tzinfo=None)
+    if isinstance(value, (np.integer, int)):
+        magnitude = abs(int(value))
+        unit = 'ns' if magnitude > 9_007_199_254_740_992 else 'us' if magnitude > 9_007_199_254_740 else 's'
+        dt = pd.to_datetime(int(value), utc=True, errors='coerce', unit=unit)
+        return None if pd.isna(dt) else dt.to_pydatetime().replace(tzinfo=None)
+    if isinstance(value, (np.floating, float)):
+        return None if pd.isna(value) else _ensure_py_datetime(int(value))
+    if isinstance(value, str):
+        parsed = pd.to_datetime(value, utc=True, errors='coerce')
+        return None if pd.isna(parsed) else parsed.to_pydatetime().replace(tzinfo=None)
+    return None
+
+
+def legacy_day_strings(long_df: pd.DataFrame) -> pd.Series:
+    """The previous _split_and_load timestamp passes for one day (warnings omitted)."""
+    day_df = long_df.copy()
+    ts_series = day_df['timestamp']
+    if pd.api.types.is_numeric_dtype(ts_series):
+        numeric = pd.to_numeric(ts_series, errors='coerce')
+        max_abs = numeric.abs().max()
+        unit = 'ns' if max_abs > 9_007_199_254_740_992 else 'us' if max_abs > 9_007_199_254_740 else 's'
+        ts_converted = pd.to_datetime(numeric, utc=True, errors='coerce', unit=unit)
+    else:
+        ts_converted = pd.to_datetime(ts_series, utc=True, errors='coerce')
+    day_df['timestamp'] = pd.Series((v.to_pydatetime() if pd.notna(v) else None for v in ts_converted),
+                                    index=ts_converted.index, dtype=object)
+    ensured = pd.Series((_ensure_py_datetime(v) for v in day_df['timestamp']), index=day_df.index, dtype=object)
+    coerced = pd.to_datetime(ensured, utc=True, errors='coerce')
+    day_df = day_df.loc[~coerced.isna()].copy()
+    coerced = coerced.loc[day_df.index].dt.tz_convert('UTC')
+    day_df['timestamp'] = pd.Series((t.to_pydatetime() for t in coerced), index=coerced.index, dtype=object)
+    numeric_mask = day_df['timestamp'].apply(lambda v: isinstance(v, (np.integer, int, np.floating, float)))
+    if numeric_mask.any():
+        day_df.loc[numeric_mask, 'timestamp'] = day_df.loc[numeric_mask, 'timestamp'].apply(_ensure_py_datetime)
+    day_df['timestamp'].apply(lambda v: v is not None and not isinstance(v, datetime))
+    final = pd.Series((_ensure_py_datetime(v) for v in day_df['timestamp']), index=day_df.index, dtype=object)
+    final.apply(lambda v: type(v).__name__).value_counts()
+    return final.apply(lambda dt: dt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(dt, datetime) else None)
+
+
+def synth_long(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, 86400, rows))
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp('2025-08-26', tz='UTC') + pd.to_timedelta(seconds, unit='s'),
+        'deployment_fk': rng.integers(1, 60, rows),
+        'metric_name': pd.Categorical.from_codes(rng.integers(0, 20, rows), [f'metric_{i}' for i in range(20)]),
+        'value': rng.random(rows),
+    })
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--rows', type=int, default=1_000_000)
+    p.add_argument('--repeat', type=int, default=1)
+    args = p.parse_args()
+
+    base = synth_long(args.rows)
+    variants = {
+        'datetime': base,
+        'epoch s': base.assign(timestamp=base['timestamp'].astype('int64') // 10**9),
+        'iso str': base.assign(timestamp=base['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')),
+    }
+    print(f"rows={args.rows:,} (one day of long readings)")
+    for label, long_df in variants.items():
+        new = pd.concat([day_df for _, day_df in dc._staging_day_frames(long_df, 'TSI')], ignore_index=True)
+        legacy = legacy_day_strings(long_df)
+        assert utc_timestamp_strings(new['timestamp']).tolist() == legacy.tolist(), label
+        legacy_s = _time(lambda: legacy_day_strings(long_df), args.repeat)
+        new_s = _time(lambda: list(dc._staging_day_frames(long_df, 'TSI')), args.repeat)
+        print(f"{label:>9}: legacy {legacy_s:7.2f}s | vectorized {new_s:6.3f}s ({legacy_s / new_s:5.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
-"""Load TSI parquet files with schema normalization to handle type inconsistencies."""
+"""Load TSI parquet files with schema normalization to handle type inconsistencies.
+
+Files uploaded by the collector already carry the schema registry's TSI schema
+(src/data_collection/schema_registry.py); normalization here only changes older files.
+"""
 
 import argparse
 import datetime as dt
+import sys
 from pathlib import Path
 
 from google.cloud import bigquery
 import pyarrow.parquet as pq
 import pyarrow as pa
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.data_collection.schema_registry import default_registry  # noqa: E402
+
 
 def daterange(start: dt.date, end: dt.date):
     cur = start
@@ -18,75 +29,8 @@ def daterange(start: dt.date, end: dt.date):
 
 
 def normalize_schema(table: pa.Table) -> pa.Table:
-    """Convert null-type columns and fix type mismatches to match target schema."""
-    
-    # Target schema with consistent types
-    target_schema = {
-        'cloud_account_id': pa.string(),
-        'native_sensor_id': pa.string(),
-        'timestamp': pa.timestamp('ns', tz='UTC'),
-        'is_indoor': pa.bool_(),  # boolean, not int
-        'is_public': pa.bool_(),  # boolean, not int
-        'latitude': pa.float64(),
-        'longitude': pa.float64(),
-        'pm10': pa.float64(),
-        'pm10_aqi': pa.float64(),
-        'pm1_0': pa.float64(),
-        'pm2_5': pa.float64(),
-        'pm2_5_aqi': pa.float64(),
-        'pm4_0': pa.float64(),  # May be missing in some files
-        'ncpm4_0': pa.float64(),
-        'model': pa.string(),
-        'ncpm0_5': pa.float64(),
-        'ncpm10': pa.float64(),
-        'ncpm1_0': pa.float64(),
-        'ncpm2_5': pa.float64(),
-        'humidity': pa.float64(),
-        'serial': pa.string(),
-        'temperature': pa.float64(),
-        'tpsize': pa.float64(),
-        'co2_ppm': pa.float64(),
-        'co_ppm': pa.float64(),
-        'baro_inhg': pa.float64(),
-        'o3_ppb': pa.float64(),
-        'no2_ppb': pa.float64(),
-        'so2_ppb': pa.float64(),
-        'ch2o_ppb': pa.float64(),
-        'voc_mgm3': pa.float64(),
-        'ts': pa.timestamp('ns', tz='UTC'),
-        'latitude_f': pa.float64(),
-        'longitude_f': pa.float64(),
-    }
-    
-    # Build new column arrays with proper types
-    new_arrays = []
-    new_names = []
-    
-    for field_name, target_type in target_schema.items():
-        if field_name in table.column_names:
-            col = table.column(field_name)
-            # Handle null columns (type is null)
-            if pa.types.is_null(col.type):
-                # Create null array with target type
-                new_arrays.append(pa.nulls(len(table), type=target_type))
-            elif col.type != target_type:
-                # Cast to target type
-                try:
-                    new_arrays.append(col.cast(target_type))
-                except Exception as e:
-                    print(f"  Warning: Could not cast {field_name} from {col.type} to {target_type}: {e}")
-                    # If cast fails, keep original
-                    new_arrays.append(col)
-            else:
-                # Type matches
-                new_arrays.append(col)
-        else:
-            # Column missing, add null column
-            new_arrays.append(pa.nulls(len(table), type=target_type))
-        
-        new_names.append(field_name)
-    
-    return pa.Table.from_arrays(new_arrays, names=new_names)
+    """Convert null-type columns and fix type mismatches to match the registry's TSI schema."""
+    return default_registry().conform(table, 'TSI', label='TSI')
 
 
 def load_date(client: bigquery.Client, bucket: str, prefix: str, dataset: str, table: str, date: dt.date):
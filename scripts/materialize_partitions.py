@@ -22,12 +22,20 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import sys
+from pathlib import Path
 from typing import Iterable, List, Optional
 import os
 
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.utils.timestamps import epoch_timestamp_sql  # noqa: E402
+
 
 def daterange(start: dt.date, end: dt.date) -> Iterable[dt.date]:
     cur = start
@@ -67,18 +75,9 @@ def ensure_materialized_table(client: bigquery.Client, dataset: str, table: str,
     src_schema = {f.name for f in client.get_table(f"{client.project}.{dataset}.{external_table}").schema}
     cluster_cols = [c for c in (cluster_by or []) if c in src_schema]
     cluster_clause = f" CLUSTER BY {', '.join(cluster_cols)}" if cluster_cols else ""
-    # Choose correct epoch unit dynamically (ns/us/ms/s) to avoid TIMESTAMP overflow
-    # Boundaries based on orders of magnitude around current epoch (~1.7e9 s)
-    ts_expr = (
-        "CASE "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000000 THEN "
-        f"  TIMESTAMP_MICROS(DIV(CAST(t.{time_field} AS INT64), 1000)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000 THEN "
-        f"  TIMESTAMP_MICROS(CAST(t.{time_field} AS INT64)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000 THEN "
-        f"  TIMESTAMP_MILLIS(CAST(t.{time_field} AS INT64)) "
-        f"ELSE TIMESTAMP_SECONDS(CAST(t.{time_field} AS INT64)) END"
-    )
+    # Choose correct epoch unit dynamically (ns/us/ms/s) to avoid TIMESTAMP overflow;
+    # same magnitude bounds as the collector's normalize_timestamps
+    ts_expr = epoch_timestamp_sql(f"t.{time_field}")
     except_cols = [c for c in ["timestamp", "epoch", "ts"] if c in src_schema]
     except_clause = f" EXCEPT({', '.join(except_cols)})" if except_cols else ""
     sql = f"""
@@ -117,16 +116,7 @@ def insert_partition_from_external(client: bigquery.Client, dataset: str, table:
     # Choose correct epoch unit dynamically (ns/us/ms/s) to avoid TIMESTAMP overflow
     time_field = _resolve_time_field(client, dataset, external_table)
     src_schema = {f.name for f in client.get_table(f"{client.project}.{dataset}.{external_table}").schema}
-    ts_expr = (
-        "CASE "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000000 THEN "
-        f"  TIMESTAMP_MICROS(DIV(CAST(t.{time_field} AS INT64), 1000)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000 THEN "
-        f"  TIMESTAMP_MICROS(CAST(t.{time_field} AS INT64)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000 THEN "
-        f"  TIMESTAMP_MILLIS(CAST(t.{time_field} AS INT64)) "
-        f"ELSE TIMESTAMP_SECONDS(CAST(t.{time_field} AS INT64)) END"
-    )
+    ts_expr = epoch_timestamp_sql(f"t.{time_field}")
     except_cols = [c for c in ["timestamp", "epoch", "ts"] if c in src_schema]
     except_clause = f" EXCEPT({', '.join(except_cols)})" if except_cols else ""
     sql = f"""
@@ -215,16 +205,7 @@ def insert_partition_from_gcs(
     if time_field is None:
         raise RuntimeError(f"Could not determine time field for staging table {stage_table}")
 
-    ts_expr = (
-        "CASE "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000000 THEN "
-        f"  TIMESTAMP_MICROS(DIV(CAST(t.{time_field} AS INT64), 1000)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000000 THEN "
-        f"  TIMESTAMP_MICROS(CAST(t.{time_field} AS INT64)) "
-        f"WHEN ABS(CAST(t.{time_field} AS INT64)) >= 100000000000 THEN "
-        f"  TIMESTAMP_MILLIS(CAST(t.{time_field} AS INT64)) "
-        f"ELSE TIMESTAMP_SECONDS(CAST(t.{time_field} AS INT64)) END"
-    )
+    ts_expr = epoch_timestamp_sql(f"t.{time_field}")
     except_cols = [c for c in ["timestamp", "epoch", "ts"] if c in field_names]
     except_clause = f" EXCEPT({', '.join(except_cols)})" if except_cols else ""
     sql = f"""
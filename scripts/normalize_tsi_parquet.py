@@ -8,57 +8,31 @@ The issue: Days with all-null measurements store those columns as null type in p
 which BigQuery interprets as INT32. Days with actual data store them as proper types
 (FLOAT64, STRING, BOOLEAN). This creates incompatible schemas.
 
-The fix: Explicitly define a consistent schema for all columns and cast/fill missing
-columns appropriately.
+The collector now casts every upload to the canonical schema of the schema registry
+(src/data_collection/schema_registry.py, built from config/metrics_manifest.json), so files
+written since then are already normalized and are skipped. This script is only needed for
+files uploaded before that; it applies the same registry schema.
 """
 from __future__ import annotations
 
 import argparse
 import datetime as dt
+import sys
+from pathlib import Path
 from typing import Iterable
 
 import pyarrow as pa
 import pyarrow.parquet as pq
 from google.cloud import storage
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
-# Define the canonical schema for TSI data
-TSI_SCHEMA = pa.schema([
-    pa.field('cloud_account_id', pa.string()),
-    pa.field('native_sensor_id', pa.string()),
-    pa.field('timestamp', pa.timestamp('ns', tz='UTC')),
-    pa.field('is_indoor', pa.bool_()),
-    pa.field('is_public', pa.bool_()),
-    pa.field('latitude', pa.float64()),
-    pa.field('longitude', pa.float64()),
-    pa.field('pm10', pa.float64()),
-    pa.field('pm10_aqi', pa.float64()),
-    pa.field('pm1_0', pa.float64()),
-    pa.field('pm2_5', pa.float64()),
-    pa.field('pm2_5_aqi', pa.float64()),
-    pa.field('pm4_0', pa.float64()),
-    pa.field('ncpm4_0', pa.float64()),
-    pa.field('model', pa.string()),
-    pa.field('ncpm0_5', pa.float64()),
-    pa.field('ncpm10', pa.float64()),
-    pa.field('ncpm1_0', pa.float64()),
-    pa.field('ncpm2_5', pa.float64()),
-    pa.field('humidity', pa.float64()),
-    pa.field('serial', pa.string()),
-    pa.field('temperature', pa.float64()),
-    pa.field('tpsize', pa.float64()),
-    pa.field('co2_ppm', pa.float64()),
-    pa.field('co_ppm', pa.float64()),
-    pa.field('baro_inhg', pa.float64()),
-    pa.field('o3_ppb', pa.float64()),
-    pa.field('no2_ppb', pa.float64()),
-    pa.field('so2_ppb', pa.float64()),
-    pa.field('ch2o_ppb', pa.float64()),
-    pa.field('voc_mgm3', pa.float64()),
-    pa.field('ts', pa.timestamp('ns', tz='UTC')),
-    pa.field('latitude_f', pa.float64()),
-    pa.field('longitude_f', pa.float64()),
-])
+from src.data_collection.schema_registry import conform_table, default_registry  # noqa: E402
+
+# The canonical schema of raw TSI uploads
+TSI_SCHEMA = default_registry().schema('TSI')
 
 
 def daterange(start: dt.date, end: dt.date) -> Iterable[dt.date]:
@@ -75,36 +49,14 @@ def normalize_table(table: pa.Table) -> pa.Table:
     Handles:
     - Null-type columns (cast to proper type with all nulls)
     - Missing columns (add with all nulls)
-    - Type mismatches (cast to target type)
+    - Type mismatches (cast to target type; unparseable numbers become nulls)
     - Extra columns (drop them)
     - Column ordering (reorder to match schema)
     """
-    arrays = []
-    
-    for field in TSI_SCHEMA:
-        if field.name in table.column_names:
-            col = table.column(field.name)
-            
-            # Handle null-type columns (all nulls, no defined type)
-            if pa.types.is_null(col.type):
-                # Create null array with proper type
-                arrays.append(pa.nulls(len(table), type=field.type))
-            elif col.type != field.type:
-                # Cast to target type
-                try:
-                    arrays.append(col.cast(field.type))
-                except pa.ArrowInvalid as e:
-                    print(f"  Warning: Could not cast {field.name} from {col.type} to {field.type}: {e}")
-                    print(f"  Creating null column for {field.name}")
-                    arrays.append(pa.nulls(len(table), type=field.type))
-            else:
-                # Type matches
-                arrays.append(col)
-        else:
-            # Column missing, add null column
-            arrays.append(pa.nulls(len(table), type=field.type))
-    
-    return pa.Table.from_arrays(arrays, schema=TSI_SCHEMA)
+    normalized, dropped = conform_table(table, TSI_SCHEMA, "TSI")
+    if dropped:
+        print(f"  Dropping columns not in the TSI schema: {dropped}")
+    return normalized
 
 
 def process_date(bucket_name: str, prefix: str, date: dt.date, dry_run: bool = False) -> bool:
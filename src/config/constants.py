@@ -4,6 +4,8 @@ Configuration constants for Hot Durham project
 
 # API Configuration
 DEFAULT_RATE_LIMIT = 0.5  # requests per second
+DEFAULT_RATE_BURST = 10  # requests allowed back-to-back before the rate applies
+TSI_RATE_LIMIT = 2.0  # requests per second (TSI Link external API)
 API_TIMEOUT = 30.0  # seconds
 MAX_RETRIES = 3
 
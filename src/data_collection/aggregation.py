@@ -0,0 +1,86 @@
+"""Vectorized time-bucket aggregation shared by the API clients and the collector.
+
+``groupby(key).resample(interval).agg({col: 'mean'})`` resamples every group separately and
+only yields means. Here timestamps are floored to the interval once for the whole frame and
+one ``groupby([key, bucket])`` computes each statistic for all numeric columns in a single
+cythonized pass. Unlike resample, empty buckets between observations are not emitted.
+
+Output columns: the key, the bucket timestamp (under the input timestamp column name), then
+for every numeric column ``<col>`` (mean, kept under the original name for compatibility)
+followed by ``<col>_min``, ``<col>_max``, ``<col>_count`` and ``<col>_last``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Sequence
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+DEFAULT_STATS = ('mean', 'min', 'max', 'count', 'last')
+# Statistics other than the mean are written as suffixed columns.
+STAT_SUFFIXES = tuple(f"_{stat}" for stat in DEFAULT_STATS if stat != 'mean')
+# Offset aliases accepted by resample that Period spells differently
+_PERIOD_ALIASES = {'MS': 'M', 'ME': 'M', 'QS': 'Q', 'QE': 'Q', 'YS': 'Y', 'YE': 'Y'}
+
+
+# Per-source (key column, timestamp column, columns not aggregated) for raw client frames
+SOURCE_AGGREGATION = {
+    'WU': ('stationID', 'obsTimeUtc', ('epoch', 'lat', 'lon', 'qcStatus')),
+    'TSI': ('device_id', 'timestamp', ()),
+}
+
+
+def floor_timestamps(ts: pd.Series, interval: str) -> pd.Series:
+    """Floor UTC timestamps to ``interval`` buckets (fixed frequencies like 15min/h/D, or calendar ones like W/MS)."""
+    ts = pd.to_datetime(ts, utc=True)
+    try:
+        return ts.dt.floor(interval)
+    except ValueError:
+        # Non-fixed frequencies (weeks, months) cannot be floored; use the period start instead.
+        period = _PERIOD_ALIASES.get(interval, interval)
+        return ts.dt.tz_convert(None).dt.to_period(period).dt.start_time.dt.tz_localize('UTC')
+
+
+def numeric_columns(df: pd.DataFrame, exclude: Iterable[str] = ()) -> List[str]:
+    skip = set(exclude)
+    return [c for c in df.select_dtypes(include='number').columns if c not in skip and not pd.api.types.is_bool_dtype(df[c])]
+
+
+def aggregate_frame(df: pd.DataFrame, key: str, ts_column: str, interval: str,
+                    stats: Sequence[str] = DEFAULT_STATS, exclude: Iterable[str] = ()) -> pd.DataFrame:
+    """Aggregate ``df`` per ``key`` into ``interval`` buckets of ``ts_column``.
+
+    Rows without a timestamp are dropped. ``last`` is the last non-null value in time order.
+    Columns listed in ``exclude`` (e.g. coordinates, epochs) are not aggregated.
+    """
+    if df.empty or key not in df.columns or ts_column not in df.columns:
+        return pd.DataFrame()
+    value_cols = numeric_columns(df, exclude=(key, ts_column, *exclude))
+    frame = df[[key, ts_column, *value_cols]].copy()
+    frame[ts_column] = pd.to_datetime(frame[ts_column], utc=True)
+    frame = frame.dropna(subset=[ts_column])
+    if frame.empty:
+        return pd.DataFrame()
+    if 'last' in stats and not frame[ts_column].is_monotonic_increasing:
+        frame = frame.sort_values(ts_column, kind='stable')
+    bucket = floor_timestamps(frame[ts_column], interval).rename(ts_column)
+    grouped = frame[value_cols].groupby([frame[key], bucket], sort=True)
+
+    parts = []
+    for stat in stats:
+        part = getattr(grouped, stat)()
+        if stat != 'mean':
+            part = part.add_suffix(f"_{stat}")
+        parts.append(part)
+    out = pd.concat(parts, axis=1)
+    ordered = [f"{col}_{stat}" if stat != 'mean' else col for col in value_cols for stat in stats]
+    return out[ordered].reset_index()
+
+
+def aggregate_source(df: pd.DataFrame, source: str, interval: str, stats: Sequence[str] = DEFAULT_STATS) -> pd.DataFrame:
+    """Aggregate a raw WU/TSI client frame (pre-cleaning column names) using SOURCE_AGGREGATION."""
+    key, ts_column, exclude = SOURCE_AGGREGATION[source]
+    return aggregate_frame(df, key, ts_column, interval, stats=stats, exclude=exclude)
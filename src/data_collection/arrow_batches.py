@@ -0,0 +1,194 @@
+"""Arrow-native raw batches for the streaming GCS path (``--stream --arrow``).
+
+The DataFrame path goes JSON -> row dicts -> DataFrame -> cleaned copy -> ``pa.Table.from_pandas``
+-> Parquet. In Arrow mode the clients build ``pyarrow.RecordBatch``es straight from their
+parsed columns against fixed raw schemas (``tsi_parser.TSI_RAW_SCHEMA``,
+``wu_parser.WU_RAW_SCHEMA``), ``clean_record_batch`` renames them to the collector's column
+names as a projection that reuses the column buffers, and IncrementalParquetWriter writes the
+batches as row groups. No step converts to or from pandas.
+
+``CLEAN_RENAMES`` is the rename table of both paths (daily_data_collector.clean_and_transform_data
+and ``clean_record_batch``), so the two write the same column names.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.data_collection.aggregation import STAT_SUFFIXES
+
+log = logging.getLogger(__name__)
+
+TIMESTAMP_TYPE = pa.timestamp('ns', tz='UTC')
+
+CLEAN_RENAMES: Dict[str, Dict[str, str]] = {
+    'WU': {
+        'stationID': 'native_sensor_id', 'obsTimeUtc': 'timestamp',
+        'tempAvg': 'temperature', 'tempHigh': 'temperature_high', 'tempLow': 'temperature_low',
+        'humidityAvg': 'humidity', 'humidityHigh': 'humidity_high', 'humidityLow': 'humidity_low',
+        'precipRate': 'precip_rate', 'precipTotal': 'precip_total',
+        'windspeedAvg': 'wind_speed_avg', 'windspeedHigh': 'wind_speed_high', 'windspeedLow': 'wind_speed_low',
+        'windgustAvg': 'wind_gust_avg', 'windgustHigh': 'wind_gust_high', 'windgustLow': 'wind_gust_low',
+        'winddirAvg': 'wind_direction_avg',
+        'pressureMax': 'pressure_max', 'pressureMin': 'pressure_min', 'pressureTrend': 'pressure_trend',
+        'solarRadiationHigh': 'solar_radiation', 'uvHigh': 'uv_high',
+        'windchillAvg': 'wind_chill_avg', 'windchillHigh': 'wind_chill_high', 'windchillLow': 'wind_chill_low',
+        'heatindexAvg': 'heat_index_avg', 'heatindexHigh': 'heat_index_high', 'heatindexLow': 'heat_index_low',
+        'dewptAvg': 'dew_point_avg', 'dewptHigh': 'dew_point_high', 'dewptLow': 'dew_point_low',
+        'qcStatus': 'qc_status', 'obsTimeLocal': 'obsTimeLocal'
+    },
+    'TSI': {
+        'cloud_device_id': 'native_sensor_id', 'device_id': 'native_sensor_id',
+        'cloud_timestamp': 'timestamp', 'cloud_account_id': 'cloud_account_id',
+        # PM measurements
+        'pm1_0': 'pm1_0', 'pm2_5': 'pm2_5', 'pm4_0': 'pm4_0', 'pm10': 'pm10',
+        'pm2_5_aqi': 'pm2_5_aqi', 'pm10_aqi': 'pm10_aqi',
+        # Number concentration measurements
+        'ncpm0_5': 'ncpm0_5', 'ncpm1_0': 'ncpm1_0', 'ncpm2_5': 'ncpm2_5',
+        'ncpm4_0': 'ncpm4_0', 'ncpm10': 'ncpm10',
+        # Environmental measurements
+        'rh': 'humidity', 'temperature': 'temperature', 'tpsize': 'tpsize',
+        # Gas measurements
+        'co2_ppm': 'co2_ppm', 'co_ppm': 'co_ppm', 'o3_ppb': 'o3_ppb',
+        'no2_ppb': 'no2_ppb', 'so2_ppb': 'so2_ppb', 'ch2o_ppb': 'ch2o_ppb',
+        'voc_mgm3': 'voc_mgm3', 'baro_inhg': 'baro_inhg',
+        # Metadata
+        'model': 'model', 'serial': 'serial', 'is_indoor': 'is_indoor',
+        'is_public': 'is_public', 'latitude': 'latitude', 'longitude': 'longitude'
+    },
+}
+# (latitude, longitude) column pairs that get float64 '<name>_f' copies
+COORDINATE_PAIRS = (('latitude', 'longitude'), ('lat', 'lon'))
+
+
+def cleaned_name(name: str, source: str) -> str:
+    """Collector name of a raw column; aggregate columns keep their _min/_max/_count/_last suffix."""
+    renames = CLEAN_RENAMES[source]
+    if name in renames:
+        return renames[name]
+    for suffix in STAT_SUFFIXES:
+        if name.endswith(suffix) and name[:-len(suffix)] in renames:
+            return renames[name[:-len(suffix)]] + suffix
+    return name
+
+
+def string_array(values: Sequence[Any]) -> pa.Array:
+    """Arrow strings from Python values; non-string values are rendered with str()."""
+    try:
+        return pa.array(values, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def number_array(values: Sequence[Any], type: pa.DataType = pa.float64()) -> Tuple[pa.Array, int]:
+    """(numeric array, number of values coerced to null) from JSON numbers or numeric strings."""
+    try:
+        return pa.array(values, type=type, from_pandas=True), 0
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    convert = int if pa.types.is_integer(type) else float
+    out: List[Any] = []
+    bad = 0
+    for value in values:
+        if value is None:
+            out.append(None)
+            continue
+        try:
+            out.append(convert(float(value)))
+        except (TypeError, ValueError, OverflowError):
+            out.append(None)
+            bad += 1
+    return pa.array(out, type=type), bad
+
+
+def timestamp_array(values: Sequence[Any]) -> Tuple[pa.Array, int]:
+    """(UTC timestamp array, number of unparseable values) from ISO 8601 strings with offsets."""
+    strings = string_array(values)
+    try:
+        return strings.cast(TIMESTAMP_TYPE), 0
+    except pa.ArrowInvalid:
+        pass
+    out: List[Any] = []
+    bad = 0
+    for value in strings:
+        try:
+            out.append(value.cast(TIMESTAMP_TYPE).value)
+        except pa.ArrowInvalid:
+            out.append(None)
+            bad += 1
+    return pa.array(out, type=TIMESTAMP_TYPE), bad
+
+
+def as_utc_timestamps(column: pa.Array) -> pa.Array:
+    """``column`` as timestamp[ns, UTC]; naive timestamps are taken as UTC (no copy when already typed)."""
+    if column.type == TIMESTAMP_TYPE:
+        return column
+    if pa.types.is_timestamp(column.type):
+        if column.type.tz is None:
+            column = column.cast(pa.timestamp(column.type.unit, tz='UTC'))
+        return column.cast(TIMESTAMP_TYPE)
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        return timestamp_array(column.to_pylist())[0]
+    raise TypeError(f"cannot read {column.type} values as timestamps")
+
+
+def _as_float(column: pa.Array) -> pa.Array:
+    if column.type == pa.float64():
+        return column
+    try:
+        return column.cast(pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return number_array(column.to_pylist())[0]
+
+
+def clean_record_batch(batch: pa.RecordBatch, source: str) -> pa.RecordBatch:
+    """Arrow counterpart of clean_and_transform_data for a raw client batch.
+
+    Columns are renamed per ``CLEAN_RENAMES`` (the first of several columns mapped to the same
+    name wins, as in the uploader), ``timestamp`` is typed as UTC and mirrored as ``ts``, and
+    coordinates get float64 ``_f`` copies. Columns that need no conversion share their buffers
+    with ``batch``.
+    """
+    names: List[str] = []
+    columns: List[pa.Array] = []
+
+    def put(name: str, column: pa.Array) -> None:
+        if name in names:
+            columns[names.index(name)] = column
+        else:
+            names.append(name)
+            columns.append(column)
+
+    for name, column in zip(batch.schema.names, batch.columns):
+        new_name = cleaned_name(name, source)
+        if new_name not in names:
+            names.append(new_name)
+            columns.append(column)
+    if 'timestamp' in names:
+        timestamps = as_utc_timestamps(columns[names.index('timestamp')])
+        put('timestamp', timestamps)
+        put('ts', timestamps)
+    for pair in COORDINATE_PAIRS:
+        if all(name in names for name in pair):
+            for name in pair:
+                put(f"{name}_f", _as_float(columns[names.index(name)]))
+    return pa.RecordBatch.from_arrays(columns, names=names)
+
+
+def filter_time_window(batch: pa.RecordBatch, column: str, start: pd.Timestamp,
+                       end: Optional[pd.Timestamp] = None) -> pa.RecordBatch:
+    """Rows of ``batch`` with ``start <= column < end`` (no upper bound when ``end`` is None; null timestamps are dropped)."""
+    values = batch.column(batch.schema.get_field_index(column))
+
+    def bound(t: pd.Timestamp) -> pa.Scalar:
+        return pa.scalar(pd.Timestamp(t).value, type=TIMESTAMP_TYPE).cast(values.type)
+
+    mask = pc.greater_equal(values, bound(start))
+    if end is not None:
+        mask = pc.and_(mask, pc.less(values, bound(end)))
+    return batch.filter(mask)
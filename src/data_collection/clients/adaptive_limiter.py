@@ -0,0 +1,117 @@
+"""Adaptive (AIMD) concurrency limiting for API fan-out.
+
+The window grows additively (about +1 per window's worth of healthy responses) while
+latency stays under target and shrinks multiplicatively on throttling (429) or timeouts,
+the same way TCP congestion control probes for available capacity.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+
+@dataclass(slots=True)
+class _Slot:
+    outcome: str = OUTCOME_ERROR
+
+
+class AdaptiveConcurrencyLimiter:
+    """Drop-in replacement for a fixed ``asyncio.Semaphore`` whose size follows AIMD."""
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: Optional[int] = None,
+                 latency_target: float = 10.0, decrease_factor: float = 0.5, name: str = "api"):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit if max_limit is not None else initial * 4)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.name = name
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.counts: Dict[str, int] = {OUTCOME_OK: 0, OUTCOME_THROTTLED: 0, OUTCOME_TIMEOUT: 0, OUTCOME_ERROR: 0}
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Requests started before the last decrease must not trigger another one (one cut per congestion event).
+        self._epoch = 0
+
+    @property
+    def window(self) -> int:
+        return int(self.limit)
+
+    async def acquire(self) -> int:
+        """Wait for a free slot; returns the epoch the request started in."""
+        if self.in_flight < self.window and not self._waiters:
+            self.in_flight += 1
+            return self._epoch
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we were cancelled; give it back.
+                self.in_flight -= 1
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+        return self._epoch
+
+    def release(self, latency: float, outcome: str, epoch: Optional[int] = None) -> None:
+        self.in_flight -= 1
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        previous = self.window
+        if outcome in (OUTCOME_THROTTLED, OUTCOME_TIMEOUT):
+            if epoch is None or epoch == self._epoch:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                self._epoch += 1
+        elif outcome == OUTCOME_OK and latency <= self.latency_target:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+        if self.window != previous:
+            level = logging.INFO if self.window < previous else logging.DEBUG
+            log.log(level, f"[{self.name}] concurrency window {previous} -> {self.window} after {outcome} "
+                           f"(latency={latency:.2f}s in_flight={self.in_flight})")
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.window:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[_Slot]:
+        """Hold one slot; set ``slot.outcome`` before leaving so the window can adapt."""
+        epoch = await self.acquire()
+        started = time.monotonic()
+        slot = _Slot()
+        try:
+            yield slot
+        finally:
+            self.release(time.monotonic() - started, slot.outcome, epoch)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "window": self.window,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency_ewma_s": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            **self.counts,
+        }
@@ -1,56 +1,400 @@
 import asyncio
 import httpx
 import logging
+import time
+import zlib
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Union
+
+from tqdm import tqdm
+
+from src.config.constants import DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT
+from .circuit_breaker import CircuitBreaker
+from .adaptive_limiter import OUTCOME_OK, OUTCOME_THROTTLED, OUTCOME_TIMEOUT, AdaptiveConcurrencyLimiter
+from .json_decode import Decoder, DecodeStats, ItemSink, JSONArrayStream, default_decoder
+from .http_pool import HTTPPoolConfig, build_async_client
+from .response_cache import ResponseCache, request_key
+from .rate_limit import RETRYABLE_STATUS, RetryPolicy, get_host_bucket, parse_retry_after
+from .work_queue import WorkQueue
 
 log = logging.getLogger(__name__)
 
+
+class _Flight:
+    """One in-flight request shared by every concurrent caller asking for the same thing."""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# Bytes handed to the streaming JSON parser at a time
+_STREAM_SLICE = 1 << 16
+
+# (base_url, request key) -> in-flight GET, shared by all client instances in the process
+_IN_FLIGHT: Dict[tuple, _Flight] = {}
+
+
 class BaseClient(ABC):
     """Abstract base class for API clients."""
 
-    def __init__(self, base_url: str, api_key: Optional[str] = None, semaphore_limit: int = 10):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, semaphore_limit: int = 10,
+                 http_client: Optional[httpx.AsyncClient] = None, pool_config: Optional[HTTPPoolConfig] = None,
+                 rate_limit: Optional[float] = DEFAULT_RATE_LIMIT, rate_burst: float = DEFAULT_RATE_BURST,
+                 retry_policy: Optional[RetryPolicy] = None, max_concurrency: Optional[int] = None,
+                 response_cache: Optional[ResponseCache] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 decoder: Optional[Decoder] = None):
+        """
+        http_client: Optional shared, already-open pooled client (see http_pool.build_async_client).
+            When given it is reused as-is and left open on exit; its owner closes it.
+        pool_config: Pool limits/timeouts used when this client builds its own session.
+        rate_limit / rate_burst: Token bucket shared by all clients hitting the same host (None disables).
+        retry_policy: Backoff for 429/5xx/transport errors (defaults to MAX_RETRIES with full jitter).
+        semaphore_limit / max_concurrency: Initial and maximum in-flight requests for the adaptive
+            (AIMD) limiter; the window grows while responses are healthy and halves on 429/timeouts.
+            Fan-outs run on a bounded work queue with one worker per possible in-flight request.
+        response_cache: On-disk cache of responses for closed data windows (defaults to API_CACHE_DIR, if set).
+        circuit_breaker: Per-sensor breaker for requests made with a ``breaker_key`` (defaults to
+            CircuitBreaker.from_env for this host; state is saved on close).
+        decoder: bytes -> object JSON decoder for response bodies (default: orjson if installed, see json_decode).
+        """
         self.base_url = base_url
         self.api_key = api_key
-        self.semaphore = asyncio.Semaphore(semaphore_limit)
+        host = httpx.URL(base_url).host or base_url
+        self.limiter = AdaptiveConcurrencyLimiter(semaphore_limit, max_limit=max_concurrency, name=host)
+        self.retries = 0
+        self.rate_limiter = get_host_bucket(host, rate_limit, rate_burst) if rate_limit else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.pool_config = pool_config
+        self._shared_client = http_client
+        # Work queues of fan-outs still running (concurrent days share one client) and totals of finished ones
+        self.work_queues: List[WorkQueue] = []
+        self._finished_work = {'runs': 0, 'total': 0, 'completed': 0}
+        self.coalesced = 0
+        decoder_name, default = default_decoder()
+        self.decoder = decoder or default
+        self.decode_stats = DecodeStats(getattr(decoder, '__qualname__', 'custom') if decoder else decoder_name)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker.from_env(host)
+        # Incremental runs: sensor id -> newest persisted timestamp (see set_watermarks)
+        self.watermarks: Dict[str, pd.Timestamp] = {}
+        self.watermark_lookback = pd.Timedelta(0)
+        self.watermark_skips = 0
         self.client: Optional[httpx.AsyncClient] = None # Initialize as None, created in __aenter__
 
     async def __aenter__(self):
-        """Asynchronous context manager entry point. Initializes the httpx.AsyncClient."""
-        self.client = httpx.AsyncClient()
+        """Asynchronous context manager entry point. Attaches the shared pool or builds a pooled httpx.AsyncClient."""
+        if self._shared_client is not None:
+            self.client = self._shared_client
+        else:
+            self.client = build_async_client(self.pool_config)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Asynchronous context manager exit point. Closes the httpx.AsyncClient."""
-        if self.client:
-            await self.client.aclose()
+        """Asynchronous context manager exit point. Closes the httpx.AsyncClient unless it is shared."""
+        await self.aclose()
 
     async def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
-                       headers: Optional[Dict[str, str]] = None, json_data: Optional[Dict[str, Any]] = None) -> Optional[Any]:
-        """Makes an asynchronous HTTP request."""
+                       headers: Optional[Dict[str, str]] = None, json_data: Optional[Dict[str, Any]] = None,
+                       breaker_key: Optional[str] = None, sink: Optional[ItemSink] = None) -> Optional[Any]:
+        """Makes an asynchronous HTTP request.
+
+        Requests are paced by the per-host token bucket. Throttling (429), transient 5xx and
+        transport errors are retried with jittered exponential backoff, honoring Retry-After;
+        a 429 also pauses the whole host bucket. A 401 is replayed once with headers from
+        _refresh_auth. Returns None once retries are exhausted.
+
+        With a response cache, requests for closed data windows are answered from disk when
+        possible and successful responses are stored for replay.
+
+        ``breaker_key`` (a sensor id) routes the request through the circuit breaker: requests for
+        a sensor whose breaker is open return None immediately, and exhausting the retries counts
+        as a failure for that sensor.
+
+        Identical concurrent GETs (same host, endpoint and params, credentials aside) are coalesced:
+        later callers await the first caller's in-flight request and receive the same parsed payload,
+        which callers must therefore treat as read-only. The shared request is only cancelled once
+        every caller waiting on it has been cancelled.
+
+        With a ``sink`` the body of a top-level JSON array is not decoded as a whole: elements are
+        parsed as chunks arrive and handed to ``sink.add``, and ``sink.result()`` is returned. Only
+        the unparsed tail of the body is held in memory. Such requests are not coalesced.
+        """
         # Ensure client is initialized before making a request
         if not self.client:
             raise RuntimeError("httpx.AsyncClient not initialized. Use BaseClient within an 'async with' block.")
-        
-        async with self.semaphore:
+        if method.upper() != 'GET' or sink is not None:
+            return await self._send(method, endpoint, params, headers, json_data, breaker_key, sink)
+
+        key = (self.base_url, request_key(method, endpoint, params, json_data))
+        flight = _IN_FLIGHT.get(key)
+        if flight is None or flight.task.done():
+            flight = _Flight(asyncio.ensure_future(self._send(method, endpoint, params, headers, json_data, breaker_key)))
+            _IN_FLIGHT[key] = flight
+            flight.task.add_done_callback(lambda task: _IN_FLIGHT.pop(key) if _IN_FLIGHT.get(key) is flight else None)
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def _send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                    json_data: Optional[Dict[str, Any]], breaker_key: Optional[str],
+                    sink: Optional[ItemSink] = None) -> Optional[Any]:
+        """Performs one request (cache, circuit breaker, pacing and retries); see _request."""
+
+        cache_key: Optional[str] = None
+        if self.response_cache is not None and self.response_cache.is_cacheable(params):
+            cache_key = request_key(method, endpoint, params, json_data)
+            body = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if body is not None:
+                return self._decode(body) if sink is None else self._stream_cached(body, sink)
+        breaker = self.circuit_breaker if breaker_key is not None else None
+        if breaker is not None and not breaker.allow(breaker_key):
+            log.debug(f"Circuit open for {breaker_key}; skipping {endpoint}")
+            return None
+
+        url = f"{self.base_url}/{endpoint}"
+        try:
+            result = await self._send_with_retries(method, url, params, headers, json_data, breaker, breaker_key, sink,
+                                                   compress=cache_key is not None)
+        finally:
+            if breaker is not None:
+                # A probe that ended without a verdict (client error, throttling, cancellation) must not stay in flight
+                breaker.release(breaker_key)
+        if result is None:
+            return None
+        payload, body = result
+        if cache_key is not None:
             try:
-                response = await self.client.request(
-                    method, f"{self.base_url}/{endpoint}",
-                    params=params,
-                    headers=headers,
-                    json=json_data,
-                    timeout=60.0
-                )
-                response.raise_for_status()
-                if response.status_code == 204:
+                if sink is None:
+                    await asyncio.to_thread(self.response_cache.put, cache_key, body)
+                else:
+                    await asyncio.to_thread(self.response_cache.put_compressed, cache_key, body)
+            except OSError as e:
+                log.warning(f"Could not cache response for {url}: {e}")
+        return payload
+
+    async def _send_with_retries(self, method: str, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                                 json_data: Optional[Dict[str, Any]], breaker: Optional[CircuitBreaker], breaker_key: Optional[str],
+                                 sink: Optional[ItemSink], compress: bool) -> Optional[tuple[Any, Optional[bytes]]]:
+        """The request loop of _send: (payload, raw or compressed body) on success, None when it gave up or got no content."""
+        max_retries = self.retry_policy.max_retries
+        attempt = 0
+        reauthenticated = False
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            status: Optional[int] = None
+            retry_after: Optional[float] = None
+            async with self.limiter.slot() as slot:
+                try:
+                    if sink is None:
+                        response = await self.client.request(
+                            method, url,
+                            params=params,
+                            headers=headers,
+                            json=json_data,
+                        )
+                    else:
+                        request = self.client.build_request(method, url, params=params, headers=headers, json=json_data)
+                        response = await self.client.send(request, stream=True)
+                        if response.is_error:
+                            await response.aread()
+                    response.raise_for_status()
+                    slot.outcome = OUTCOME_OK
+                    if breaker is not None:
+                        breaker.record_success(breaker_key)
+                    if response.status_code == 204:
+                        await response.aclose()
+                        return None
+                    if sink is None:
+                        payload = self._decode(response.content)
+                        body = response.content
+                    else:
+                        payload, body = await self._stream_response(response, sink, compress=compress)
+                    return payload, body
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status == 401 and not reauthenticated:
+                        slot.outcome = OUTCOME_OK
+                    elif status not in RETRYABLE_STATUS:
+                        # The server answered promptly; a client error says nothing about its capacity.
+                        slot.outcome = OUTCOME_OK
+                        log.warning(f"API request to {e.request.url} failed with status {status}: {e.response.text}")
+                        return None
+                    elif status == 429:
+                        slot.outcome = OUTCOME_THROTTLED
+                    retry_after = parse_retry_after(e.response.headers.get('Retry-After'))
+                    reason = f"status {status}"
+                except httpx.TimeoutException as e:
+                    slot.outcome = OUTCOME_TIMEOUT
+                    reason = f"{type(e).__name__}: {e}"
+                except httpx.TransportError as e:
+                    reason = f"{type(e).__name__}: {e}"
+                except Exception as e:
+                    log.error(f"API request failed: {e}", exc_info=True)
                     return None
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                log.warning(f"API request to {e.request.url} failed with status {e.response.status_code}: {e.response.text}")
-            except Exception as e:
-                log.error(f"API request failed: {e}", exc_info=True)
+            if status == 401:
+                # Token rejected (e.g. expired mid-run): refresh once and replay without spending a retry.
+                reauthenticated = True
+                new_headers = await self._refresh_auth(headers)
+                if new_headers is None:
+                    log.warning(f"API request to {url} unauthorized and credentials could not be refreshed.")
+                    return None
+                log.info(f"API request to {url} unauthorized; retrying once with refreshed credentials.")
+                headers = new_headers
+                continue
+            if attempt >= max_retries:
+                log.error(f"API request to {url} failed after {attempt + 1} attempts ({reason}); giving up.")
+                # Only timeouts, transport errors and 5xx count against the sensor; 429 is the host throttling us
+                if breaker is not None and (status is None or status >= 500):
+                    breaker.record_failure(breaker_key)
+                return None
+            delay = self.retry_policy.delay(attempt, retry_after)
+            if status == 429 and self.rate_limiter is not None:
+                self.rate_limiter.penalize(delay)
+            attempt += 1
+            self.retries += 1
+            log.warning(f"API request to {url} failed ({reason}); retry {attempt}/{max_retries} in {delay:.1f}s "
+                        f"(concurrency window={self.limiter.window})")
+            await asyncio.sleep(delay)
+
+    async def _stream_response(self, response: httpx.Response, sink: ItemSink, compress: bool) -> tuple[Any, Optional[bytes]]:
+        """Feed a streamed JSON array body into ``sink``; returns (sink result, zlib body for the cache or None)."""
+        parser = JSONArrayStream()
+        compressor = zlib.compressobj(6) if compress else None
+        compressed: list[bytes] = []
+        nbytes, elapsed = 0, 0.0
+        sink.reset()
+        try:
+            async for chunk in response.aiter_bytes():
+                nbytes += len(chunk)
+                if compressor is not None:
+                    compressed.append(compressor.compress(chunk))
+                started = time.perf_counter()
+                # Transports may hand over large chunks; parse in slices so few elements are alive at once.
+                for offset in range(0, len(chunk), _STREAM_SLICE):
+                    for item in parser.feed(chunk[offset:offset + _STREAM_SLICE]):
+                        sink.add(item)
+                elapsed += time.perf_counter() - started
+        finally:
+            await response.aclose()
+        started = time.perf_counter()
+        for item in parser.close():
+            sink.add(item)
+        result = sink.result()
+        elapsed += time.perf_counter() - started
+        self.decode_stats.record(nbytes, elapsed)
+        log.debug(f"Stream-decoded {nbytes} bytes in {elapsed * 1000:.2f} ms")
+        if compressor is None:
+            return result, None
+        compressed.append(compressor.flush())
+        return result, b''.join(compressed)
+
+    def _stream_cached(self, body: bytes, sink: ItemSink, chunk_size: int = _STREAM_SLICE) -> Any:
+        """Feed a cached body to ``sink`` in chunks, as if it were streamed from the API."""
+        started = time.perf_counter()
+        parser = JSONArrayStream()
+        sink.reset()
+        for offset in range(0, len(body), chunk_size):
+            for item in parser.feed(body[offset:offset + chunk_size]):
+                sink.add(item)
+        for item in parser.close():
+            sink.add(item)
+        result = sink.result()
+        self.decode_stats.record(len(body), time.perf_counter() - started)
+        return result
+
+    def _decode(self, body: bytes) -> Any:
+        """Decode a JSON response body, recording its size and decode time."""
+        started = time.perf_counter()
+        payload = self.decoder(body)
+        elapsed = time.perf_counter() - started
+        self.decode_stats.record(len(body), elapsed)
+        log.debug(f"Decoded {len(body)} bytes with {self.decode_stats.decoder} in {elapsed * 1000:.2f} ms")
+        return payload
+
+    async def _refresh_auth(self, stale_headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Return replacement headers after a 401, or None if this client has no credentials to refresh."""
+        return None
+
+    def set_watermarks(self, watermarks: Mapping[str, pd.Timestamp], lookback: Union[str, pd.Timedelta] = '0s') -> None:
+        """Only request data newer than ``watermark - lookback`` for the given sensors."""
+        self.watermarks = {str(k): pd.Timestamp(v) for k, v in watermarks.items()}
+        self.watermark_lookback = pd.Timedelta(lookback)
+
+    def _since(self, sensor_id: str) -> Optional[pd.Timestamp]:
+        """Lower bound for new data of ``sensor_id`` (UTC), or None when it has no watermark."""
+        mark = self.watermarks.get(str(sensor_id))
+        if mark is None:
             return None
+        mark = mark.tz_localize('UTC') if mark.tzinfo is None else mark.tz_convert('UTC')
+        return mark - self.watermark_lookback
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Current request metrics, including the adaptive concurrency window."""
+        snapshot: Dict[str, Any] = {'host': self.limiter.name, 'retries': self.retries, 'coalesced': self.coalesced,
+                                    **self.limiter.snapshot()}
+        if self.watermarks:
+            snapshot['watermark_skips'] = self.watermark_skips
+        snapshot['decode'] = self.decode_stats.snapshot()
+        if self.circuit_breaker is not None:
+            snapshot['circuit_breaker'] = self.circuit_breaker.snapshot()
+        if self.response_cache is not None:
+            snapshot['response_cache'] = self.response_cache.snapshot()
+        if self.work_queues or self._finished_work['runs']:
+            snapshot['work_queue'] = self.work_queue_snapshot()
+        return snapshot
+
+    def work_queue_snapshot(self) -> Dict[str, Any]:
+        """Work queue counters summed over every fan-out of this client, running or finished."""
+        live = list(self.work_queues)
+        total = self._finished_work['total'] + sum(q.total for q in live)
+        completed = self._finished_work['completed'] + sum(q.completed for q in live)
+        return {
+            'runs': self._finished_work['runs'] + len(live),
+            'running': len(live),
+            'workers': sum(q.workers for q in live),
+            'total': total,
+            'queued': sum(q.depth for q in live),
+            'in_progress': sum(q.in_progress for q in live),
+            'completed': completed,
+            'pending': max(total - completed, 0),
+        }
+
+    async def _iter_work(self, items: Sequence[Any], handler: Callable[[Any], Awaitable[Optional[pd.DataFrame]]], desc: str,
+                         priority: Optional[Callable[[Any], Any]] = None) -> AsyncIterator[pd.DataFrame]:
+        """Run ``handler`` over request items on a bounded work queue, yielding non-empty frames as they complete.
+
+        Coroutines are created lazily by the workers, so memory does not grow with the size of
+        the request grid. ``priority`` orders items (lower first, e.g. work_queue.recent_first).
+        Results may also be pyarrow RecordBatches (Arrow mode), so emptiness is checked with ``len``.
+        """
+        queue: WorkQueue = WorkQueue(handler, workers=self.limiter.max_limit, name=desc)
+        self.work_queues.append(queue)
+        try:
+            with tqdm(total=len(items), desc=desc) as progress:
+                async for result in queue.run(items, priority=priority):
+                    progress.update(queue.completed - progress.n)
+                    progress.set_postfix(queued=queue.depth, in_progress=queue.in_progress, refresh=False)
+                    if len(result):
+                        yield result
+                progress.update(queue.completed - progress.n)
+        finally:
+            self.work_queues.remove(queue)
+            self._finished_work['runs'] += 1
+            self._finished_work['total'] += queue.total
+            self._finished_work['completed'] += queue.completed
 
     @abstractmethod
     async def fetch_data(self, **kwargs) -> pd.DataFrame:
@@ -58,6 +402,9 @@ class BaseClient(ABC):
         pass
 
     async def aclose(self):
-        """Close the underlying HTTP client session."""
-        if self.client:
-            await self.client.aclose()
\ No newline at end of file
+        """Close the underlying HTTP client session (shared sessions are left to their owner)."""
+        if self.client and self.client is not self._shared_client:
+            await self.client.aclose()
+        self.client = None
+        if self.circuit_breaker is not None:
+            await asyncio.to_thread(self.circuit_breaker.save)
@@ -0,0 +1,151 @@
+"""Per-sensor circuit breaker with failure memory across runs.
+
+An offline TSI device or WU station costs a full request timeout (plus retries) for every
+day it is asked for. The breaker counts consecutive failed requests per sensor id (timeouts,
+transport errors and 5xx; a 429 is the host throttling the client, not a dead sensor); after
+``threshold`` failures it opens and requests for that sensor are short-circuited for a
+cooldown. When the cooldown expires one probe request is let through (half-open): success
+closes the breaker, failure re-opens it with a doubled cooldown (capped at ``max_cooldown``),
+and a request that ends without a verdict (a 4xx answer, cancellation) frees the probe slot.
+
+State is kept in one JSON document (default DATA_ROOT/state/circuit_breakers.json, override
+with CIRCUIT_BREAKER_STATE) with a section per API host, so sensors that are chronically
+dead stay skipped on the next run. Tunables: CIRCUIT_BREAKER_THRESHOLD (default 3; 0
+disables), CIRCUIT_BREAKER_COOLDOWN (default 1h), CIRCUIT_BREAKER_MAX_COOLDOWN (default 1D).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from src.config.paths import DATA_ROOT
+
+log = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = DATA_ROOT / 'state' / 'circuit_breakers.json'
+_FILE_LOCK = threading.Lock()
+
+
+@dataclass(slots=True)
+class BreakerState:
+    failures: int = 0  # consecutive failed requests
+    trips: int = 0  # consecutive times the breaker opened without a success in between
+    opened_at: Optional[float] = None  # epoch seconds; None while closed
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker keyed by sensor id."""
+
+    def __init__(self, name: str, threshold: int = 3, cooldown: float = 3600.0, max_cooldown: float = 86400.0,
+                 state_path: Optional[os.PathLike | str] = None, clock: Callable[[], float] = time.time):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state_path = Path(state_path) if state_path else None
+        self.clock = clock
+        self.short_circuited = 0
+        self._states: Dict[str, BreakerState] = {}
+        self._probing: set[str] = set()
+        self._dirty = False
+        if self.state_path is not None:
+            self._load()
+
+    @classmethod
+    def from_env(cls, name: str) -> Optional["CircuitBreaker"]:
+        """Breaker configured from CIRCUIT_BREAKER_* variables (None when the threshold is 0)."""
+        try:
+            threshold = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '3'))
+            cooldown = pd.Timedelta(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '1h')).total_seconds()
+            max_cooldown = pd.Timedelta(os.getenv('CIRCUIT_BREAKER_MAX_COOLDOWN', '1D')).total_seconds()
+        except ValueError as e:
+            log.warning(f"Invalid CIRCUIT_BREAKER_* setting ({e}); using defaults")
+            threshold, cooldown, max_cooldown = 3, 3600.0, 86400.0
+        if threshold <= 0:
+            return None
+        return cls(name, threshold, cooldown, max_cooldown, os.getenv('CIRCUIT_BREAKER_STATE') or DEFAULT_STATE_PATH)
+
+    def _load(self) -> None:
+        assert self.state_path is not None
+        try:
+            doc = json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(f"Ignoring unreadable circuit breaker state {self.state_path}: {e}")
+            return
+        for key, raw in doc.get(self.name, {}).items():
+            self._states[key] = BreakerState(**raw)
+        opened = [key for key, state in self._states.items() if state.opened_at is not None]
+        if opened:
+            log.info(f"[{self.name}] {len(opened)} sensors have open circuit breakers from earlier runs")
+
+    def save(self) -> None:
+        """Persist this host's section of the state document (only when something changed)."""
+        if self.state_path is None or not self._dirty:
+            return
+        section = {key: asdict(state) for key, state in sorted(self._states.items())
+                   if state.failures or state.opened_at is not None}
+        with _FILE_LOCK:
+            try:
+                doc = json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+            except (OSError, json.JSONDecodeError):
+                doc = {}
+            doc[self.name] = section
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(self.state_path.suffix + '.tmp')
+            tmp.write_text(json.dumps(doc, indent=2, sort_keys=True))
+            os.replace(tmp, self.state_path)
+        self._dirty = False
+
+    def _open_for(self, state: BreakerState) -> float:
+        return min(self.cooldown * (2 ** max(state.trips - 1, 0)), self.max_cooldown)
+
+    def allow(self, key: str) -> bool:
+        """Whether a request for ``key`` may be sent now; False short-circuits it."""
+        state = self._states.get(key)
+        if state is None or state.opened_at is None:
+            return True
+        if self.clock() - state.opened_at < self._open_for(state) or key in self._probing:
+            self.short_circuited += 1
+            return False
+        self._probing.add(key)  # half-open: one probe request decides
+        log.info(f"[{self.name}] cooldown over for {key}; probing")
+        return True
+
+    def release(self, key: str) -> None:
+        """End a request for ``key`` without a verdict; a half-open probe may be sent again."""
+        self._probing.discard(key)
+
+    def record_success(self, key: str) -> None:
+        self._probing.discard(key)
+        state = self._states.pop(key, None)
+        if state is not None:
+            self._dirty = True
+            if state.opened_at is not None:
+                log.info(f"[{self.name}] {key} recovered; circuit closed")
+
+    def record_failure(self, key: str) -> None:
+        probing = key in self._probing
+        self._probing.discard(key)
+        state = self._states.setdefault(key, BreakerState())
+        state.failures += 1
+        self._dirty = True
+        if probing or (state.opened_at is None and state.failures >= self.threshold):
+            state.trips += 1
+            state.opened_at = self.clock()
+            log.warning(f"[{self.name}] circuit opened for {key} after {state.failures} consecutive failures; "
+                        f"skipping it for {self._open_for(state) / 3600:.1f}h")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'open': sorted(key for key, state in self._states.items() if state.opened_at is not None),
+            'short_circuited': self.short_circuited,
+        }
@@ -0,0 +1,115 @@
+"""Pooled HTTP transport shared by the API clients.
+
+A single ``httpx.AsyncClient`` built here can be handed to both ``WUClient`` and
+``TSIClient`` for a whole collection run so keep-alive sockets (and TLS sessions)
+are reused across days instead of being re-established per client instance.
+
+Tunables may be overridden through environment variables:
+  HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY,
+  HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP2=1
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from src.config.constants import API_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        log.warning(f"Ignoring invalid {name}={raw!r}; using {default}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env_float(name, float(default)))
+
+
+@dataclass(slots=True)
+class HTTPPoolConfig:
+    """Connection pool limits and split timeouts for the shared transport."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    write_timeout: float = API_TIMEOUT
+    pool_timeout: float = API_TIMEOUT
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "HTTPPoolConfig":
+        defaults = cls()
+        return cls(
+            max_connections=_env_int("HTTP_MAX_CONNECTIONS", defaults.max_connections),
+            max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", defaults.max_keepalive_connections),
+            keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", defaults.keepalive_expiry),
+            connect_timeout=_env_float("HTTP_CONNECT_TIMEOUT", defaults.connect_timeout),
+            read_timeout=_env_float("HTTP_READ_TIMEOUT", defaults.read_timeout),
+            write_timeout=defaults.write_timeout,
+            pool_timeout=defaults.pool_timeout,
+            http2=os.getenv("HTTP2") == "1",
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+def http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional ``h2`` package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _use_http2(config: HTTPPoolConfig) -> bool:
+    if config.http2 and not http2_available():
+        log.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1.")
+        return False
+    return config.http2
+
+
+def build_transport(config: Optional[HTTPPoolConfig] = None) -> httpx.AsyncHTTPTransport:
+    """A network transport with the pool limits and HTTP/2 setting of ``config``.
+
+    httpx ignores ``limits``/``http2`` of the client when it is given an explicit transport, so
+    wrapping transports (e.g. replay.RecordingTransport) forward to one built here.
+    """
+    config = config or HTTPPoolConfig.from_env()
+    return httpx.AsyncHTTPTransport(limits=config.limits(), http2=_use_http2(config))
+
+
+def build_async_client(config: Optional[HTTPPoolConfig] = None, **client_kwargs) -> httpx.AsyncClient:
+    """Create a pooled ``httpx.AsyncClient`` from ``config`` (defaults read from the environment)."""
+    config = config or HTTPPoolConfig.from_env()
+    http2 = _use_http2(config)
+    log.info(
+        "Building pooled HTTP client: max_connections=%s keepalive=%s expiry=%ss http2=%s",
+        config.max_connections, config.max_keepalive_connections, config.keepalive_expiry, http2,
+    )
+    return httpx.AsyncClient(limits=config.limits(), timeout=config.timeout(), http2=http2, **client_kwargs)
@@ -0,0 +1,152 @@
+"""Pluggable JSON decoding of API response bodies.
+
+The clients decode straight from the response bytes. orjson (optional ``fast-json`` extra)
+parses bytes without first building a ``str`` and is several times faster than the stdlib
+on large nested TSI telemetry payloads; without it the stdlib decoder is used. Set
+API_JSON_DECODER=json to force the stdlib decoder.
+
+``JSONArrayStream`` is the streaming alternative for very large array payloads: it splits
+a top-level JSON array into its elements as body chunks arrive, so a consumer (an
+``ItemSink``) can keep what it needs from each element and drop the rest.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Protocol, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+Decoder = Callable[[bytes], Any]
+
+
+def stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def default_decoder() -> Tuple[str, Decoder]:
+    """(name, decoder) to use: orjson when installed, unless API_JSON_DECODER=json."""
+    requested = os.getenv('API_JSON_DECODER', '').strip().lower()
+    if requested == 'json':
+        return 'json', stdlib_loads
+    if orjson is not None:
+        return 'orjson', orjson.loads
+    if requested == 'orjson':
+        log.warning("API_JSON_DECODER=orjson but orjson is not installed; using the stdlib decoder.")
+    return 'json', stdlib_loads
+
+
+class ItemSink(Protocol):
+    """Consumer of streamed array elements (see BaseClient._request ``sink``)."""
+
+    def reset(self) -> None: ...
+
+    def add(self, item: Any) -> None: ...
+
+    def result(self) -> Any: ...
+
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+class JSONArrayStream:
+    """Incrementally split a top-level JSON array into its elements.
+
+    ``feed`` bytes as they arrive and iterate the completed elements it returns; ``close``
+    returns the rest and raises ``json.JSONDecodeError`` if the document was malformed or
+    truncated. Only the unparsed tail of the body is buffered. A body whose top level is not
+    an array (e.g. an error object) is buffered whole and returned as a single item.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._state = 'start'  # start -> items -> done, or start -> whole
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._buf += self._text.decode(chunk)
+        return list(self._drain(final=False))
+
+    def close(self) -> List[Any]:
+        self._buf += self._text.decode(b'', final=True)
+        items = list(self._drain(final=True))
+        if self._state == 'whole':
+            items.append(json.loads(self._buf))
+            self._buf = ''
+        elif self._state != 'done':
+            raise json.JSONDecodeError('truncated JSON array', self._buf, len(self._buf))
+        return items
+
+    def _drain(self, final: bool) -> Iterator[Any]:
+        buf, pos, size = self._buf, 0, len(self._buf)
+        try:
+            while True:
+                while pos < size and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos >= size or self._state == 'whole':
+                    break
+                if self._state == 'start':
+                    if buf[pos] != '[':
+                        self._state = 'whole'
+                        break
+                    self._state = 'items'
+                    pos += 1
+                elif self._state == 'done':
+                    raise json.JSONDecodeError('unexpected data after JSON array', buf, pos)
+                elif buf[pos] == ']':
+                    self._state = 'done'
+                    pos += 1
+                elif buf[pos] == ',':
+                    pos += 1
+                else:
+                    try:
+                        item, end = self._decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break  # element not complete yet
+                    if not final and not isinstance(item, (dict, list, str)) and (end == size or buf[end] not in _DELIMITERS):
+                        break  # a number may continue in the next chunk ("2" of "2.5")
+                    yield item
+                    pos = end
+        finally:
+            self._buf = buf[pos:]
+
+
+@dataclass(slots=True)
+class DecodeStats:
+    """Running totals of response decoding for one client."""
+
+    decoder: str
+    requests: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        self.requests += 1
+        self.bytes += nbytes
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'decoder': self.decoder,
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6),
+            'mean_ms': round(1000 * self.seconds / self.requests, 3) if self.requests else 0.0,
+            'max_ms': round(1000 * self.max_seconds, 3),
+            'mb_per_s': round(self.bytes / self.seconds / 1e6, 1) if self.seconds else 0.0,
+        }
@@ -0,0 +1,101 @@
+"""Per-host token bucket rate limiting and jittered retry/backoff for API requests."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from src.config.constants import MAX_RETRIES
+
+log = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient upstream failures.
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` requests/second with bursts up to ``capacity``.
+
+    Callers reserve a token up front (the balance may go negative) and sleep until it
+    matures, so no lock is needed and waiting callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds the caller must wait before using it."""
+        self._refill(time.monotonic())
+        self.tokens -= 1.0
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        """Drain the bucket so no new request for this host starts for ``seconds`` (e.g. after a 429)."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+_HOST_BUCKETS: Dict[str, TokenBucket] = {}
+
+
+def get_host_bucket(host: str, rate: float, capacity: float) -> TokenBucket:
+    """Return the process-wide bucket for ``host`` so every client hitting it shares one budget."""
+    bucket = _HOST_BUCKETS.get(host)
+    if bucket is None:
+        bucket = TokenBucket(rate, capacity)
+        _HOST_BUCKETS[host] = bucket
+    return bucket
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(slots=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter; a server-provided Retry-After takes precedence."""
+
+    max_retries: int = MAX_RETRIES
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
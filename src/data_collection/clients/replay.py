@@ -0,0 +1,277 @@
+"""Record/replay and synthetic HTTP transports for exercising the API clients offline.
+
+All three plug in as the transport of the shared ``httpx.AsyncClient`` (see
+http_pool.build_async_client), so WUClient/TSIClient run their real request, retry,
+rate-limit and parsing code paths:
+
+- ``RecordingTransport`` forwards to the live APIs and captures every response into a
+  fixture archive (gzip JSON lines). Credentials are never stored: API keys are dropped
+  from the recorded URLs and OAuth tokens are replaced.
+- ``ReplayTransport`` answers from such an archive; unrecorded requests get a 404.
+- ``SyntheticAPI`` synthesizes deterministic WU ``history/hourly``/``observations/all``
+  and TSI ``telemetry``/token payloads for any station, device and date, with configurable
+  latency and injected 429/503 errors, for load tests at fleet scale.
+
+The collector picks these up from the environment: API_RECORD_ARCHIVE=<path>,
+API_REPLAY_ARCHIVE=<path> or API_SYNTHETIC=1 (SYNTHETIC_LATENCY, SYNTHETIC_ERROR_RATE,
+SYNTHETIC_THROTTLE_RATE tune the latter).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+from .http_pool import HTTPPoolConfig, build_transport
+from .response_cache import UNKEYED_PARAMS, request_key
+from .tsi_parser import MEASUREMENT_COLUMNS
+
+log = logging.getLogger(__name__)
+
+REPLAY_TOKEN = 'replay-token'
+
+
+def _redacted_url(url: httpx.URL) -> str:
+    params = [(k, v) for k, v in url.params.multi_items() if k not in UNKEYED_PARAMS]
+    return str(url.copy_with(params=params))
+
+
+def _archive_key(method: str, url: httpx.URL) -> str:
+    """Request identity used by the archive: method, host/path and non-credential query params."""
+    return request_key(method, f"{url.host}{url.path}", dict(url.params.multi_items()))
+
+
+class FixtureArchive:
+    """Recorded responses keyed by request, persisted as gzip-compressed JSON lines."""
+
+    def __init__(self, path: os.PathLike | str):
+        self.path = Path(path)
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: os.PathLike | str) -> "FixtureArchive":
+        archive = cls(path)
+        with gzip.open(archive.path, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    archive.records[record['key']] = record
+        log.info(f"Loaded {len(archive.records)} recorded responses from {archive.path}")
+        return archive
+
+    def add(self, request: httpx.Request, response: httpx.Response) -> None:
+        body = response.text
+        if request.method == 'POST' and 'access_token' in body:
+            # Never persist live credentials: keep the token response shape only.
+            payload = response.json()
+            payload['access_token'] = REPLAY_TOKEN
+            body = json.dumps(payload)
+        key = _archive_key(request.method, request.url)
+        self.records[key] = {
+            'key': key,
+            'method': request.method,
+            'url': _redacted_url(request.url),
+            'status': response.status_code,
+            'content_type': response.headers.get('content-type', 'application/json'),
+            'body': body,
+        }
+
+    def lookup(self, request: httpx.Request) -> Optional[httpx.Response]:
+        record = self.records.get(_archive_key(request.method, request.url))
+        if record is None:
+            return None
+        return httpx.Response(record['status'], content=record['body'].encode('utf-8'),
+                              headers={'content-type': record['content_type']}, request=request)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as fh:
+            for record in self.records.values():
+                fh.write(json.dumps(record) + '\n')
+        os.replace(tmp, self.path)
+        log.info(f"Saved {len(self.records)} recorded responses to {self.path}")
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward requests to ``inner`` (default: the network, pooled per http_pool) and record responses; saved on close."""
+
+    def __init__(self, archive: FixtureArchive, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.archive = archive
+        self.inner = inner or build_transport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        # The body is already decoded, so the transfer headers no longer apply.
+        headers = [(k, v) for k, v in response.headers.multi_items()
+                   if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')]
+        recorded = httpx.Response(response.status_code, headers=headers, content=content, request=request)
+        if response.status_code < 500 and response.status_code != 429:
+            self.archive.add(request, recorded)
+        return recorded
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        self.archive.save()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serve responses from a fixture archive; requests that were not recorded get a 404."""
+
+    def __init__(self, archive: FixtureArchive):
+        self.archive = archive
+        self.misses: List[str] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.archive.lookup(request)
+        if response is None:
+            self.misses.append(_redacted_url(request.url))
+            log.warning(f"No recorded response for {request.method} {_redacted_url(request.url)}")
+            return httpx.Response(404, json={'error': 'not recorded'}, request=request)
+        return response
+
+
+def _seeded(*parts: Any) -> random.Random:
+    """Deterministic RNG per (endpoint, sensor, period) so replays of a request are identical."""
+    return random.Random(zlib.crc32('|'.join(map(str, parts)).encode()))
+
+
+class SyntheticAPI:
+    """Stand-in for the WU and TSI APIs producing plausible payloads for any sensor and date.
+
+    latency: mean seconds per response (jittered +/-50%). error_rate / throttle_rate: fraction
+    of data requests answered with 503 / 429 (Retry-After: 0); token requests always succeed. tsi_interval / wu_interval: spacing
+    of synthesized readings. Per-path request and error counts are kept in ``counts``.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 tsi_interval: str = '15min', wu_interval: str = 'h', seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.tsi_interval = tsi_interval
+        self.wu_interval = wu_interval
+        self._faults = random.Random(seed)
+        self.counts: Counter = Counter()
+
+    @classmethod
+    def from_env(cls) -> "SyntheticAPI":
+        return cls(
+            latency=float(os.getenv('SYNTHETIC_LATENCY', '0') or 0),
+            error_rate=float(os.getenv('SYNTHETIC_ERROR_RATE', '0') or 0),
+            throttle_rate=float(os.getenv('SYNTHETIC_THROTTLE_RATE', '0') or 0),
+        )
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.rstrip('/')
+        self.counts[path.rsplit('/', 1)[-1]] += 1
+        if request.method == 'POST':
+            return httpx.Response(200, json={'access_token': 'synthetic-token', 'expires_in': 3600}, request=request)
+        if self.latency:
+            await asyncio.sleep(self.latency * (0.5 + self._faults.random()))
+        roll = self._faults.random()
+        if roll < self.throttle_rate:
+            self.counts['429'] += 1
+            return httpx.Response(429, headers={'Retry-After': '0'}, request=request)
+        if roll < self.throttle_rate + self.error_rate:
+            self.counts['503'] += 1
+            return httpx.Response(503, request=request)
+
+        params = request.url.params
+        if path.endswith('history/hourly'):
+            day = pd.Timestamp(params['date'])
+            return self._wu(request, params['stationId'], day, day)
+        if path.endswith('observations/all/1day'):
+            today = pd.Timestamp.now(tz='UTC').normalize().tz_localize(None)
+            return self._wu(request, params['stationId'], today, today)
+        if path.endswith('observations/all'):
+            return self._wu(request, params['stationId'], pd.Timestamp(params['startDate']), pd.Timestamp(params['endDate']))
+        if path.endswith('telemetry'):
+            return httpx.Response(200, json=self.telemetry(params['device_id'], params['start_date'], params['end_date']), request=request)
+        return httpx.Response(404, json={'error': f'unknown endpoint {path}'}, request=request)
+
+    def _wu(self, request: httpx.Request, station_id: str, first: pd.Timestamp, last: pd.Timestamp) -> httpx.Response:
+        return httpx.Response(200, json=self.wu_observations(station_id, first, last), request=request)
+
+    def wu_observations(self, station_id: str, first_day: pd.Timestamp, last_day: pd.Timestamp) -> Dict[str, Any]:
+        """WU observations payload for ``station_id`` over the inclusive day range."""
+        stamps = pd.date_range(first_day, last_day + pd.Timedelta(days=1), freq=self.wu_interval, inclusive='left', tz='UTC')
+        rng = _seeded('wu', station_id, first_day.date(), last_day.date())
+        observations = []
+        for ts in stamps:
+            temp = 60 + 20 * rng.random()
+            observations.append({
+                'stationID': station_id,
+                'tz': 'America/New_York',
+                'obsTimeUtc': ts.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'epoch': int(ts.timestamp()),
+                'lat': 35.99, 'lon': -78.9,
+                'solarRadiationHigh': round(800 * rng.random(), 1),
+                'uvHigh': round(10 * rng.random(), 1),
+                'winddirAvg': rng.randrange(360),
+                'humidityHigh': 90.0, 'humidityLow': 40.0, 'humidityAvg': round(40 + 50 * rng.random(), 1),
+                'qcStatus': 1,
+                'imperial': {
+                    'tempAvg': round(temp, 1), 'tempHigh': round(temp + 2, 1), 'tempLow': round(temp - 2, 1),
+                    'windspeedAvg': round(10 * rng.random(), 1), 'windgustHigh': round(20 * rng.random(), 1),
+                    'dewptAvg': round(temp - 10, 1), 'heatindexAvg': round(temp, 1),
+                    'pressureMax': 30.1, 'pressureMin': 29.9, 'precipRate': 0.0, 'precipTotal': 0.0,
+                },
+            })
+        return {'observations': observations}
+
+    def telemetry(self, device_id: str, start: str, end: str) -> List[Dict[str, Any]]:
+        """TSI telemetry records for ``device_id`` in [start, end)."""
+        stamps = pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=self.tsi_interval, inclusive='left')
+        rng = _seeded('tsi', device_id, start, end)
+        names = list(MEASUREMENT_COLUMNS)[:12]
+        records = []
+        for ts in stamps:
+            records.append({
+                'cloud_account_id': 'synthetic',
+                'cloud_device_id': device_id,
+                'cloud_timestamp': ts.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'model': '8143',
+                'metadata': {'location': {'latitude': 35.99, 'longitude': -78.9}, 'is_indoor': False, 'is_public': True},
+                'sensors': [{
+                    'serial': f'{device_id}-sn',
+                    'measurements': [{'name': name, 'data': {'value': round(50 * rng.random(), 2)}} for name in names],
+                }],
+            })
+        return records
+
+
+def transport_from_env(pool_config: Optional[HTTPPoolConfig] = None) -> Optional[httpx.AsyncBaseTransport]:
+    """Transport selected by API_REPLAY_ARCHIVE / API_RECORD_ARCHIVE / API_SYNTHETIC=1, else None (live network).
+
+    Recording forwards to a network transport pooled per ``pool_config`` (default: from the environment).
+    """
+    replay = os.getenv('API_REPLAY_ARCHIVE')
+    if replay:
+        return ReplayTransport(FixtureArchive.load(replay))
+    record = os.getenv('API_RECORD_ARCHIVE')
+    if record:
+        log.info(f"Recording API responses to {record}")
+        return RecordingTransport(FixtureArchive(record), inner=build_transport(pool_config))
+    if os.getenv('API_SYNTHETIC') == '1':
+        log.warning("API_SYNTHETIC=1: serving synthetic WU/TSI responses (no live API calls)")
+        return SyntheticAPI.from_env().transport()
+    return None
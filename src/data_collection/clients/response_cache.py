@@ -0,0 +1,207 @@
+"""Content-addressed on-disk cache of raw API responses.
+
+Re-running the collector for a day whose cleaning/staging/load step failed would otherwise
+re-download every station-day and device window. With the cache enabled, ``BaseClient._request``
+stores each successful response body (zlib-compressed) under the SHA-256 of the request
+(method, endpoint, params, JSON body) and serves repeats from local disk.
+
+Only responses whose data window has closed are cached: a request covering today can still
+gain observations, so it always goes to the API. A closed window is immutable — once stored it
+is never revalidated — and entries are evicted least-recently-used when the cache exceeds its
+size budget.
+
+Enabled with API_CACHE_DIR=<path>; tunables API_CACHE_MAX_MB (default 2048) and
+API_CACHE_SETTLE (how long after a window ends before it is treated as final, default 2h).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# Credentials are not part of a request's identity (rotating a key must not invalidate the cache)
+UNKEYED_PARAMS = frozenset({'apiKey', 'api_key', 'access_token'})
+DEFAULT_MAX_BYTES = 2048 * 1024 * 1024
+DEFAULT_SETTLE = '2h'
+_SUFFIX = '.json.z'
+
+
+def request_key(method: str, endpoint: str, params: Optional[Mapping[str, Any]] = None,
+                json_data: Optional[Any] = None) -> str:
+    """SHA-256 hex digest identifying a request, independent of parameter order and credentials."""
+    keyed = {k: v for k, v in (params or {}).items() if k not in UNKEYED_PARAMS}
+    canonical = json.dumps([method.upper(), endpoint.strip('/'), keyed, json_data], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def window_end(params: Optional[Mapping[str, Any]]) -> Optional[pd.Timestamp]:
+    """Exclusive UTC end of the data window a request covers, or None if it has no explicit dates.
+
+    Understands the WU ``date`` (YYYYMMDD) / ``endDate`` (YYYY-MM-DD) day parameters and the
+    TSI ``end_date`` RFC3339 instant.
+    """
+    if not params:
+        return None
+    try:
+        if params.get('end_date'):
+            ts = pd.Timestamp(params['end_date'])
+            return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+        day = params.get('endDate') or params.get('date')
+        if day:
+            return pd.Timestamp(str(day), tz='UTC').normalize() + pd.Timedelta(days=1)
+    except ValueError:
+        return None
+    return None
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of compressed response bodies in a local directory."""
+
+    def __init__(self, root: os.PathLike | str, max_bytes: int = DEFAULT_MAX_BYTES, settle: str = DEFAULT_SETTLE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.settle = pd.Timedelta(settle)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> compressed size, oldest first
+        self._bytes = 0
+        self._scan()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Cache configured by API_CACHE_DIR (None when unset)."""
+        root = os.getenv('API_CACHE_DIR')
+        if not root:
+            return None
+        try:
+            max_bytes = int(float(os.getenv('API_CACHE_MAX_MB', DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+        except ValueError:
+            log.warning(f"Ignoring invalid API_CACHE_MAX_MB={os.getenv('API_CACHE_MAX_MB')!r}")
+            max_bytes = DEFAULT_MAX_BYTES
+        return get_response_cache(root, max_bytes, os.getenv('API_CACHE_SETTLE', DEFAULT_SETTLE))
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{_SUFFIX}"
+
+    def _scan(self) -> None:
+        if not self.root.exists():
+            return
+        found = []
+        for path in self.root.glob(f"*/*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.name[:-len(_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        if found:
+            log.info(f"Response cache {self.root}: {len(found)} entries, {self._bytes / 1e6:.1f} MB")
+
+    def is_cacheable(self, params: Optional[Mapping[str, Any]], now: Optional[pd.Timestamp] = None) -> bool:
+        """True when the request's data window closed at least ``settle`` ago."""
+        end = window_end(params)
+        if end is None:
+            return False
+        now = now if now is not None else pd.Timestamp.now(tz='UTC')
+        return end + self.settle <= now
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Raw response body for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            body = zlib.decompress(path.read_bytes())
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            return None
+        except (OSError, zlib.error) as e:
+            log.warning(f"Dropping unreadable response cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            path.unlink(missing_ok=True)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(path)  # persist recency so LRU order survives restarts
+        except OSError:
+            pass
+        return body
+
+    def put(self, key: str, body: bytes) -> None:
+        """Store a response body (atomically) and evict least-recently-used entries over budget."""
+        self.put_compressed(key, zlib.compress(body, 6))
+
+    def put_compressed(self, key: str, data: bytes) -> None:
+        """Store an already zlib-compressed body (e.g. compressed while it was streamed)."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._bytes += len(data)
+            self.stores += 1
+            evicted = self._evict()
+        for victim in evicted:
+            self._path(victim).unlink(missing_ok=True)
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _evict(self) -> list[str]:
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'root': str(self.root),
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+
+
+def get_response_cache(root: os.PathLike | str, max_bytes: int = DEFAULT_MAX_BYTES, settle: str = DEFAULT_SETTLE) -> ResponseCache:
+    """Return the process-wide cache for ``root`` so every client shares one LRU index and budget."""
+    key = str(Path(root).resolve())
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = ResponseCache(root, max_bytes=max_bytes, settle=settle)
+        _CACHES[key] = cache
+    return cache
@@ -0,0 +1,75 @@
+"""Cached OAuth bearer tokens with expiry-aware refresh shared by all coroutines of a client."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# (access_token, expires_in seconds or None when the provider does not say)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, Optional[float]]]]
+
+
+class BearerTokenManager:
+    """Caches one access token and refreshes it under a lock.
+
+    The token is treated as expired ``refresh_margin`` seconds before its real expiry so
+    long-running requests never start with a token about to lapse; for short-lived tokens
+    the margin is capped at half the lifetime, so each token is still reused. Concurrent callers
+    that find the token stale wait on the same refresh instead of each hitting the
+    OAuth endpoint.
+    """
+
+    def __init__(self, fetch_token: TokenFetcher, refresh_margin: float = 60.0, default_ttl: float = 3600.0):
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._token: Optional[str] = None
+        self._refresh_at = 0.0  # monotonic time the cached token is due for refresh
+        self._lock = asyncio.Lock()
+        self.refresh_count = 0
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._refresh_at
+
+    def expiring(self) -> bool:
+        """True when a token is cached but due for proactive refresh."""
+        return self._token is not None and not self._valid()
+
+    def invalidate(self) -> None:
+        self._token = None
+        self._refresh_at = 0.0
+
+    async def get_token(self) -> Optional[str]:
+        """Return the cached token, refreshing it first if it is missing or near expiry."""
+        if self._valid():
+            return self._token
+        async with self._lock:
+            if self._valid():  # another coroutine refreshed while we waited
+                return self._token
+            return await self._refresh_locked()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """Force a refresh after a rejected token, unless someone already replaced ``stale_token``."""
+        async with self._lock:
+            if self._valid() and self._token != stale_token:
+                return self._token
+            return await self._refresh_locked()
+
+    async def _refresh_locked(self) -> Optional[str]:
+        try:
+            token, expires_in = await self._fetch_token()
+        except Exception as e:
+            log.error(f"Token refresh failed: {e}", exc_info=True)
+            self.invalidate()
+            return None
+        ttl = float(expires_in) if expires_in else self.default_ttl
+        margin = min(self.refresh_margin, ttl / 2)
+        self._token = token
+        self._refresh_at = time.monotonic() + ttl - margin
+        self.refresh_count += 1
+        log.info(f"Obtained bearer token (expires in {ttl:.0f}s, refresh #{self.refresh_count})")
+        return token
@@ -1,300 +1,223 @@
-
-import asyncio
+import httpx
+import os
 import pandas as pd
 import logging
-from datetime import datetime
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import pyarrow as pa
 
+from src.config.constants import TSI_RATE_LIMIT
 from .base_client import BaseClient
+from .http_pool import HTTPPoolConfig
+from .token_manager import BearerTokenManager
+from .tsi_parser import TelemetryColumns, parse_telemetry, parse_telemetry_batch
+from src.data_collection.arrow_batches import filter_time_window
+from .work_queue import recent_first
 from src.utils.config_loader import get_tsi_devices
+from src.data_collection.aggregation import aggregate_source
+from src.utils.tsi_date_manager import TSIDateRangeManager
 
 log = logging.getLogger(__name__)
 
+
+def split_by_day(df: pd.DataFrame, ts_column: str = 'timestamp') -> Dict[str, pd.DataFrame]:
+    """Split a multi-day frame into per-day (UTC) frames keyed by YYYY-MM-DD."""
+    if df.empty or ts_column not in df.columns:
+        return {}
+    days = pd.to_datetime(df[ts_column], utc=True).dt.strftime("%Y-%m-%d")
+    return {day: part.reset_index(drop=True) for day, part in df.groupby(days, sort=True)}
+
+
 class TSIClient(BaseClient):
     """Client for fetching data from the TSI API."""
 
-    def __init__(self, client_id: str, client_secret: str, auth_url: str, base_url: str = "https://api-prd.tsilink.com/api/v3/external"):
-        super().__init__(base_url, semaphore_limit=3)
+    def __init__(self, client_id: str, client_secret: str, auth_url: str, base_url: str = "https://api-prd.tsilink.com/api/v3/external",
+                 http_client: Optional[httpx.AsyncClient] = None, pool_config: Optional[HTTPPoolConfig] = None,
+                 max_window_days: int = 1, stream_parse: Optional[bool] = None):
+        """
+        max_window_days: Days covered by one telemetry request per device. 1 keeps one request per
+            device-day; larger windows (clamped to TSI's 90-day lookback) cut request count for backfills.
+        stream_parse: Parse telemetry records into column buffers while the body streams in, so peak
+            memory per request is a chunk rather than the whole decoded payload (slower to parse).
+            Defaults to the TSI_STREAM_PARSE=1 environment switch.
+        """
+        super().__init__(base_url, semaphore_limit=3, http_client=http_client, pool_config=pool_config,
+                         rate_limit=TSI_RATE_LIMIT)
+        self.max_window_days = max(1, int(max_window_days))
+        if stream_parse is None:
+            stream_parse = os.getenv('TSI_STREAM_PARSE') == '1'
+        self.stream_parse = stream_parse
         self.client_id = client_id
         self.client_secret = client_secret
         self.auth_url = auth_url
         self.device_ids = get_tsi_devices()
         self.headers: Optional[Dict[str, str]] = None
+        self.token_manager = BearerTokenManager(self._request_token)
 
-    async def _authenticate(self) -> bool:
-        """Authenticates with the TSI API to get an access token using the managed httpx.AsyncClient."""
+    async def _request_token(self) -> Tuple[str, Optional[float]]:
+        """Requests a new access token from the TSI OAuth endpoint using the managed httpx.AsyncClient."""
         params = {'grant_type': 'client_credentials'}
         data = {'client_id': self.client_id, 'client_secret': self.client_secret}
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         if not self.client:
-            log.error("TSIClient httpx.AsyncClient not initialized. Use TSIClient within an 'async with' block.")
-            return False
-        try:
-            log.info("Trying TSI authentication with params and form-encoded body using managed client...")
-            auth_resp = await self.client.post(self.auth_url, params=params, data=data, headers=headers)
-            auth_resp.raise_for_status()
-            auth_json = auth_resp.json()
-            self.headers = {"Authorization": f"Bearer {auth_json['access_token']}", "Accept": "application/json"}
-            log.info("TSI authentication succeeded with params and form-encoded body.")
-            return True
-        except Exception as e:
-            log.error(f"TSI authentication failed: {e}", exc_info=True)
+            raise RuntimeError("TSIClient httpx.AsyncClient not initialized. Use TSIClient within an 'async with' block.")
+        log.info("Trying TSI authentication with params and form-encoded body using managed client...")
+        auth_resp = await self.client.post(self.auth_url, params=params, data=data, headers=headers)
+        auth_resp.raise_for_status()
+        auth_json = auth_resp.json()
+        log.info("TSI authentication succeeded with params and form-encoded body.")
+        expires_in = auth_json.get('expires_in')
+        return auth_json['access_token'], float(expires_in) if expires_in else None
+
+    def _set_token(self, token: str) -> Dict[str, str]:
+        self.headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+        return self.headers
+
+    async def _authenticate(self) -> bool:
+        """Ensures a valid access token, reusing the cached one until it nears expiry."""
+        token = await self.token_manager.get_token()
+        if not token:
+            log.error("TSI authentication failed.")
             return False
+        self._set_token(token)
+        return True
+
+    async def _auth_headers(self) -> Optional[Dict[str, str]]:
+        """Current bearer headers, proactively refreshed when the cached token is about to expire."""
+        if self.token_manager.expiring():
+            await self._authenticate()
+        return self.headers
+
+    async def _refresh_auth(self, stale_headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        stale_token = (stale_headers or {}).get("Authorization", "").removeprefix("Bearer ")
+        token = await self.token_manager.refresh(stale_token=stale_token or None)
+        if not token:
+            return None
+        return {**(stale_headers or {}), **self._set_token(token)}
 
     async def _fetch_one_day(self, device_id: str, date_iso: str) -> Optional[pd.DataFrame]:
         """Fetches data for a single device and day using the telemetry endpoint with start_date and end_date parameters."""
-        if not self.headers:
+        return await self._fetch_window(device_id, date_iso, date_iso)
+
+    async def _fetch_window(self, device_id: str, first_day: str, last_day: str,
+                            arrow: bool = False) -> Optional[Union[pd.DataFrame, pa.RecordBatch]]:
+        """Fetches data for a single device over the inclusive day window [first_day, last_day] in one telemetry call.
+
+        With ``arrow`` the result is a RecordBatch (tsi_parser.TSI_RAW_SCHEMA) instead of a DataFrame.
+        """
+        headers = await self._auth_headers()
+        if not headers:
             log.error("TSI client is not authenticated.")
             return None
 
         # Use start_date and end_date parameters in RFC3339 format (required for historical data with measurements)
         # This is the key difference - age parameter returns empty sensor arrays, but start_date/end_date returns full measurements
-        from datetime import timedelta
-        
-        start_iso = f"{date_iso}T00:00:00Z"
-        target_date = datetime.strptime(date_iso, "%Y-%m-%d")
-        end_date = target_date + timedelta(days=1)
-        end_iso = end_date.strftime("%Y-%m-%dT00:00:00Z")
-        
+        window_start = pd.Timestamp(first_day, tz='UTC')
+        window_end = pd.Timestamp(last_day, tz='UTC') + pd.Timedelta(days=1)
+        # Incremental runs: start at the device watermark (minus lookback) instead of midnight
+        since = self._since(device_id)
+        if since is not None:
+            if since >= window_end:
+                self.watermark_skips += 1
+                return None
+            window_start = max(window_start, since)
+        start_iso = window_start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        end_iso = window_end.strftime("%Y-%m-%dT%H:%M:%SZ")
+        label = first_day if first_day == last_day else f"{first_day}..{last_day}"
+
         # Use start_date and end_date instead of age to get actual measurement data
         params = {'device_id': device_id, 'start_date': start_iso, 'end_date': end_iso}
 
-        # Use the telemetry endpoint with start_date/end_date to get nested sensor measurements
-        records = await self._request("GET", "telemetry", params=params, headers=self.headers)
-        log.info(f"TSI RAW API RESPONSE for device {device_id} date {date_iso} (start={start_iso}, end={end_iso}): received {len(records) if records else 0} records")
-        
-        if not records:
-            log.info(f"TSI API returned no records for device {device_id} date {date_iso}.")
+        # Use the telemetry endpoint with start_date/end_date to get nested sensor measurements.
+        # Nested sensor measurements are parsed straight into typed columns (see tsi_parser.MEASUREMENT_COLUMNS);
+        # missing measurements are NaN, and the upload schema (schema_registry) keeps their parquet columns typed.
+        if self.stream_parse:
+            columns = TelemetryColumns(device_id, arrow=arrow)
+            df = await self._request("GET", "telemetry", params=params, headers=headers, breaker_key=device_id, sink=columns)
+            received = columns.records
+        else:
+            records = await self._request("GET", "telemetry", params=params, headers=headers, breaker_key=device_id)
+            received = len(records) if records else 0
+            parse = parse_telemetry_batch if arrow else parse_telemetry
+            df = parse(records, device_id) if records else None
+        log.info(f"TSI RAW API RESPONSE for device {device_id} date {label} (start={start_iso}, end={end_iso}): received {received} records")
+
+        if not received:
+            log.info(f"TSI API returned no records for device {device_id} date {label}.")
             return None
-        
-        # Parse nested sensor measurements from telemetry response
-        data = []
-        for row in records:
-            timestamp = row.get('cloud_timestamp')
-            if not timestamp:
-                continue
-            
-            # Extract metadata from record
-            metadata = row.get('metadata', {})
-            location = metadata.get('location', {})
-            latitude = location.get('latitude')
-            longitude = location.get('longitude')
-            is_indoor = metadata.get('is_indoor')
-            is_public = metadata.get('is_public')
-            model = row.get('model')
-            cloud_account_id = row.get('cloud_account_id')
-            
-            # Initialize all sensor values with typed defaults (0.0 for float, '' for string, False for bool)
-            # This ensures consistent parquet schemas even when measurements are empty
-            # Using 0.0 instead of None prevents null-type columns in parquet
-            pm_1_0 = 0.0
-            pm_2_5 = 0.0
-            pm_4_0 = 0.0
-            pm_10 = 0.0
-            pm2_5_aqi = 0.0
-            pm10_aqi = 0.0
-            ncpm0_5 = 0.0
-            ncpm1_0 = 0.0
-            ncpm2_5 = 0.0
-            ncpm4_0 = 0.0
-            ncpm10 = 0.0
-            temp = 0.0
-            rh = 0.0
-            tpsize = 0.0
-            co2_ppm = 0.0
-            co_ppm = 0.0
-            baro_inhg = 0.0
-            o3_ppb = 0.0
-            no2_ppb = 0.0
-            so2_ppb = 0.0
-            ch2o_ppb = 0.0
-            voc_mgm3 = 0.0
-            serial = ''  # Initialize serial with empty string
-            
-            # Extract measurements from nested sensors array
-            sensors = row.get('sensors', [])
-            for sensor in sensors:
-                sensor_serial = sensor.get('serial')
-                if sensor_serial:
-                    serial = sensor_serial  # Override with actual serial if found
-                measurements = sensor.get('measurements', [])
-                for measurement in measurements:
-                    name = measurement.get('name', '')
-                    value = measurement.get('data', {}).get('value')
-                    
-                    # Only update field if value is not None (preserve 0.0 default for missing measurements)
-                    if value is None:
-                        continue
-                    
-                    # Map measurement names to fields
-                    if name == 'PM 1.0':
-                        pm_1_0 = float(value)
-                    elif name == 'PM 2.5':
-                        pm_2_5 = float(value)
-                    elif name == 'PM 4.0':
-                        pm_4_0 = float(value)
-                    elif name == 'PM 10':
-                        pm_10 = float(value)
-                    elif name == 'PM 2.5 AQI':
-                        pm2_5_aqi = float(value)
-                    elif name == 'PM 10 AQI':
-                        pm10_aqi = float(value)
-                    elif name == 'NC 0.5':
-                        ncpm0_5 = float(value)
-                    elif name == 'NC 1.0':
-                        ncpm1_0 = float(value)
-                    elif name == 'NC 2.5':
-                        ncpm2_5 = float(value)
-                    elif name == 'NC 4.0':
-                        ncpm4_0 = float(value)
-                    elif name == 'NC 10':
-                        ncpm10 = float(value)
-                    elif name == 'Temperature':
-                        temp = float(value)
-                    elif name == 'Relative Humidity':
-                        rh = float(value)
-                    elif name == 'Typical Particle Size':
-                        tpsize = float(value)
-                    elif name == 'CO2':
-                        co2_ppm = float(value)
-                    elif name == 'CO':
-                        co_ppm = float(value)
-                    elif name == 'Barometric Pressure':
-                        baro_inhg = float(value)
-                    elif name == 'O3':
-                        o3_ppb = float(value)
-                    elif name == 'NO2':
-                        no2_ppb = float(value)
-                    elif name == 'SO2':
-                        so2_ppb = float(value)
-                    elif name == 'CH2O':
-                        ch2o_ppb = float(value)
-                    elif name == 'VOC':
-                        voc_mgm3 = float(value)
-            
-            data.append({
-                'timestamp': timestamp,
-                'cloud_account_id': cloud_account_id,
-                'device_id': device_id,
-                'model': model,
-                'serial': serial,
-                'latitude': latitude,
-                'longitude': longitude,
-                'is_indoor': is_indoor,
-                'is_public': is_public,
-                'pm1_0': pm_1_0,
-                'pm2_5': pm_2_5,
-                'pm4_0': pm_4_0,
-                'pm10': pm_10,
-                'pm2_5_aqi': pm2_5_aqi,
-                'pm10_aqi': pm10_aqi,
-                'ncpm0_5': ncpm0_5,
-                'ncpm1_0': ncpm1_0,
-                'ncpm2_5': ncpm2_5,
-                'ncpm4_0': ncpm4_0,
-                'ncpm10': ncpm10,
-                'temperature': temp,
-                'rh': rh,
-                'tpsize': tpsize,
-                'co2_ppm': co2_ppm,
-                'co_ppm': co_ppm,
-                'baro_inhg': baro_inhg,
-                'o3_ppb': o3_ppb,
-                'no2_ppb': no2_ppb,
-                'so2_ppb': so2_ppb,
-                'ch2o_ppb': ch2o_ppb,
-                'voc_mgm3': voc_mgm3
-            })
-        
-        if not data:
-            log.info(f"No valid sensor measurements found for device {device_id} date {date_iso}.")
+        if df is None:
+            log.info(f"No valid sensor measurements found for device {device_id} date {label}.")
             return None
-        
-        df = pd.DataFrame(data)
-        log.info(f"TSI DataFrame for device {device_id} date {date_iso}: shape={df.shape}")
-        log.debug(f"TSI columns: {list(df.columns)}\nSample:\n{df.head().to_string(index=False)}")
-        
-        # Explicitly set dtypes to ensure consistent parquet schema
-        # This is critical for BigQuery external tables to work correctly
-        dtype_map = {
-            'cloud_account_id': 'object',
-            'device_id': 'object',
-            'model': 'object',
-            'serial': 'object',
-            'latitude': 'float64',
-            'longitude': 'float64',
-            'is_indoor': 'bool',
-            'is_public': 'bool',
-            'pm1_0': 'float64',
-            'pm2_5': 'float64',
-            'pm4_0': 'float64',
-            'pm10': 'float64',
-            'pm2_5_aqi': 'float64',
-            'pm10_aqi': 'float64',
-            'ncpm0_5': 'float64',
-            'ncpm1_0': 'float64',
-            'ncpm2_5': 'float64',
-            'ncpm4_0': 'float64',
-            'ncpm10': 'float64',
-            'temperature': 'float64',
-            'rh': 'float64',
-            'tpsize': 'float64',
-            'co2_ppm': 'float64',
-            'co_ppm': 'float64',
-            'baro_inhg': 'float64',
-            'o3_ppb': 'float64',
-            'no2_ppb': 'float64',
-            'so2_ppb': 'float64',
-            'ch2o_ppb': 'float64',
-            'voc_mgm3': 'float64'
-        }
-        
-        # Apply dtype conversions
-        for col, dtype in dtype_map.items():
-            if col in df.columns:
-                try:
-                    df[col] = df[col].astype(dtype)
-                except Exception as e:
-                    log.warning(f"Could not convert column {col} to {dtype}: {e}")
-        
-        log.debug(f"TSI DataFrame dtypes after conversion:\n{df.dtypes}")
-        
-        # Convert timestamp using pandas' flexible ISO8601 parser
-        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', utc=True)
-        
-        # Filter to only include records from the target date
-        df = df[df['timestamp'].dt.date == target_date.date()]
-        
-        if df.empty:
-            log.info(f"No data for target date {date_iso} after filtering (start_date/end_date returned data from other dates).")
+        shape = (df.num_rows, df.num_columns) if arrow else df.shape
+        log.info(f"TSI {'RecordBatch' if arrow else 'DataFrame'} for device {device_id} date {label}: shape={shape}")
+        if log.isEnabledFor(logging.DEBUG) and not arrow:
+            log.debug(f"TSI columns: {list(df.columns)}\nSample:\n{df.head().to_string(index=False)}")
+
+        # Filter to only include records inside the requested window
+        if arrow:
+            df = filter_time_window(df, 'timestamp', window_start, window_end)
+        else:
+            df = df[(df['timestamp'] >= window_start) & (df['timestamp'] < window_end)]
+
+        if not len(df):
+            log.info(f"No data for target date {label} after filtering (start_date/end_date returned data from other dates).")
             return None
-        
-        log.info(f"After filtering to {date_iso}: {len(df)} records remain")
+
+        log.info(f"After filtering to {label}: {len(df)} records remain")
         return df
 
-    async def fetch_data(self, start_date: str, end_date: str, aggregate: bool = False, agg_interval: str = 'h') -> pd.DataFrame:
+    def _build_windows(self, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """Inclusive (first_day, last_day) request windows covering the range.
+
+        With max_window_days == 1 this is one window per day. Larger windows are first clamped
+        to TSI's lookback via TSIDateRangeManager.split_date_range, then chunked to the maximum size.
         """
-        Fetches TSI data for a given date range, optionally aggregates into summaries.
-        When aggregate is False, returns raw flat-format observations with a 'timestamp' column.
+        if self.max_window_days == 1:
+            return [(d.strftime("%Y-%m-%d"),) * 2 for d in pd.date_range(start=start_date, end=end_date)]
+        requested_start, requested_end = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+        windows: List[Tuple[str, str]] = []
+        for chunk_start, chunk_end in TSIDateRangeManager.split_date_range(start_date, end_date):
+            first = max(pd.Timestamp(chunk_start), requested_start)
+            last = min(pd.Timestamp(chunk_end), requested_end)
+            for window_start in pd.date_range(first, last, freq=f"{self.max_window_days}D"):
+                window_end = min(window_start + pd.Timedelta(days=self.max_window_days - 1), last)
+                windows.append((window_start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+        covered = sum((pd.Timestamp(e) - pd.Timestamp(s)).days + 1 for s, e in windows)
+        requested = (requested_end - requested_start).days + 1
+        if covered < requested:
+            log.warning(f"TSI lookback limit: only {covered} of {requested} requested days are fetchable.")
+        return windows
+
+    async def iter_batches(self, start_date: str, end_date: str, arrow: bool = False) -> AsyncIterator[pd.DataFrame]:
+        """
+        Yields raw flat-format frames (one per device and request window) as requests complete,
+        without concatenating them, so memory stays bounded to the batches being processed.
+        With ``arrow`` the batches are pyarrow RecordBatches built without pandas.
         """
+        # Cached token is reused across calls (and days) until it nears expiry
         if not await self._authenticate():
             log.error("TSI authentication failed. No data will be fetched.")
-            return pd.DataFrame()
+            return
 
         log.info("Building list of requests for all devices and dates...")
-        date_range = pd.date_range(start=start_date, end=end_date)
-        requests = [(dev_id, d.strftime("%Y-%m-%d")) for dev_id in self.device_ids for d in date_range]
-        tasks = [self._fetch_one_day(dev_id, date_str) for dev_id, date_str in requests]
-
-        log.info(f"Starting async fetch for {len(tasks)} device-date combinations...")
-        all_results: list[pd.DataFrame] = []
-        from tqdm import tqdm
-        for future in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Fetching TSI Data"):
-            result = await future
-            if result is not None:
-                all_results.append(result)
+        windows = self._build_windows(start_date, end_date)
+        requests = [(dev_id, first, last) for dev_id in self.device_ids for first, last in windows]
+
+        log.info(f"Starting async fetch for {len(requests)} device-date combinations (window={self.max_window_days}d)...")
+        batches = 0
+        async for df in self._iter_work(requests, lambda req: self._fetch_window(*req, arrow=arrow), desc="Fetching TSI Data",
+                                        priority=lambda req: recent_first(req[2])):
+            batches += 1
+            yield df
+        log.info(f"Fetched data for {batches} device-date combinations.")
+        log.info(f"TSI request metrics: {self.metrics_snapshot()}")
 
-        log.info(f"Fetched data for {len(all_results)} device-date combinations.")
+    async def fetch_data(self, start_date: str, end_date: str, aggregate: bool = False, agg_interval: str = 'h') -> pd.DataFrame:
+        """
+        Fetches TSI data for a given date range, optionally aggregates into summaries.
+        When aggregate is False, returns raw flat-format observations with a 'timestamp' column.
+        """
+        all_results = [df async for df in self.iter_batches(start_date, end_date)]
 
         if not all_results:
             log.warning("No data fetched from TSI API.")
@@ -318,11 +241,7 @@ class TSIClient(BaseClient):
             log.info("Aggregation disabled; returning raw TSI DataFrame.")
             return raw_df
 
-        # Aggregation path
-        raw_df = raw_df.set_index('timestamp')
-        numeric_cols = raw_df.select_dtypes(include='number').columns.tolist()
-        agg_dict = {col: 'mean' for col in numeric_cols}
-        final_df = raw_df.groupby('device_id').resample(agg_interval).agg(agg_dict)  # type: ignore
-        final_df = final_df.reset_index()
+        # Aggregation path: mean (original column names) plus _min/_max/_count/_last per bucket
+        final_df = aggregate_source(raw_df, 'TSI', agg_interval)
         log.info(f"Successfully resampled TSI data to {len(final_df)} records at interval '{agg_interval}'.")
         return final_df
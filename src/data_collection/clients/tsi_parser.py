@@ -0,0 +1,204 @@
+"""Table-driven columnar parser for TSI ``telemetry`` responses.
+
+Each telemetry record nests its readings as ``sensors[].measurements[]`` entries keyed by
+a display name ("PM 2.5", "Temperature", ...). Instead of an if/elif chain per measurement
+and a list of row dicts, names are resolved through ``MEASUREMENT_COLUMNS`` to a column
+slot and values are written straight into flat column buffers, so the typed DataFrame is
+produced in a single construction step. ``TelemetryColumns`` accepts records one at a time,
+which lets the client feed it while the response body is still being parsed. The same buffers
+can also be emitted as a ``pyarrow.RecordBatch`` with ``TSI_RAW_SCHEMA`` (Arrow mode, see
+src/data_collection/arrow_batches.py) without building a DataFrame.
+
+Measurements a record does not carry are NaN (null in Arrow) rather than a placeholder value;
+the upload schema (src/data_collection/schema_registry.py) keeps their Parquet columns typed.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.data_collection.arrow_batches import TIMESTAMP_TYPE, number_array, string_array, timestamp_array
+
+# TSI measurement display name -> output column
+MEASUREMENT_COLUMNS: Dict[str, str] = {
+    'PM 1.0': 'pm1_0',
+    'PM 2.5': 'pm2_5',
+    'PM 4.0': 'pm4_0',
+    'PM 10': 'pm10',
+    'PM 2.5 AQI': 'pm2_5_aqi',
+    'PM 10 AQI': 'pm10_aqi',
+    'NC 0.5': 'ncpm0_5',
+    'NC 1.0': 'ncpm1_0',
+    'NC 2.5': 'ncpm2_5',
+    'NC 4.0': 'ncpm4_0',
+    'NC 10': 'ncpm10',
+    'Temperature': 'temperature',
+    'Relative Humidity': 'rh',
+    'Typical Particle Size': 'tpsize',
+    'CO2': 'co2_ppm',
+    'CO': 'co_ppm',
+    'Barometric Pressure': 'baro_inhg',
+    'O3': 'o3_ppb',
+    'NO2': 'no2_ppb',
+    'SO2': 'so2_ppb',
+    'CH2O': 'ch2o_ppb',
+    'VOC': 'voc_mgm3',
+}
+MEASUREMENT_FIELDS = tuple(MEASUREMENT_COLUMNS.values())
+METADATA_FIELDS = ('timestamp', 'cloud_account_id', 'device_id', 'model', 'serial',
+                   'latitude', 'longitude', 'is_indoor', 'is_public')
+COLUMN_ORDER = METADATA_FIELDS + MEASUREMENT_FIELDS
+TSI_RAW_SCHEMA = pa.schema(
+    [('timestamp', TIMESTAMP_TYPE), ('cloud_account_id', pa.string()), ('device_id', pa.string()),
+     ('model', pa.string()), ('serial', pa.string()), ('latitude', pa.float64()), ('longitude', pa.float64()),
+     ('is_indoor', pa.bool_()), ('is_public', pa.bool_())]
+    + [(name, pa.float64()) for name in MEASUREMENT_FIELDS]
+)
+
+_MEASUREMENT_SLOT = {name: slot for slot, name in enumerate(MEASUREMENT_COLUMNS)}
+
+
+class TelemetryColumns:
+    """Incremental column buffers for the telemetry records of one device.
+
+    Records are consumed one at a time (``add``) and only their timestamp, metadata and
+    measurement values are kept, so a caller streaming a response never holds more than one
+    record's Python objects. Also usable as the ``sink`` of BaseClient._request (reset/add/result);
+    ``result`` is the DataFrame, or the RecordBatch when ``arrow`` is set.
+    """
+
+    def __init__(self, device_id: str, fill_value: float = math.nan, arrow: bool = False):
+        self.device_id = device_id
+        self.fill_value = fill_value
+        self.arrow = arrow
+        self._fill_row = array('d', [fill_value] * len(MEASUREMENT_FIELDS))
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything buffered so far (e.g. before a retried request is re-read)."""
+        self.records = 0
+        self.rows = 0
+        self._values = array('d')
+        self._timestamps: List[str] = []
+        self._accounts: List[Any] = []
+        self._models: List[Any] = []
+        self._serials: List[str] = []
+        self._latitudes: List[Any] = []
+        self._longitudes: List[Any] = []
+        self._indoor: List[bool] = []
+        self._public: List[bool] = []
+
+    def add(self, record: Any) -> None:
+        """Buffer one telemetry record; records without ``cloud_timestamp`` are skipped."""
+        self.records += 1
+        if not isinstance(record, dict):
+            return
+        timestamp = record.get('cloud_timestamp')
+        if not timestamp:
+            return
+        metadata = record.get('metadata') or {}
+        location = metadata.get('location') or {}
+        self._timestamps.append(timestamp)
+        self._accounts.append(record.get('cloud_account_id'))
+        self._models.append(record.get('model'))
+        self._latitudes.append(location.get('latitude'))
+        self._longitudes.append(location.get('longitude'))
+        self._indoor.append(bool(metadata.get('is_indoor')))
+        self._public.append(bool(metadata.get('is_public')))
+
+        values = self._values
+        slots = _MEASUREMENT_SLOT
+        base = len(values)
+        values.extend(self._fill_row)
+        serial = ''
+        for sensor in record.get('sensors') or ():
+            sensor_serial = sensor.get('serial')
+            if sensor_serial:
+                serial = sensor_serial
+            for measurement in sensor.get('measurements') or ():
+                slot = slots.get(measurement.get('name'))
+                data = measurement.get('data')
+                if slot is None or not data:
+                    continue
+                value = data.get('value')
+                if value is not None:
+                    try:
+                        values[base + slot] = value
+                    except TypeError:  # numeric strings such as "12.5"
+                        values[base + slot] = float(value)
+        self._serials.append(serial)
+        self.rows += 1
+
+    def frame(self) -> Optional[pd.DataFrame]:
+        """The buffered rows as a typed wide DataFrame, or None when no record carried a timestamp."""
+        row = self.rows
+        if row == 0:
+            return None
+        matrix = np.frombuffer(self._values, dtype=np.float64).reshape(row, len(MEASUREMENT_FIELDS))
+        columns: Dict[str, Any] = {
+            'timestamp': pd.to_datetime(self._timestamps, format='ISO8601', utc=True),
+            'cloud_account_id': np.asarray(self._accounts, dtype=object),
+            'device_id': np.full(row, self.device_id, dtype=object),
+            'model': np.asarray(self._models, dtype=object),
+            'serial': np.asarray(self._serials, dtype=object),
+            'latitude': np.asarray(self._latitudes, dtype=np.float64),
+            'longitude': np.asarray(self._longitudes, dtype=np.float64),
+            'is_indoor': np.asarray(self._indoor, dtype=bool),
+            'is_public': np.asarray(self._public, dtype=bool),
+        }
+        for slot, name in enumerate(MEASUREMENT_FIELDS):
+            columns[name] = matrix[:, slot].copy()
+        return pd.DataFrame(columns, columns=list(COLUMN_ORDER))
+
+    def record_batch(self) -> Optional[pa.RecordBatch]:
+        """The buffered rows as a RecordBatch with ``TSI_RAW_SCHEMA``, or None when no record carried a timestamp.
+
+        Measurement columns are views of one transposed copy of the value buffer, with NaN
+        (missing) values as nulls. Unparseable timestamps become nulls.
+        """
+        row = self.rows
+        if row == 0:
+            return None
+        by_column = np.frombuffer(self._values, dtype=np.float64).reshape(row, len(MEASUREMENT_FIELDS)).T.copy()
+        arrays = [
+            timestamp_array(self._timestamps)[0],
+            string_array(self._accounts),
+            pa.repeat(pa.scalar(self.device_id, type=pa.string()), row),
+            string_array(self._models),
+            string_array(self._serials),
+            number_array(self._latitudes)[0],
+            number_array(self._longitudes)[0],
+            pa.array(self._indoor, type=pa.bool_()),
+            pa.array(self._public, type=pa.bool_()),
+        ]
+        arrays.extend(pa.array(by_column[slot], from_pandas=True) for slot in range(len(MEASUREMENT_FIELDS)))
+        return pa.RecordBatch.from_arrays(arrays, schema=TSI_RAW_SCHEMA)
+
+    def result(self) -> Any:
+        return self.record_batch() if self.arrow else self.frame()
+
+
+def parse_telemetry(records: Sequence[Dict[str, Any]], device_id: str, fill_value: float = math.nan) -> Optional[pd.DataFrame]:
+    """Parse nested telemetry records for ``device_id`` into a typed wide DataFrame.
+
+    Records without ``cloud_timestamp`` are skipped. Measurements absent from a record keep
+    ``fill_value`` (NaN by default). Returns None when no record carries a timestamp.
+    """
+    columns = TelemetryColumns(device_id, fill_value)
+    for record in records:
+        columns.add(record)
+    return columns.frame()
+
+
+def parse_telemetry_batch(records: Sequence[Dict[str, Any]], device_id: str, fill_value: float = math.nan) -> Optional[pa.RecordBatch]:
+    """Arrow counterpart of ``parse_telemetry``: a RecordBatch with ``TSI_RAW_SCHEMA``."""
+    columns = TelemetryColumns(device_id, fill_value, arrow=True)
+    for record in records:
+        columns.add(record)
+    return columns.record_batch()
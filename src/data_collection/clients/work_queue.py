@@ -0,0 +1,139 @@
+"""Bounded producer/consumer scheduling for large request grids.
+
+A fixed pool of worker tasks pulls work items from a bounded priority queue, so a
+multi-month backfill over hundreds of devices keeps only ``workers`` coroutines alive
+instead of one per (device, date) pair. Producers block when the queue is full and
+workers block when results are not being consumed, which carries backpressure all the
+way from the sink to the request fan-out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from datetime import date
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_ITEM, _STOP = 0, 1
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def recent_first(date_str: str) -> int:
+    """Priority key that schedules more recent YYYY-MM-DD dates first."""
+    return -date.fromisoformat(date_str[:10]).toordinal()
+
+
+class WorkQueue(Generic[T, R]):
+    """Run ``handler`` over work items with ``workers`` concurrent consumers.
+
+    ``run`` is an async generator yielding handler results in completion order (None results
+    are skipped). Items with a lower ``priority`` key are started first. ``depth``/``snapshot``
+    expose queue depth and progress for monitoring. A handler exception stops the run and is
+    re-raised to the consumer; closing the generator early cancels all outstanding work.
+    """
+
+    def __init__(self, handler: Callable[[T], Awaitable[Optional[R]]], workers: int,
+                 maxsize: Optional[int] = None, name: str = "work"):
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.maxsize = maxsize if maxsize is not None else self.workers * 2
+        self.name = name
+        self.total = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.in_progress = 0
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        """Items waiting in the queue (not yet picked up by a worker)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queue": self.name,
+            "workers": self.workers,
+            "total": self.total,
+            "queued": self.depth,
+            "in_progress": self.in_progress,
+            "completed": self.completed,
+            "pending": max(self.total - self.completed, 0),
+        }
+
+    async def _produce(self, items: Iterable[T], priority: Optional[Callable[[T], Any]]) -> None:
+        assert self._queue is not None
+        for item in items:
+            key = priority(item) if priority is not None else 0
+            await self._queue.put((_ITEM, key, next(self._seq), item))
+            self.enqueued += 1
+        for _ in range(self.workers):
+            await self._queue.put((_STOP, 0, next(self._seq), None))
+
+    async def _work(self, results: asyncio.Queue, credits: asyncio.Semaphore) -> None:
+        assert self._queue is not None
+        try:
+            while True:
+                kind, _, _, item = await self._queue.get()
+                if kind == _STOP:
+                    return
+                self.in_progress += 1
+                try:
+                    result = await self.handler(item)
+                except Exception as e:
+                    results.put_nowait(_Failure(e))
+                    return
+                finally:
+                    self.in_progress -= 1
+                    self.completed += 1
+                if result is not None:
+                    # At most ``workers`` unconsumed results: a slow consumer stalls the workers.
+                    await credits.acquire()
+                    results.put_nowait(result)
+        finally:
+            results.put_nowait(_DONE)
+
+    async def run(self, items: Iterable[T], priority: Optional[Callable[[T], Any]] = None,
+                  total: Optional[int] = None) -> AsyncIterator[R]:
+        """Schedule ``items`` (sorted by ``priority`` when given) and yield results as they complete."""
+        if priority is not None:
+            items = sorted(items, key=priority)
+        if total is None and hasattr(items, "__len__"):
+            total = len(items)  # type: ignore[arg-type]
+        self.total = total or 0
+        self._queue = asyncio.PriorityQueue(maxsize=self.maxsize)
+        results: asyncio.Queue = asyncio.Queue()
+        credits = asyncio.Semaphore(self.workers)
+        producer = asyncio.ensure_future(self._produce(items, priority))
+        workers = [asyncio.ensure_future(self._work(results, credits)) for _ in range(self.workers)]
+        running = len(workers)
+        try:
+            while running:
+                result = await results.get()
+                if result is _DONE:
+                    running -= 1
+                elif isinstance(result, _Failure):
+                    raise result.error
+                else:
+                    credits.release()
+                    yield result
+        finally:
+            for task in (producer, *workers):
+                task.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+            log.debug(f"[{self.name}] work queue finished: {self.snapshot()}")
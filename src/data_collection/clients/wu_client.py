@@ -1,16 +1,22 @@
 
 
-import asyncio
+import os
+import httpx
 import pandas as pd
+import pyarrow as pa
 import logging
-from tqdm import tqdm
-from typing import Optional
+from functools import partial
+from typing import AsyncIterator, Optional, Union
 import pydantic
 from enum import Enum
 
 from .base_client import BaseClient
+from .http_pool import HTTPPoolConfig
+from .work_queue import recent_first
 from src.utils.config_loader import get_wu_stations
-from src.data_collection.models import WUResponse
+from src.data_collection.aggregation import aggregate_source
+from src.data_collection.arrow_batches import filter_time_window
+from src.data_collection.clients.wu_parser import WUDecodeError, decode_observations, decode_observations_batch, decode_observations_strict
 
 class EndpointStrategy(Enum):
     ALL = "all"
@@ -56,32 +62,51 @@ class WUClient(BaseClient):
                     requests.append((station_id, date_str, None))
         return requests
 
-    async def _execute_fetches(self, requests: list) -> list:
+    async def _fetch_request(self, req: tuple, arrow: bool = False) -> Optional[Union[pd.DataFrame, pa.RecordBatch]]:
         """
-        Executes async fetches for the given requests and collects results.
+        Fetches one request built by _build_requests.
         - For ALL: calls _fetch_one(station_id, start_date, end_date)
         - For HOURLY/MULTIDAY: calls _fetch_one(station_id, date_str)
+        Stations with a watermark skip days that end before it and drop older rows.
+        With ``arrow`` the result is a RecordBatch (wu_parser.WU_RAW_SCHEMA).
         """
-        all_results = []
-        tasks = []
-        for req in requests:
-            if self.endpoint_strategy == EndpointStrategy.ALL:
-                # /observations/all endpoint
-                station_id, start_date, end_date = req
-                tasks.append(self._fetch_one(station_id, start_date, end_date))
-            else:
-                # /history/hourly or /observations/all/1day endpoint
-                station_id, date_str, _ = req
-                tasks.append(self._fetch_one(station_id, date_str))
-        for future in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Fetching WU Data"):
-            result = await future
-            if result is not None and not result.empty:
-                all_results.append(result)
-        return all_results
+        station_id, first_day = req[0], req[1]
+        last_day = req[2] if self.endpoint_strategy == EndpointStrategy.ALL else first_day
+        since = self._since(station_id)
+        if since is not None:
+            if pd.Timestamp(last_day, tz='UTC') + pd.Timedelta(days=1) <= since:
+                self.watermark_skips += 1
+                return None
+            first_day = max(first_day, since.strftime("%Y-%m-%d"))
+        if self.endpoint_strategy == EndpointStrategy.ALL:
+            # /observations/all endpoint
+            df = await self._fetch_one(station_id, first_day, last_day, arrow=arrow)
+        else:
+            # /history/hourly or /observations/all/1day endpoint
+            df = await self._fetch_one(station_id, first_day, arrow=arrow)
+        if arrow:
+            if since is not None and df is not None:
+                df = filter_time_window(df, 'obsTimeUtc', since)
+            return df if df is not None and len(df) else None
+        if since is not None and df is not None and 'obsTimeUtc' in df.columns:
+            df = df[pd.to_datetime(df['obsTimeUtc'], utc=True) >= since]
+            return df if not df.empty else None
+        return df
+
+    def _iter_requests(self, requests: list, arrow: bool = False) -> AsyncIterator[pd.DataFrame]:
+        """Runs requests on the bounded work queue, most recent dates first."""
+        return self._iter_work(requests, partial(self._fetch_request, arrow=arrow), desc="Fetching WU Data",
+                               priority=lambda req: recent_first(req[1]))
+
+    async def _execute_fetches(self, requests: list) -> list:
+        """Executes async fetches for the given requests and collects the non-empty results."""
+        return [df async for df in self._iter_requests(requests)]
     """Client for fetching data from the Weather Underground API."""
 
     # FEAT: Replace boolean parameters with an enum-based endpoint strategy
-    def __init__(self, api_key: str, base_url: str = "https://api.weather.com/v2/pws", endpoint_strategy: EndpointStrategy = EndpointStrategy.HOURLY):
+    def __init__(self, api_key: str, base_url: str = "https://api.weather.com/v2/pws", endpoint_strategy: EndpointStrategy = EndpointStrategy.HOURLY,
+                 http_client: Optional[httpx.AsyncClient] = None, pool_config: Optional[HTTPPoolConfig] = None,
+                 strict_validation: Optional[bool] = None):
         """
         endpoint_strategy: Specifies the endpoint strategy to use. Options are:
             - EndpointStrategy.ALL: Use 'observations/all' (multi-day, no date param).
@@ -91,17 +116,26 @@ class WUClient(BaseClient):
         NOTE: EndpointStrategy.HOURLY is REQUIRED for historical data with complete field coverage.
         The rapid history endpoints (MULTIDAY, ALL) only return 4-6 fields (humidity, solar, wind direction, UV).
         Historical API returns ALL fields: temperature, wind speed/gust, precipitation, pressure, dew point, comfort indices.
+
+        http_client / pool_config: see BaseClient; pass a shared pooled client to reuse sockets across a run.
+        strict_validation: Validate every observation through the Pydantic models (debug mode) instead of the
+            columnar fast path. Defaults to the WU_STRICT_VALIDATION=1 environment switch.
         """
-        super().__init__(base_url, api_key)
+        super().__init__(base_url, api_key, http_client=http_client, pool_config=pool_config)
         self.stations = get_wu_stations()
         self.endpoint_strategy = endpoint_strategy
+        if strict_validation is None:
+            strict_validation = os.getenv('WU_STRICT_VALIDATION') == '1'
+        self.strict_validation = strict_validation
 
-    async def _fetch_one(self, station_id: str, start_date: str, end_date: str = "") -> Optional[pd.DataFrame]:
+    async def _fetch_one(self, station_id: str, start_date: str, end_date: str = "",
+                         arrow: bool = False) -> Optional[Union[pd.DataFrame, pa.RecordBatch]]:
         """
         Fetches all rapid observations for a single station and date range, returns as DataFrame.
         If using /all endpoint, fetches all data for the range in one call; else, expects start_date == end_date and fetches for that day.
         If using /history/hourly endpoint, fetches hourly summary for a single day and station.
-        Uses Pydantic WUResponse for validation.
+        Decoded with the columnar fast path (wu_parser.decode_observations) unless strict_validation is set;
+        with ``arrow`` it is decoded into a RecordBatch (wu_parser.decode_observations_batch) instead.
         """
         data = None
         filter_end_date_for_helper = "" # Initialize for clarity
@@ -118,7 +152,7 @@ class WUClient(BaseClient):
                 "units": "e",  # Use English units (imperial) to match expected response format
                 "numericPrecision": "decimal"
             }
-            data = await self._request("GET", endpoint, params=params)
+            data = await self._request("GET", endpoint, params=params, breaker_key=station_id)
             filter_end_date_for_helper = start_date # For history/hourly, filter for just the start_date
         elif self.endpoint_strategy == EndpointStrategy.ALL:
             endpoint = "observations/all"
@@ -131,7 +165,7 @@ class WUClient(BaseClient):
                 "startDate": start_date,  # YYYY-MM-DD
                 "endDate": filter_end_date_for_helper  # YYYY-MM-DD
             }
-            data = await self._request("GET", endpoint, params=params)
+            data = await self._request("GET", endpoint, params=params, breaker_key=station_id)
         else:
             endpoint = "observations/all/1day"
             filter_end_date_for_helper = start_date # For 1day endpoint, filter for just the start_date
@@ -141,41 +175,24 @@ class WUClient(BaseClient):
                 "apiKey": self.api_key,
                 "units": "m"
             }
-            data = await self._request("GET", endpoint, params=params)
+            data = await self._request("GET", endpoint, params=params, breaker_key=station_id)
+
+        if arrow:
+            return self._record_batch(data, station_id, start_date, filter_end_date_for_helper)
 
-        # Validate and parse using Pydantic WUResponse
+        # Decode into a DataFrame. The fast path flattens the 'imperial'/'metric' unit blocks
+        # (WU returns temp/wind/precip inside them) and validates whole columns at once; the
+        # strict path runs full Pydantic validation per observation (WU_STRICT_VALIDATION=1).
         try:
-            validated = WUResponse.model_validate(data)
-        except pydantic.ValidationError as e:
+            if self.strict_validation:
+                df = decode_observations_strict(data)
+            else:
+                df = decode_observations(data)
+        except (pydantic.ValidationError, WUDecodeError) as e:
             log.error(f"WU API response validation failed for station {station_id}: {e}")
             return None
 
-        # Convert validated observations to dicts for DataFrame
-        obs_dicts = [obs.model_dump() for obs in validated.observations]
-        
-        # Flatten the 'metric' and 'imperial' nested objects into top-level fields
-        # WU API returns temp/wind/precip data inside these nested objects
-        # Historical API (history/hourly) returns data in 'imperial' or 'metric' object based on units parameter
-        for o in obs_dicts:
-            # Flatten 'imperial' object (contains temperature, wind speed, precipitation in imperial units)
-            if 'imperial' in o and isinstance(o['imperial'], dict):
-                for key, value in o['imperial'].items():
-                    # Overwrite top-level field with imperial value
-                    # This handles case where Pydantic sets top-level fields to None but imperial has actual values
-                    o[key] = value
-                o.pop('imperial', None)  # Remove the nested object after flattening
-            
-            # Flatten 'metric' object (contains temperature, wind speed, precipitation in metric units)
-            # Only used if units=m was specified in request
-            if 'metric' in o and isinstance(o['metric'], dict):
-                for key, value in o['metric'].items():
-                    # Overwrite top-level field with metric value (metric values take precedence)
-                    # This handles case where Pydantic sets top-level fields to None but metric has actual values
-                    o[key] = value
-                o.pop('metric', None)  # Remove the nested object after flattening
-
-        if obs_dicts:
-            df = pd.DataFrame(obs_dicts)
+        if df is not None and not df.empty:
             log.debug(f"Raw DataFrame shape for station {station_id}: {df.shape}")
             df['stationID'] = station_id
             # Filter to just the requested date range
@@ -190,21 +207,46 @@ class WUClient(BaseClient):
             return df
         return None
 
+    def _record_batch(self, data, station_id: str, start_date: str, end_date: str) -> Optional[pa.RecordBatch]:
+        """Arrow-mode decode of one response, filtered to the inclusive [start_date, end_date] day range."""
+        try:
+            batch = decode_observations_batch(data, station_id)
+        except WUDecodeError as e:
+            log.error(f"WU API response validation failed for station {station_id}: {e}")
+            return None
+        date_start_utc = pd.Timestamp(start_date, tz='UTC')
+        date_end_utc = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)
+        batch = filter_time_window(batch, 'obsTimeUtc', date_start_utc, date_end_utc)
+        return batch if batch.num_rows else None
+
     # _process_and_filter_observations is no longer needed; validation and flattening are handled in _fetch_one
 
-    async def fetch_data(self, start_date: str, end_date: str, aggregate: bool = False, agg_interval: str = 'h') -> pd.DataFrame:
+    async def iter_batches(self, start_date: str, end_date: str, arrow: bool = False) -> AsyncIterator[pd.DataFrame]:
         """
-        Fetches WU observations for a date range. When aggregate is False, returns raw observations
-        with an 'obsTimeUtc' column. When True, returns resampled summaries per stationID.
+        Yields raw observation frames as requests complete: one per station-day (HOURLY/MULTIDAY)
+        or one per station for the whole range (ALL). Nothing is concatenated, so callers that
+        clean and write each batch hold only a few batches in memory regardless of range length.
+        With ``arrow`` the batches are pyarrow RecordBatches built without pandas.
         """
         if not self.api_key or not self.stations:
             log.error("Weather Underground API key or station list is not configured properly.")
-            return pd.DataFrame()
+            return
 
         log.info(f"Building list of requests for endpoint strategy: {self.endpoint_strategy.name}")
         requests = self._build_requests(start_date, end_date)
-        all_results = await self._execute_fetches(requests)
-        log.info(f"Fetched data for {len(all_results)} requests.")
+        batches = 0
+        async for df in self._iter_requests(requests, arrow):
+            batches += 1
+            yield df
+        log.info(f"Fetched data for {batches} of {len(requests)} requests.")
+        log.info(f"WU request metrics: {self.metrics_snapshot()}")
+
+    async def fetch_data(self, start_date: str, end_date: str, aggregate: bool = False, agg_interval: str = 'h') -> pd.DataFrame:
+        """
+        Fetches WU observations for a date range. When aggregate is False, returns raw observations
+        with an 'obsTimeUtc' column. When True, returns resampled summaries per stationID.
+        """
+        all_results = [df async for df in self.iter_batches(start_date, end_date)]
 
         if not all_results:
             log.warning("No data fetched from WU API.")
@@ -223,13 +265,7 @@ class WUClient(BaseClient):
             log.info("Aggregation disabled; returning raw observations DataFrame.")
             return raw_df
 
-        # Aggregation path
-        raw_df = raw_df.set_index('obsTimeUtc')
-        numeric_cols = raw_df.select_dtypes(include='number').columns.tolist()
-        exclude_cols = ['epoch', 'lat', 'lon', 'qcStatus']
-        agg_cols = [col for col in numeric_cols if col not in exclude_cols]
-        agg_dict = {col: 'mean' for col in agg_cols}
-        final_df = raw_df.groupby('stationID').resample(agg_interval).agg(agg_dict)  # type: ignore
-        final_df = final_df.reset_index()
+        # Aggregation path: mean (original column names) plus _min/_max/_count/_last per bucket
+        final_df = aggregate_source(raw_df, 'WU', agg_interval)
         log.info(f"Successfully resampled WU data to {len(final_df)} records at interval '{agg_interval}'.")
         return final_df
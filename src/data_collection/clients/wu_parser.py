@@ -0,0 +1,149 @@
+"""Fast columnar decoding of Weather Underground observation payloads.
+
+The strict path (``WUResponse.model_validate`` + ``model_dump`` per observation) builds two
+Python objects per observation before pandas sees any data. This module flattens the
+``imperial``/``metric`` unit blocks with plain dict merges, builds every column in one
+pass and validates/coerces whole columns at once using the ``WUObservation`` field types.
+``decode_observations_batch`` does the same straight into a ``pyarrow.RecordBatch`` with the
+fixed ``WU_RAW_SCHEMA`` (Arrow mode, see src/data_collection/arrow_batches.py).
+"""
+
+from __future__ import annotations
+
+import logging
+import typing
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from src.data_collection.arrow_batches import TIMESTAMP_TYPE, number_array, string_array, timestamp_array
+from src.data_collection.models import WUObservation
+
+log = logging.getLogger(__name__)
+
+# Unit blocks flattened into top-level fields; later blocks win (metric overrides imperial).
+NESTED_UNIT_BLOCKS = ('imperial', 'metric')
+REQUIRED_FIELDS = tuple(name for name, field in WUObservation.model_fields.items() if field.is_required())
+
+
+def _field_kinds() -> Dict[str, type]:
+    kinds: Dict[str, type] = {}
+    for name, field in WUObservation.model_fields.items():
+        args = typing.get_args(field.annotation) or (field.annotation,)
+        for kind in (datetime, float, int, str):
+            if kind in args:
+                kinds[name] = kind
+                break
+    return kinds
+
+
+FIELD_KINDS = _field_kinds()
+MODEL_FIELDS = tuple(WUObservation.model_fields)
+_ARROW_TYPES = {datetime: TIMESTAMP_TYPE, float: pa.float64(), int: pa.int64(), str: pa.string()}
+WU_RAW_SCHEMA = pa.schema([(name, _ARROW_TYPES[FIELD_KINDS.get(name, str)]) for name in MODEL_FIELDS])
+
+
+class WUDecodeError(ValueError):
+    """Raised when a payload fails the vectorised validation of required fields."""
+
+
+def _flatten(observation: Dict[str, Any]) -> Dict[str, Any]:
+    row = observation
+    for block in NESTED_UNIT_BLOCKS:
+        nested = row.get(block)
+        if isinstance(nested, dict):
+            if row is observation:
+                row = dict(observation)
+            del row[block]
+            row.update(nested)
+    return row
+
+
+def _observation_rows(payload: Any) -> List[Dict[str, Any]]:
+    if not isinstance(payload, dict) or not isinstance(payload.get('observations'), list):
+        raise WUDecodeError("payload has no 'observations' list")
+    rows: List[Dict[str, Any]] = [_flatten(o) for o in payload['observations'] if isinstance(o, dict)]
+    if len(rows) != len(payload['observations']):
+        raise WUDecodeError("observations must be JSON objects")
+    return rows
+
+
+def decode_observations(payload: Any) -> pd.DataFrame:
+    """Decode a WU ``{"observations": [...]}`` payload into a typed wide DataFrame.
+
+    Columns follow ``WUObservation`` field order, then any extra keys in first-seen order.
+    Required fields must be present and parseable in every row (otherwise ``WUDecodeError``,
+    mirroring the strict path rejecting the response); optional numeric fields are coerced
+    and unparseable values become NaN.
+    """
+    rows = _observation_rows(payload)
+    if not rows:
+        return pd.DataFrame(columns=list(MODEL_FIELDS))
+
+    extra: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            if key not in FIELD_KINDS:
+                extra.setdefault(key)
+    columns = list(MODEL_FIELDS) + list(extra)
+    df = pd.DataFrame({key: [row.get(key) for row in rows] for key in columns}, columns=columns)
+
+    for name in REQUIRED_FIELDS:
+        if df[name].isna().any():
+            raise WUDecodeError(f"{int(df[name].isna().sum())} observations missing required field '{name}'")
+    for name, kind in FIELD_KINDS.items():
+        column = df[name]
+        if kind is datetime:
+            converted = pd.to_datetime(column, format='ISO8601', utc=True, errors='coerce')
+        elif kind in (float, int):
+            converted = pd.to_numeric(column, errors='coerce')
+        else:
+            continue
+        bad = converted.isna() & column.notna()
+        if bad.any():
+            if name in REQUIRED_FIELDS:
+                raise WUDecodeError(f"{int(bad.sum())} observations have unparseable '{name}'")
+            log.warning(f"Coerced {int(bad.sum())} unparseable '{name}' values to NaN")
+        df[name] = converted
+    return df
+
+
+def decode_observations_batch(payload: Any, station_id: Optional[str] = None) -> pa.RecordBatch:
+    """Decode a WU payload into a RecordBatch with ``WU_RAW_SCHEMA``, without pandas.
+
+    Validation matches ``decode_observations``; unparseable optional values become nulls. Keys
+    outside ``WUObservation`` are dropped since the schema is fixed. ``station_id`` (when given)
+    replaces the payload's stationID column.
+    """
+    rows = _observation_rows(payload)
+    arrays = []
+    for field in WU_RAW_SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.type == TIMESTAMP_TYPE:
+            array, bad = timestamp_array(values)
+        elif pa.types.is_string(field.type):
+            array, bad = string_array(values), 0
+        else:
+            array, bad = number_array(values, field.type)
+        if field.name in REQUIRED_FIELDS and array.null_count:
+            missing = sum(value is None for value in values)
+            if missing:
+                raise WUDecodeError(f"{missing} observations missing required field '{field.name}'")
+            raise WUDecodeError(f"{bad} observations have unparseable '{field.name}'")
+        if bad:
+            log.warning(f"Coerced {bad} unparseable '{field.name}' values to null")
+        if field.name == 'stationID' and station_id is not None:
+            array = pa.repeat(pa.scalar(station_id, type=pa.string()), len(rows))
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=WU_RAW_SCHEMA)
+
+
+def decode_observations_strict(payload: Any) -> Optional[pd.DataFrame]:
+    """Reference path: full pydantic validation per observation (slower; useful for debugging)."""
+    from src.data_collection.models import WUResponse
+
+    validated = WUResponse.model_validate(payload)
+    obs_dicts = [_flatten(obs.model_dump()) for obs in validated.observations]
+    return pd.DataFrame(obs_dicts) if obs_dicts else None
@@ -7,30 +7,46 @@ Features:
  - Optional legacy DB insertion (wide->long melt)
  - Resilient upload: skip dataframes missing timestamp, tolerate validation issues
  - Local dev mode: set GCS_FAKE_UPLOAD=1 to bypass real network writes (logs intended paths)
+ - Bounded-parallel multi-day runs (--max-concurrent-days) sharing one client session per source
+ - Streaming mode (--stream): per-device batches are cleaned and appended to the day's parquet as they arrive
+ - Multi-resolution output (--resolutions raw,15min,h,D): one raw fetch, every rollup uploaded to its agg= partition
+ - Incremental mode (--incremental): per-sensor watermarks limit requests to data newer than the last persisted point
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
+import io
 import logging
 import os
 import uuid
 import sys
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
 from datetime import datetime, timedelta, date as date_cls
-from typing import Any, Tuple, Optional, List
+from typing import Any, AsyncIterator, Iterator, Tuple, Optional, List
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from sqlalchemy import text
 
 from src.config.app_config import app_config
+from src.data_collection.aggregation import aggregate_source
+from src.data_collection.arrow_batches import COORDINATE_PAIRS, clean_record_batch, cleaned_name
+from src.data_collection.deployments import Deployment, DeploymentMapUnavailable, DeploymentRegistry
+from src.data_collection.long_format import LongReadings
 from src.database.db_manager import HotDurhamDB
-from src.storage.gcs_uploader import GCSUploader
+from src.storage.gcs_uploader import GCSUploader, UploadSpec
+from src.storage.parquet_stream import IncrementalParquetWriter
 from src.data_collection.clients.wu_client import WUClient
-from src.data_collection.clients.tsi_client import TSIClient
+from src.data_collection.clients.tsi_client import TSIClient, split_by_day
+from src.data_collection.clients.http_pool import HTTPPoolConfig, build_async_client
+from src.data_collection.clients.replay import transport_from_env
+from src.data_collection.watermarks import DEFAULT_LOOKBACK, Watermarks, build_watermark_store, compute_watermarks, merge_watermarks
 from src.utils.config_loader import get_wu_stations, get_tsi_devices
+from src.utils.timestamps import normalize_timestamps
 from src.utils.schema_validation import (
     validate_tsi_schema,
     validate_wu_schema,
@@ -42,6 +58,8 @@ from src.utils.schema_validation import (
 
 log = logging.getLogger(__name__)
 
+RAW_RESOLUTION = 'raw'
+
 # Allow runtime override of log level via LOG_LEVEL env var (DEBUG, INFO, WARNING, ERROR, CRITICAL)
 _lvl = os.getenv('LOG_LEVEL')
 if _lvl:
@@ -67,48 +85,13 @@ for k in critical_env:
 def clean_and_transform_data(df: pd.DataFrame, source: str) -> pd.DataFrame:
     if df.empty:
         return df
-    if source == "WU":
-        rename_map = {
-            'stationID': 'native_sensor_id', 'obsTimeUtc': 'timestamp',
-            'tempAvg': 'temperature', 'tempHigh': 'temperature_high', 'tempLow': 'temperature_low',
-            'humidityAvg': 'humidity', 'humidityHigh': 'humidity_high', 'humidityLow': 'humidity_low',
-            'precipRate': 'precip_rate', 'precipTotal': 'precip_total',
-            'windspeedAvg': 'wind_speed_avg', 'windspeedHigh': 'wind_speed_high', 'windspeedLow': 'wind_speed_low',
-            'windgustAvg': 'wind_gust_avg', 'windgustHigh': 'wind_gust_high', 'windgustLow': 'wind_gust_low',
-            'winddirAvg': 'wind_direction_avg',
-            'pressureMax': 'pressure_max', 'pressureMin': 'pressure_min', 'pressureTrend': 'pressure_trend',
-            'solarRadiationHigh': 'solar_radiation', 'uvHigh': 'uv_high',
-            'windchillAvg': 'wind_chill_avg', 'windchillHigh': 'wind_chill_high', 'windchillLow': 'wind_chill_low',
-            'heatindexAvg': 'heat_index_avg', 'heatindexHigh': 'heat_index_high', 'heatindexLow': 'heat_index_low',
-            'dewptAvg': 'dew_point_avg', 'dewptHigh': 'dew_point_high', 'dewptLow': 'dew_point_low',
-            'qcStatus': 'qc_status', 'obsTimeLocal': 'obsTimeLocal'
-        }
-    else:  # TSI
-        rename_map = {
-            'cloud_device_id': 'native_sensor_id', 'device_id': 'native_sensor_id',
-            'cloud_timestamp': 'timestamp', 'cloud_account_id': 'cloud_account_id',
-            # PM measurements
-            'pm1_0': 'pm1_0', 'pm2_5': 'pm2_5', 'pm4_0': 'pm4_0', 'pm10': 'pm10',
-            'pm2_5_aqi': 'pm2_5_aqi', 'pm10_aqi': 'pm10_aqi',
-            # Number concentration measurements
-            'ncpm0_5': 'ncpm0_5', 'ncpm1_0': 'ncpm1_0', 'ncpm2_5': 'ncpm2_5',
-            'ncpm4_0': 'ncpm4_0', 'ncpm10': 'ncpm10',
-            # Environmental measurements
-            'rh': 'humidity', 'temperature': 'temperature', 'tpsize': 'tpsize',
-            # Gas measurements
-            'co2_ppm': 'co2_ppm', 'co_ppm': 'co_ppm', 'o3_ppb': 'o3_ppb',
-            'no2_ppb': 'no2_ppb', 'so2_ppb': 'so2_ppb', 'ch2o_ppb': 'ch2o_ppb',
-            'voc_mgm3': 'voc_mgm3', 'baro_inhg': 'baro_inhg',
-            # Metadata
-            'model': 'model', 'serial': 'serial', 'is_indoor': 'is_indoor',
-            'is_public': 'is_public', 'latitude': 'latitude', 'longitude': 'longitude'
-        }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
+    renames = {col: cleaned_name(col, source) for col in df.columns if isinstance(col, str)}
+    df = df.rename(columns=renames)
     if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        df['timestamp'] = normalize_timestamps(df['timestamp'])
         df['ts'] = df['timestamp']
     # lat/lon float copies
-    for pair in [('latitude', 'longitude'), ('lat', 'lon')]:
+    for pair in COORDINATE_PAIRS:
         lat_col, lon_col = pair
         if lat_col in df.columns and lon_col in df.columns:
             for c in pair:
@@ -230,10 +213,30 @@ def _augment_catalog_with_data(catalog: dict[tuple[str, str], dict[str, Any]], d
             record['start_date'] = start_date
 
 
-def _ensure_deployment_metadata(db: HotDurhamDB, wu_df: pd.DataFrame, tsi_df: pd.DataFrame):
+def _metadata_is_current(record: dict[str, Any], current: Optional[Deployment]) -> bool:
+    """True when the registry already holds this catalog record's sensor, name, location and start date."""
+    if current is None:
+        return False
+    if record['friendly_name'] and current.friendly_name != record['friendly_name']:
+        return False
+    if (record.get('location') or record['native_sensor_id']) != current.location:
+        return False
+    start_date = record.get('start_date')
+    return not (start_date and (current.start_date is None or start_date < current.start_date))
+
+
+def _ensure_deployment_metadata(db: HotDurhamDB, wu_df: pd.DataFrame, tsi_df: pd.DataFrame,
+                                registry: Optional[DeploymentRegistry] = None):
     catalog = _build_sensor_catalog()
     _augment_catalog_with_data(catalog, wu_df, 'WU')
     _augment_catalog_with_data(catalog, tsi_df, 'TSI')
+    if registry is not None:
+        # Only sensors the registry does not already show up to date need a round trip per record
+        try:
+            known = registry.index(db)
+        except DeploymentMapUnavailable:
+            known = {}
+        catalog = {key: record for key, record in catalog.items() if not _metadata_is_current(record, known.get(key))}
     if not catalog:
         return
 
@@ -305,61 +308,39 @@ def _ensure_deployment_metadata(db: HotDurhamDB, wu_df: pd.DataFrame, tsi_df: pd
                     'start_date': start_date or datetime.utcnow().date(),
                 })
                 log.info("Created deployment for %s sensor %s", record['sensor_type'], record['native_sensor_id'])
+    if registry is not None:
+        registry.invalidate()
+
 
+def insert_data_to_db(db: HotDurhamDB, wu_df: pd.DataFrame, tsi_df: pd.DataFrame, long: Optional[LongReadings] = None,
+                      registry: Optional[DeploymentRegistry] = None):
+    """Upsert a day's readings into sensor_readings.
 
-def insert_data_to_db(db: HotDurhamDB, wu_df: pd.DataFrame, tsi_df: pd.DataFrame):
+    ``long`` shares the long-format build with the other sinks and ``registry`` the deployment
+    map across days; both are created for this call when omitted.
+    """
     if wu_df.empty and tsi_df.empty:
         log.info("No data to insert.")
         return
+    if registry is None:
+        registry = DeploymentRegistry.from_env()
     try:
-        _ensure_deployment_metadata(db, wu_df, tsi_df)
+        _ensure_deployment_metadata(db, wu_df, tsi_df, registry)
     except Exception as e:
         log.error(f"Unable to ensure deployment metadata prior to insert: {e}")
-    try:
-        with db.engine.connect() as conn:
-            sql = text("""
-                SELECT d.deployment_pk, sm.native_sensor_id, sm.sensor_type
-                FROM deployments d
-                JOIN sensors_master sm ON d.sensor_fk = sm.sensor_pk
-                WHERE d.end_date IS NULL;""")
-            deployment_map_df = pd.read_sql(sql, conn)
-    except Exception as e:
-        log.error(f"Failed to fetch deployment map: {e}")
-        return
-    if deployment_map_df.empty:
-        log.error("No active deployments found.")
-        return
-    all_long = []
-    for df, typ in [(wu_df, 'WU'), (tsi_df, 'TSI')]:
-        if df.empty:
-            continue
-        if df.columns.duplicated().any():
-            df = df.loc[:, ~df.columns.duplicated()].copy()
-        type_map = deployment_map_df[deployment_map_df.sensor_type == typ]
-        merged = df.merge(type_map, on='native_sensor_id', how='inner')
-        if merged.empty:
-            log.warning(f"No {typ} rows matched deployments.")
-            continue
-        merged = merged.rename(columns={'deployment_pk': 'deployment_fk'})
-        id_vars = ['timestamp', 'deployment_fk']
-        candidate_vars = [c for c in merged.columns if c not in id_vars + ['native_sensor_id', 'sensor_type']]
-        numeric_vars: list[str] = []
-        for col in candidate_vars:
-            coerced = pd.to_numeric(merged[col], errors='coerce')
-            if coerced.notna().any():
-                merged[col] = coerced
-                numeric_vars.append(col)
-        if not numeric_vars:
-            continue
-        long_df = pd.melt(merged, id_vars=id_vars, value_vars=numeric_vars, var_name='metric_name', value_name='value')
-        long_df['value'] = pd.to_numeric(long_df['value'], errors='coerce')
-        all_long.append(long_df)
-    if not all_long:
-        log.warning("Nothing to insert after deployment matching.")
-        return
-    final = pd.concat(all_long, ignore_index=True)
-    final['value'] = pd.to_numeric(final['value'], errors='coerce')
-    final = final.dropna(subset=['value']).drop_duplicates(subset=['timestamp', 'deployment_fk', 'metric_name'], keep='last')
+    if long is None:
+        long = LongReadings(wu_df, tsi_df)
+    if not long.built:
+        try:
+            deployment_map_df = registry.frame(db)
+        except Exception as e:
+            log.error(f"Failed to fetch deployment map: {e}")
+            return
+        if deployment_map_df.empty:
+            log.error("No active deployments found.")
+            return
+        long.build(deployment_map_df)
+    final = long.combined()
     if final.empty:
         log.info("Final DataFrame empty after cleaning.")
         return
@@ -391,23 +372,94 @@ def _normalize_dates(start_date: datetime | str, end_date: datetime | str) -> tu
     return start_str, end_str
 
 
-async def _fetch_raw(start_str: str, end_str: str, source: str, aggregate: bool, agg_interval: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    wu_raw = pd.DataFrame()
-    tsi_raw = pd.DataFrame()
-    if source == 'all':
-        async with WUClient(**app_config.wu_api_config) as wu_client, TSIClient(**app_config.tsi_api_config) as tsi_client:
-            wu_task = wu_client.fetch_data(start_str, end_str, aggregate=aggregate, agg_interval=agg_interval) if (aggregate or agg_interval != 'h') else wu_client.fetch_data(start_str, end_str)
-            tsi_task = tsi_client.fetch_data(start_str, end_str, aggregate=aggregate, agg_interval=agg_interval) if (aggregate or agg_interval != 'h') else tsi_client.fetch_data(start_str, end_str)
-            wu_raw, tsi_raw = await asyncio.gather(wu_task, tsi_task, return_exceptions=False)
-    elif source == 'wu':
-        async with WUClient(**app_config.wu_api_config) as wu_client:
-            wu_raw = await (wu_client.fetch_data(start_str, end_str, aggregate=aggregate, agg_interval=agg_interval) if (aggregate or agg_interval != 'h') else wu_client.fetch_data(start_str, end_str))
-    elif source == 'tsi':
-        async with TSIClient(**app_config.tsi_api_config) as tsi_client:
-            tsi_raw = await (tsi_client.fetch_data(start_str, end_str, aggregate=aggregate, agg_interval=agg_interval) if (aggregate or agg_interval != 'h') else tsi_client.fetch_data(start_str, end_str))
+async def _open_clients(stack: AsyncExitStack, source: str, tsi_window_days: int = 1) -> tuple[Optional[WUClient], Optional[TSIClient]]:
+    """Enter the API clients needed for ``source`` on ``stack`` so one session per source spans a whole run.
+
+    Both clients share a single pooled HTTP transport (keep-alive sockets reused across days and sources).
+    API_RECORD_ARCHIVE / API_REPLAY_ARCHIVE / API_SYNTHETIC=1 swap in a recording, replaying or
+    synthetic transport (see clients.replay) for offline runs.
+    """
+    wu_client: Optional[WUClient] = None
+    tsi_client: Optional[TSIClient] = None
+    pool_config = HTTPPoolConfig.from_env()
+    transport = transport_from_env(pool_config)
+    client_kwargs = {'transport': transport} if transport is not None else {}
+    http_client = await stack.enter_async_context(build_async_client(pool_config, **client_kwargs))
+    if source in ('all', 'wu'):
+        wu_client = await stack.enter_async_context(WUClient(**app_config.wu_api_config, http_client=http_client))
+    if source in ('all', 'tsi'):
+        tsi_kwargs: dict[str, Any] = {'http_client': http_client}
+        if tsi_window_days > 1:
+            tsi_kwargs['max_window_days'] = tsi_window_days
+        tsi_client = await stack.enter_async_context(TSIClient(**app_config.tsi_api_config, **tsi_kwargs))
+    return wu_client, tsi_client
+
+
+class _TSIWindowPrefetch:
+    """Fetch TSI once per multi-day window and hand each day its slice.
+
+    Days are grouped into consecutive windows of ``window_days``; the first day of a window to
+    ask triggers one windowed fetch (one telemetry request per device) and the result is split
+    by UTC day locally. A window's frames are released once every day in it has been served.
+    """
+
+    def __init__(self, client: TSIClient, day_strs: List[str], window_days: int, aggregate: bool, agg_interval: str):
+        self._client = client
+        self._aggregate = aggregate
+        self._agg_interval = agg_interval
+        self._windows: list[list[str]] = [day_strs[i:i + window_days] for i in range(0, len(day_strs), window_days)]
+        self._window_of = {day: idx for idx, days in enumerate(self._windows) for day in days}
+        self._remaining = {idx: len(days) for idx, days in enumerate(self._windows)}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    async def _fetch(self, idx: int) -> dict[str, pd.DataFrame]:
+        days = self._windows[idx]
+        log.info(f"Fetching TSI window {days[0]}..{days[-1]} ({len(days)} days) in one pass")
+        if self._aggregate or self._agg_interval != 'h':
+            df = await self._client.fetch_data(days[0], days[-1], aggregate=self._aggregate, agg_interval=self._agg_interval)
+        else:
+            df = await self._client.fetch_data(days[0], days[-1])
+        return split_by_day(df)
+
+    async def get(self, day_str: str) -> pd.DataFrame:
+        idx = self._window_of[day_str]
+        task = self._tasks.get(idx)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(idx))
+            self._tasks[idx] = task
+        try:
+            by_day = await task
+            return by_day.pop(day_str, pd.DataFrame())
+        finally:
+            self._remaining[idx] -= 1
+            if self._remaining[idx] == 0:
+                self._tasks.pop(idx, None)
+
+
+async def _fetch_with_clients(wu_client: Optional[WUClient], tsi_client: Optional[TSIClient], start_str: str, end_str: str, aggregate: bool, agg_interval: str,
+                              tsi_prefetch: Optional[_TSIWindowPrefetch] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    async def _fetch(client) -> pd.DataFrame:
+        if client is None:
+            return pd.DataFrame()
+        if aggregate or agg_interval != 'h':
+            return await client.fetch_data(start_str, end_str, aggregate=aggregate, agg_interval=agg_interval)
+        return await client.fetch_data(start_str, end_str)
+
+    async def _fetch_tsi() -> pd.DataFrame:
+        if tsi_prefetch is not None and start_str == end_str:
+            return await tsi_prefetch.get(start_str)
+        return await _fetch(tsi_client)
+
+    wu_raw, tsi_raw = await asyncio.gather(_fetch(wu_client), _fetch_tsi(), return_exceptions=False)
     return wu_raw, tsi_raw
 
 
+async def _fetch_raw(start_str: str, end_str: str, source: str, aggregate: bool, agg_interval: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    async with AsyncExitStack() as stack:
+        wu_client, tsi_client = await _open_clients(stack, source)
+        return await _fetch_with_clients(wu_client, tsi_client, start_str, end_str, aggregate, agg_interval)
+
+
 def _clean(wu_raw: pd.DataFrame, tsi_raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     wu_df = clean_and_transform_data(wu_raw, 'WU') if not wu_raw.empty else pd.DataFrame()
     tsi_df = clean_and_transform_data(tsi_raw, 'TSI') if not tsi_raw.empty else pd.DataFrame()
@@ -425,22 +477,48 @@ def _build_uploader(bucket: str, prefix: str):
             def __init__(self, bucket: str, prefix: str):
                 self.bucket_name = bucket
                 self.prefix = prefix
-            def upload_parquet(self, df: pd.DataFrame, source: str, aggregated=False, interval='h', ts_column='timestamp', extra_suffix=None):
+            def upload_parquet(self, df: pd.DataFrame, source: str, aggregated=False, interval='h', ts_column='timestamp', extra_suffix=None, merge=False):
                 if df.empty:
                     log.info(f"[FAKE] skip empty {source}")
                     return ''
                 use_col = ts_column if ts_column in df.columns else 'timestamp'
-                first_ts = pd.to_datetime(df[use_col]).min()
+                first_ts = normalize_timestamps(df[use_col]).min()
                 date_str = first_ts.strftime('%Y-%m-%d') if not pd.isna(first_ts) else 'unknown-date'
                 agg_part = interval if aggregated else 'raw'
-                path = f"{self.prefix}/source={source}/agg={agg_part}/dt={date_str}/{source}-{date_str}.parquet"
-                log.info(f"[FAKE] Would upload {len(df)} rows to gs://{self.bucket_name}/{path}")
+                suffix = f"-{extra_suffix}" if extra_suffix else ''
+                path = f"{self.prefix}/source={source}/agg={agg_part}/dt={date_str}/{source}-{date_str}{suffix}.parquet"
+                log.info(f"[FAKE] Would {'merge' if merge else 'upload'} {len(df)} rows to gs://{self.bucket_name}/{path}")
                 return f"gs://{self.bucket_name}/{path}"
+            def open_parquet_stream(self, spec: UploadSpec, date_str: str, force: bool = False):
+                agg_part = spec.interval if spec.aggregated else 'raw'
+                suffix = f"-{spec.extra_suffix}" if spec.extra_suffix else ''
+                path = f"{self.prefix}/source={spec.source}/agg={agg_part}/dt={date_str}/{spec.source}-{date_str}{suffix}.parquet"
+                return IncrementalParquetWriter(io.BytesIO(), label=f"[FAKE] gs://{self.bucket_name}/{path}")
         return _DummyUploader(bucket, prefix)
     return GCSUploader(bucket=bucket, prefix=prefix)
 
 
-def _safe_upload(uploader: Any, df: pd.DataFrame, src: str, aggregate: bool, agg_interval: str) -> bool:
+def _validate_for_upload(df: pd.DataFrame, src: str) -> None:
+    """Log schema/coverage problems for raw data; uploads proceed regardless."""
+    if src == 'TSI':
+        schema_valid = validate_tsi_schema(df)
+        coverage_valid = check_tsi_coverage(df)
+        if not schema_valid:
+            log.error("TSI schema validation failed - uploading anyway but data quality may be impacted")
+            log.debug(f"TSI schema info: {get_schema_info(df)}")
+        if not coverage_valid:
+            log.warning("TSI coverage check failed - some critical fields have low coverage")
+    elif src == 'WU':
+        schema_valid = validate_wu_schema(df)
+        coverage_valid = check_wu_coverage(df)
+        if not schema_valid:
+            log.error("WU schema validation failed - uploading anyway but data quality may be impacted")
+            log.debug(f"WU schema info: {get_schema_info(df)}")
+        if not coverage_valid:
+            log.warning("WU coverage check failed - some critical fields have low coverage")
+
+
+def _safe_upload(uploader: Any, df: pd.DataFrame, src: str, aggregate: bool, agg_interval: str, merge: bool = False) -> bool:
     """
     Upload DataFrame to GCS with schema validation and error handling.
     
@@ -457,25 +535,10 @@ def _safe_upload(uploader: Any, df: pd.DataFrame, src: str, aggregate: bool, agg
     
     # Validate schema before upload (non-aggregated data only)
     if not aggregate:
-        if src == 'TSI':
-            schema_valid = validate_tsi_schema(df)
-            coverage_valid = check_tsi_coverage(df)
-            if not schema_valid:
-                log.error("TSI schema validation failed - uploading anyway but data quality may be impacted")
-                log.debug(f"TSI schema info: {get_schema_info(df)}")
-            if not coverage_valid:
-                log.warning("TSI coverage check failed - some critical fields have low coverage")
-        elif src == 'WU':
-            schema_valid = validate_wu_schema(df)
-            coverage_valid = check_wu_coverage(df)
-            if not schema_valid:
-                log.error("WU schema validation failed - uploading anyway but data quality may be impacted")
-                log.debug(f"WU schema info: {get_schema_info(df)}")
-            if not coverage_valid:
-                log.warning("WU coverage check failed - some critical fields have low coverage")
+        _validate_for_upload(df, src)
     
     try:
-        uploader.upload_parquet(df, source=src, aggregated=aggregate, interval=agg_interval, ts_column=ts_col)
+        uploader.upload_parquet(df, source=src, aggregated=aggregate, interval=agg_interval, ts_column=ts_col, merge=merge)
         return True
     except ValueError as ve:
         log.warning(f"{src} upload validation skipped: {ve}")
@@ -484,7 +547,9 @@ def _safe_upload(uploader: Any, df: pd.DataFrame, src: str, aggregate: bool, agg
     return False
 
 
-def _sink_data(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, sink: str, aggregate: bool, agg_interval: str) -> tuple[bool, bool]:
+def _sink_data(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, sink: str, aggregate: bool, agg_interval: str, allow_db: bool = True,
+               merge: bool = False, long: Optional[LongReadings] = None,
+               registry: Optional[DeploymentRegistry] = None) -> tuple[bool, bool]:
     wrote_wu = wrote_tsi = False
     wrote_any = False
     # Allow hard disable of any DB interaction (Cloud SQL optional) via env DISABLE_DB_SINK=1
@@ -496,11 +561,11 @@ def _sink_data(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, sink: str, aggregate:
             log.error("No GCS bucket configured; skip GCS sink")
         else:
             uploader = _build_uploader(bucket, gcs_cfg.get('prefix', 'sensor_readings'))
-            wrote_wu = _safe_upload(uploader, wu_df, 'WU', aggregate, agg_interval) or wrote_wu
-            wrote_tsi = _safe_upload(uploader, tsi_df, 'TSI', aggregate, agg_interval) or wrote_tsi
+            wrote_wu = _safe_upload(uploader, wu_df, 'WU', aggregate, agg_interval, merge) or wrote_wu
+            wrote_tsi = _safe_upload(uploader, tsi_df, 'TSI', aggregate, agg_interval, merge) or wrote_tsi
             wrote_any = wrote_wu or wrote_tsi
 
-    if not disable_db and (sink in ('db', 'both') or (sink == 'gcs' and not wrote_any)):
+    if allow_db and not disable_db and (sink in ('db', 'both') or (sink == 'gcs' and not wrote_any)):
         wu_db = wu_df if _has_ts(wu_df) else pd.DataFrame()
         tsi_db = tsi_df if _has_ts(tsi_df) else pd.DataFrame()
         if (not _has_ts(wu_df)) and not wu_df.empty:
@@ -514,7 +579,7 @@ def _sink_data(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, sink: str, aggregate:
             db = None
         if db is not None and check_db_connection(db):
             try:
-                insert_data_to_db(db, wu_db, tsi_db)
+                insert_data_to_db(db, wu_db, tsi_db, long=long, registry=registry)
                 if (not wu_db.empty):
                     wrote_wu = True
                 if (not tsi_db.empty):
@@ -532,7 +597,39 @@ def _sink_data(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, sink: str, aggregate:
 # BigQuery staging writer
 ###########################
 
-def _write_bq_staging(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, start_str: str, end_str: str):
+def _staging_day_frames(long_df: pd.DataFrame, source_label: str) -> Iterator[tuple[date_cls, pd.DataFrame]]:
+    """Split long readings into per-UTC-date frames ready for a BigQuery staging load.
+
+    Timestamps are normalized in one vectorized pass for the whole source (rows that cannot be
+    parsed are dropped) and truncated to whole seconds. The compact long-format dtypes are kept:
+    ``metric_name`` stays categorical (a dictionary-encoded column in the load's Parquet file)
+    and the int32/float32 columns are widened by the load schema. ``long_df`` is shared with the
+    other sinks and is not modified.
+    """
+    if long_df.empty:
+        return
+    ts = normalize_timestamps(long_df['timestamp'])
+    valid = ts.notna().to_numpy()
+    if not valid.all():
+        log.warning(f"Dropped {int((~valid).sum())} {source_label} staging rows with invalid timestamps "
+                    f"(raw samples={long_df.loc[~valid, 'timestamp'].head().tolist()})")
+    stamps = ts.dt.floor('s').array
+    day_ns = ts.dt.floor('D').to_numpy(dtype='datetime64[ns]')
+    deployments = long_df['deployment_fk'].to_numpy()
+    metric_names = long_df['metric_name'].astype('category').array
+    values = long_df['value'].to_numpy()
+    for day in np.unique(day_ns[valid]):
+        mask = valid & (day_ns == day)
+        yield pd.Timestamp(day).date(), pd.DataFrame({
+            'timestamp': stamps[mask],
+            'deployment_fk': deployments[mask],
+            'metric_name': metric_names[mask],
+            'value': values[mask],
+        })
+
+
+def _write_bq_staging(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, start_str: str, end_str: str,
+                      long: Optional[LongReadings] = None, registry: Optional[DeploymentRegistry] = None):
     """Materialize per-source dated staging tables in BigQuery.
 
     Table pattern: staging_<source>_<YYYYMMDD> with columns (timestamp, deployment_fk, metric_name, value).
@@ -541,14 +638,13 @@ def _write_bq_staging(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, start_str: str,
 
     If a single run spans multiple days (rare – typical orchestration loops day-by-day), data
     is split per date and each date's table is (re)written (WRITE_TRUNCATE) to maintain idempotency.
+    Pass the day's ``long`` readings to reuse the long-format frames already built for the DB sink,
+    and the run's ``registry`` to reuse its deployment map. With DISABLE_DB_SINK=1 the map comes
+    from the registry's local snapshot.
     """
     if os.getenv('DISABLE_BQ_STAGING') == '1':  # opt-out switch
         log.info("BQ staging disabled via DISABLE_BQ_STAGING=1")
         return
-    if os.getenv('DISABLE_DB_SINK') == '1':
-        # Deployment mapping currently sourced from DB; skip quietly when DB disabled.
-        log.info("BQ staging skipped because DB sink disabled (needs deployment mapping refactor).")
-        return
     if wu_df.empty and tsi_df.empty:
         log.info("No dataframes to stage to BigQuery (both empty).")
         return
@@ -562,218 +658,27 @@ def _write_bq_staging(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, start_str: str,
     dataset = os.getenv('BQ_DATASET', 'sensors')
     client = bigquery.Client(project=bq_project)
 
-    # Fetch deployment mapping (active only)
-    deployment_map_df = pd.DataFrame()
-    try:
-        from sqlalchemy import text as _bq_text  # reuse existing DB connection logic if available
-        db = HotDurhamDB()
-        with db.engine.connect() as conn:
-            deployment_map_df = pd.read_sql(_bq_text("""
-                SELECT d.deployment_pk, sm.native_sensor_id, sm.sensor_type
-                FROM deployments d
-                JOIN sensors_master sm ON d.sensor_fk = sm.sensor_pk
-                WHERE d.end_date IS NULL
-            """), conn)
-    except Exception as e:
-        log.error(f"Unable to fetch deployment mapping for staging tables: {e}")
-        return
-    if deployment_map_df.empty:
-        log.error("Deployment map empty – cannot build BigQuery staging tables.")
-        return
-
-    def _prepare_long(df: pd.DataFrame, sensor_type: str) -> pd.DataFrame:
-        if df.empty:
-            return pd.DataFrame(columns=['timestamp','deployment_fk','metric_name','value'])
-        if df.columns.duplicated().any():
-            working = df.loc[:, ~df.columns.duplicated()].copy()
-        else:
-            working = df.copy()
-        type_map = deployment_map_df[deployment_map_df.sensor_type == sensor_type]
-        if type_map.empty:
-            log.warning(f"No active deployments for type {sensor_type} – skipping staging long melt")
-            return pd.DataFrame(columns=['timestamp','deployment_fk','metric_name','value'])
-        merged = working.merge(type_map, on='native_sensor_id', how='inner')
-        if merged.empty:
-            log.warning(f"No rows matched deployments for {sensor_type} – skipping")
-            return pd.DataFrame(columns=['timestamp','deployment_fk','metric_name','value'])
-        merged = merged.rename(columns={'deployment_pk': 'deployment_fk'})
-        id_vars = ['timestamp', 'deployment_fk']
-        candidate_vars = [c for c in merged.columns if c not in id_vars + ['native_sensor_id','sensor_type']]
-        numeric_vars: list[str] = []
-        for col in candidate_vars:
-            coerced = pd.to_numeric(merged[col], errors='coerce')
-            if coerced.notna().any():
-                merged[col] = coerced
-                numeric_vars.append(col)
-        if not numeric_vars:
-            return pd.DataFrame(columns=['timestamp','deployment_fk','metric_name','value'])
-        long_df = pd.melt(merged, id_vars=id_vars, value_vars=numeric_vars, var_name='metric_name', value_name='value')
-        long_df['value'] = pd.to_numeric(long_df['value'], errors='coerce')
-        long_df = long_df.dropna(subset=['value']).drop_duplicates(subset=['timestamp','deployment_fk','metric_name'], keep='last')
-        return long_df
-
-    wu_long = _prepare_long(wu_df, 'WU')
-    tsi_long = _prepare_long(tsi_df, 'TSI')
+    if long is None:
+        long = LongReadings(wu_df, tsi_df)
+    if not long.built:
+        # Deployment mapping (active only) unless the DB sink already built the long frames
+        if registry is None:
+            registry = DeploymentRegistry.from_env(HotDurhamDB)
+        try:
+            deployment_map_df = registry.frame()
+        except Exception as e:
+            log.error(f"Unable to fetch deployment mapping for staging tables: {e}")
+            return
+        if deployment_map_df.empty:
+            log.error("Deployment map empty – cannot build BigQuery staging tables.")
+            return
+        long.build(deployment_map_df)
 
     def _split_and_load(long_df: pd.DataFrame, source_label: str):
-        if long_df.empty:
-            return 0
-        long_df['date'] = pd.to_datetime(long_df['timestamp']).dt.date
-        distinct_dates: List[date_cls] = sorted(long_df['date'].unique())  # type: ignore[arg-type]
         total_rows = 0
-        for d in distinct_dates:
-            day_df = long_df[long_df['date'] == d].drop(columns=['date']).copy()
-            if 'timestamp' not in day_df.columns:
-                log.warning("Skipping %s staging for %s – no timestamp column", source_label, d)
-                continue
-            ts_series = day_df['timestamp']
-            if pd.api.types.is_numeric_dtype(ts_series):
-                numeric = pd.to_numeric(ts_series, errors='coerce')
-                max_abs = numeric.abs().max()
-                if pd.isna(max_abs):
-                    ts_converted = pd.to_datetime(numeric, utc=True, errors='coerce')
-                elif max_abs > 9_007_199_254_740_992:  # larger than float64 safe range -> assume nanoseconds
-                    ts_converted = pd.to_datetime(numeric, utc=True, errors='coerce', unit='ns')
-                elif max_abs > 9_007_199_254_740:  # microseconds range
-                    ts_converted = pd.to_datetime(numeric, utc=True, errors='coerce', unit='us')
-                else:
-                    ts_converted = pd.to_datetime(numeric, utc=True, errors='coerce', unit='s')
-            else:
-                ts_converted = pd.to_datetime(ts_series, utc=True, errors='coerce')
-            ts_converted = ts_converted.dt.tz_convert('UTC') if ts_converted.dt.tz is not None else ts_converted.dt.tz_localize('UTC')
-            ts_py = pd.Series(
-                (
-                    value.to_pydatetime() if pd.notna(value) else None
-                    for value in ts_converted
-                ),
-                index=ts_converted.index,
-                dtype=object,
-            )
-            day_df['timestamp'] = ts_py
-
-            def _ensure_py_datetime(value: Any) -> Optional[datetime]:
-                if value is None or (isinstance(value, float) and pd.isna(value)):
-                    return None
-                if isinstance(value, datetime):
-                    # Return timezone-naive datetime (BigQuery TIMESTAMP is implicitly UTC)
-                    return value.replace(tzinfo=None) if value.tzinfo is not None else value
-                if isinstance(value, pd.Timestamp):
-                    ts_val = value.tz_convert('UTC') if value.tzinfo is not None else value.tz_localize('UTC')
-                    # Return timezone-naive datetime
-                    return ts_val.to_pydatetime().replace(tzinfo=None)
-                if isinstance(value, (np.integer, int)):
-                    magnitude = abs(int(value))
-                    if magnitude > 9_007_199_254_740_992:
-                        dt = pd.to_datetime(int(value), utc=True, errors='coerce', unit='ns')
-                    elif magnitude > 9_007_199_254_740:
-                        dt = pd.to_datetime(int(value), utc=True, errors='coerce', unit='us')
-                    else:
-                        dt = pd.to_datetime(int(value), utc=True, errors='coerce', unit='s')
-                    if pd.isna(dt):
-                        return None
-                    # Return timezone-naive datetime
-                    return dt.to_pydatetime().replace(tzinfo=None)
-                if isinstance(value, (np.floating, float)):
-                    if pd.isna(value):
-                        return None
-                    return _ensure_py_datetime(int(value))
-                if isinstance(value, str):
-                    parsed = pd.to_datetime(value, utc=True, errors='coerce')
-                    if pd.isna(parsed):
-                        return None
-                    # Return timezone-naive datetime
-                    return parsed.to_pydatetime().replace(tzinfo=None)
-                return None
-
-            ensured_py = pd.Series(
-                (_ensure_py_datetime(value) for value in day_df['timestamp']),
-                index=day_df.index,
-                dtype=object,
-            )
-            coerced_ts = pd.to_datetime(ensured_py, utc=True, errors='coerce')
-            invalid_mask = coerced_ts.isna()
-            if invalid_mask.any():
-                dropped = int(invalid_mask.sum())
-                sample_bad = day_df.loc[invalid_mask, 'timestamp'].head().tolist()
-                log.warning(
-                    "Dropped %s rows with invalid timestamps for %s on %s (raw samples=%s)",
-                    dropped,
-                    source_label,
-                    d,
-                    sample_bad,
-                )
-                day_df = day_df.loc[~invalid_mask].copy()
-            if day_df.empty:
-                log.warning("No valid timestamps remain for %s on %s after coercion", source_label, d)
-                continue
-            coerced_ts = coerced_ts.loc[day_df.index]
-            if coerced_ts.dt.tz is None:
-                coerced_ts = coerced_ts.dt.tz_localize('UTC')
-            else:
-                coerced_ts = coerced_ts.dt.tz_convert('UTC')
-            py_ts = pd.Series(
-                (ts.to_pydatetime() for ts in coerced_ts),
-                index=coerced_ts.index,
-                dtype=object,
-            )
-            day_df['timestamp'] = py_ts
-            numeric_mask = day_df['timestamp'].apply(lambda v: isinstance(v, (np.integer, int, np.floating, float)))
-            if numeric_mask.any():
-                numeric_count = int(numeric_mask.sum())
-                log.warning(
-                    "Re-coercing %s numeric timestamp values for %s on %s after initial conversion",
-                    numeric_count,
-                    source_label,
-                    d,
-                )
-                day_df.loc[numeric_mask, 'timestamp'] = day_df.loc[numeric_mask, 'timestamp'].apply(_ensure_py_datetime)
-            non_dt_mask = day_df['timestamp'].apply(lambda v: v is not None and not isinstance(v, datetime))
-            if non_dt_mask.any():
-                samples = day_df.loc[non_dt_mask, 'timestamp'].head().tolist()
-                log.warning(
-                    "Unexpected non-datetime values persisted for %s on %s: %s",
-                    source_label,
-                    d,
-                    samples,
-                )
-                day_df.loc[non_dt_mask, 'timestamp'] = day_df.loc[non_dt_mask, 'timestamp'].apply(_ensure_py_datetime)
-            ensured_final = pd.Series(
-                (_ensure_py_datetime(value) for value in day_df['timestamp']),
-                index=day_df.index,
-                dtype=object,
-            )
-            invalid_final = ensured_final.isna()
-            if invalid_final.any():
-                dropped_final = int(invalid_final.sum())
-                log.warning(
-                    "Dropping %s rows with invalid timestamps after final coercion for %s on %s",
-                    dropped_final,
-                    source_label,
-                    d,
-                )
-                day_df = day_df.loc[~invalid_final].copy()
-                ensured_final = ensured_final.loc[day_df.index]
-                if day_df.empty:
-                    log.warning("No valid timestamps remain for %s on %s after final coercion", source_label, d)
-                    continue
-            type_counts = ensured_final.apply(lambda v: type(v).__name__).value_counts().to_dict()
-            log.warning(
-                "Timestamp type distribution for %s on %s: %s",
-                source_label,
-                d,
-                type_counts,
-            )
-            # Use ensured_final (object dtype with Python datetimes) directly
-            day_df['timestamp'] = ensured_final
+        for d, day_df in _staging_day_frames(long_df, source_label):
             table_name = f"staging_{source_label.lower()}_{d.strftime('%Y%m%d')}"
             fq = f"{client.project}.{dataset}.{table_name}"
-            
-            # Convert timezone-naive datetime objects to formatted strings for BigQuery
-            # ISO format is parseable by BigQuery's TIMESTAMP type
-            day_df['timestamp'] = day_df['timestamp'].apply(
-                lambda dt: dt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(dt, datetime) else None
-            )
-            
             schema = [
                 bigquery.SchemaField('timestamp','TIMESTAMP'),
                 bigquery.SchemaField('deployment_fk','INT64'),
@@ -787,33 +692,24 @@ def _write_bq_staging(wu_df: pd.DataFrame, tsi_df: pd.DataFrame, start_str: str,
                 tbl = bigquery.Table(fq, schema=schema)
                 client.create_table(tbl)
                 log.info(f"Created staging table {fq}")
-            # Use autodetect instead of explicit schema to avoid PyArrow type conflicts
+            # Explicit schema: native UTC timestamps load as TIMESTAMP, the categorical metric_name
+            # as STRING and int32/float32 are widened to INT64/FLOAT64
             job_config = bigquery.LoadJobConfig(
                 write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-                autodetect=True,
+                schema=schema,
             )
-            if not day_df.empty:
-                sample_ts = day_df['timestamp'].iloc[0]
-                log.warning(
-                    "Prepared %s staging frame for %s: dtype=%s sample=%s type=%s",
-                    source_label,
-                    d,
-                    day_df['timestamp'].dtype,
-                    sample_ts,
-                    type(sample_ts)
-                )
             log.info(f"Loading {len(day_df)} rows into {fq} (truncate replace)")
-            load_job = client.load_table_from_dataframe(day_df[['timestamp','deployment_fk','metric_name','value']], fq, job_config=job_config)
+            load_job = client.load_table_from_dataframe(day_df, fq, job_config=job_config)
             load_job.result()
             total_rows += len(day_df)
         return total_rows
 
-    wu_rows = _split_and_load(wu_long, 'WU')
-    tsi_rows = _split_and_load(tsi_long, 'TSI')
+    wu_rows = _split_and_load(long.frames['WU'], 'WU')
+    tsi_rows = _split_and_load(long.frames['TSI'], 'TSI')
     log.info(f"BigQuery staging write complete: WU rows={wu_rows} TSI rows={tsi_rows}")
 
 
-def _log_run_metadata(run_id: str, start_str: str, end_str: str, run_started: datetime, wu_raw: pd.DataFrame, tsi_raw: pd.DataFrame, wu_df: pd.DataFrame, tsi_df: pd.DataFrame, wrote_wu: bool, wrote_tsi: bool, aggregate: bool, agg_interval: str, sink: str, source: str):
+def _log_run_metadata(run_id: str, start_str: str, end_str: str, run_started: datetime, wu_rows: int, tsi_rows: int, wrote_wu: bool, wrote_tsi: bool, aggregate: bool, agg_interval: str, sink: str, source: str):
     if os.getenv('BQ_RUN_METADATA') != '1':
         return
     try:
@@ -850,10 +746,10 @@ def _log_run_metadata(run_id: str, start_str: str, end_str: str, run_started: da
             'end_date': end_str,
             'run_started': run_started,
             'run_finished': datetime.utcnow(),
-            'wu_rows': int(len(wu_raw)),
-            'tsi_rows': int(len(tsi_raw)),
-            'wu_written': bool(not wu_df.empty and wrote_wu),
-            'tsi_written': bool(not tsi_df.empty and wrote_tsi),
+            'wu_rows': int(wu_rows),
+            'tsi_rows': int(tsi_rows),
+            'wu_written': bool(wrote_wu),
+            'tsi_written': bool(wrote_tsi),
             'aggregate': bool(aggregate),
             'agg_interval': agg_interval,
             'sink': sink,
@@ -878,6 +774,14 @@ class RunConfig:
     agg_interval: str = 'h'
     sink: str = 'gcs'
     source: str = 'all'
+    max_concurrent_days: int = 1
+    tsi_window_days: int = 1
+    stream: bool = False
+    arrow: bool = False
+    resolutions: Optional[tuple[str, ...]] = None
+    incremental: bool = False
+    watermark_lookback: str = DEFAULT_LOOKBACK
+    watermark_store: Optional[str] = None
 
     # Backward compat helper to allow existing call style
     @classmethod
@@ -885,6 +789,45 @@ class RunConfig:
         return cls(start_date=start, end_date=end, **kwargs)
 
 
+def parse_resolutions(value: str) -> tuple[str, ...]:
+    """Parse a comma-separated resolution list such as 'raw,15min,h,D'.
+
+    Duplicates are dropped and 'raw' (if present) is moved first; every other entry must be a
+    pandas offset alias. Raises ValueError on an empty list or an unknown interval.
+    """
+    resolutions: list[str] = []
+    for part in value.split(','):
+        resolution = part.strip()
+        if not resolution or resolution in resolutions:
+            continue
+        if resolution != RAW_RESOLUTION:
+            try:
+                pd.tseries.frequencies.to_offset(resolution)
+            except ValueError as e:
+                raise ValueError(f"invalid resolution '{resolution}': {e}") from e
+        resolutions.append(resolution)
+    if not resolutions:
+        raise ValueError("at least one resolution is required")
+    if RAW_RESOLUTION in resolutions:
+        resolutions.remove(RAW_RESOLUTION)
+        resolutions.insert(0, RAW_RESOLUTION)
+    return tuple(resolutions)
+
+
+def _fetch_params(config: RunConfig) -> tuple[bool, str]:
+    """(aggregate, agg_interval) to request from the clients; multi-resolution runs always fetch raw."""
+    if config.resolutions:
+        return False, 'h'
+    return config.aggregate, config.agg_interval
+
+
+def _run_labels(config: RunConfig) -> tuple[bool, str]:
+    """(aggregate, agg_interval) recorded in run metadata."""
+    if config.resolutions:
+        return any(r != RAW_RESOLUTION for r in config.resolutions), ','.join(config.resolutions)
+    return config.aggregate, config.agg_interval
+
+
 def _maybe_show_samples(wu_df: pd.DataFrame, tsi_df: pd.DataFrame):
     if not wu_df.empty:
         print("WU sample:\n", wu_df.head())
@@ -892,6 +835,222 @@ def _maybe_show_samples(wu_df: pd.DataFrame, tsi_df: pd.DataFrame):
         print("TSI sample:\n", tsi_df.head())
 
 
+async def _source_batches(client: Any, day_str: str, tsi_prefetch: Optional[_TSIWindowPrefetch] = None,
+                         arrow: bool = False) -> AsyncIterator[pd.DataFrame | pa.RecordBatch]:
+    """Raw batches for one source and day: per-device frames as they complete, or the day's slice of a prefetched TSI window.
+
+    With ``arrow`` the clients yield pyarrow RecordBatches (a prefetched TSI window stays a DataFrame).
+    """
+    if tsi_prefetch is not None:
+        df = await tsi_prefetch.get(day_str)
+        if not df.empty:
+            yield df
+        return
+    batches = client.iter_batches(day_str, day_str, arrow=True) if arrow else client.iter_batches(day_str, day_str)
+    async for batch in batches:
+        yield batch
+
+
+async def _stream_source(client: Any, src: str, day_str: str, uploader: Any, tsi_prefetch: Optional[_TSIWindowPrefetch] = None,
+                         merge: bool = False, arrow: bool = False) -> tuple[int, bool, Watermarks]:
+    """Clean each raw batch and append it to the day's parquet partition. Returns (raw rows, wrote, newest timestamp per sensor).
+
+    Arrow record batches (``arrow``) are cleaned by column projection and written without pandas.
+    """
+    raw_rows = 0
+    marks: Watermarks = {}
+    writer: Optional[IncrementalParquetWriter] = None
+    batches = _source_batches(client, day_str, tsi_prefetch, arrow)
+    try:
+        async for batch in batches:
+            raw_rows += len(batch)
+            marks = merge_watermarks(marks, compute_watermarks(batch, src))
+            if isinstance(batch, pa.RecordBatch):
+                cleaned = await asyncio.to_thread(clean_record_batch, batch, src)
+                columns = cleaned.schema.names
+            else:
+                cleaned = await asyncio.to_thread(clean_and_transform_data, batch, src)
+                if not _has_ts(cleaned):
+                    log.warning(f"Skip {src} batch: no ts/timestamp column")
+                    continue
+                columns = list(cleaned.columns)
+            if writer is None:
+                # Arrow batches carry the clients' fixed raw schemas, so there is no schema drift to report
+                if not isinstance(cleaned, pa.RecordBatch):
+                    _validate_for_upload(cleaned, src)
+                ts_col = 'ts' if 'ts' in columns else 'timestamp'
+                writer = await asyncio.to_thread(uploader.open_parquet_stream, UploadSpec(source=src, ts_column=ts_col, merge=merge), day_str)
+                if writer is None:
+                    # Partition already uploaded; closing the generator cancels the remaining fetches.
+                    return raw_rows, True, {}
+            await asyncio.to_thread(writer.write, cleaned)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        await batches.aclose()
+    if writer is None:
+        log.info(f"Skip {src}: empty")
+        return raw_rows, False, {}
+    rows = await asyncio.to_thread(writer.close)
+    return raw_rows, rows > 0, marks
+
+
+async def _stream_day(day_str: str, wu_client: Optional[WUClient], tsi_client: Optional[TSIClient],
+                      tsi_prefetch: Optional[_TSIWindowPrefetch] = None,
+                      merge: bool = False, arrow: bool = False) -> dict[str, tuple[int, bool, Watermarks]]:
+    """GCS-only streaming variant of fetch -> clean -> sink for one day.
+
+    Batches go straight from the API clients through cleaning into an incremental parquet
+    writer per source, so memory is bounded by a few batches rather than the whole fleet.
+    With ``arrow`` the batches stay pyarrow RecordBatches from parse to parquet (see arrow_batches).
+    Returns {source: (raw rows, wrote, newest timestamp per sensor)}.
+    """
+    gcs_cfg = app_config.gcs_config
+    bucket = gcs_cfg.get('bucket')
+    if not bucket:
+        log.error("No GCS bucket configured; skip GCS sink")
+        return {'WU': (0, False, {}), 'TSI': (0, False, {})}
+    uploader = await asyncio.to_thread(_build_uploader, bucket, gcs_cfg.get('prefix', 'sensor_readings'))
+
+    async def _run(client: Any, src: str, prefetch: Optional[_TSIWindowPrefetch] = None) -> tuple[int, bool, Watermarks]:
+        if client is None:
+            return 0, False, {}
+        return await _stream_source(client, src, day_str, uploader, prefetch, merge, arrow)
+
+    wu_result, tsi_result = await asyncio.gather(_run(wu_client, 'WU'), _run(tsi_client, 'TSI', tsi_prefetch))
+    return {'WU': wu_result, 'TSI': tsi_result}
+
+
+def _watermark_update(rows: int, wrote: bool, marks: Watermarks) -> Optional[Watermarks]:
+    """Watermarks a day may advance: its marks if written, {} if it had no data, None if data failed to persist."""
+    if wrote:
+        return marks
+    return {} if rows == 0 else None
+
+
+def _output_day(day_str: str, config: RunConfig, wu_raw: pd.DataFrame, tsi_raw: pd.DataFrame,
+                resolution: Optional[str] = None, primary: bool = True, merge: bool = False,
+                registry: Optional[DeploymentRegistry] = None) -> tuple[bool, bool]:
+    """Clean and sink one output of a day; returns (wrote_wu, wrote_tsi).
+
+    With ``resolution`` set (multi-resolution runs) the raw frames are rolled up to it first and
+    written to that agg= partition. Only the primary output (raw when requested, otherwise the
+    first resolution) feeds the DB sink and BigQuery staging, so those never hold duplicate
+    readings at several resolutions.
+    """
+    aggregate, interval = config.aggregate, config.agg_interval
+    if resolution is not None:
+        aggregate, interval = resolution != RAW_RESOLUTION, resolution
+        if aggregate:
+            wu_raw = aggregate_source(wu_raw, 'WU', resolution) if not wu_raw.empty else wu_raw
+            tsi_raw = aggregate_source(tsi_raw, 'TSI', resolution) if not tsi_raw.empty else tsi_raw
+    wu_df, tsi_df = _clean(wu_raw, tsi_raw)
+    label = interval if aggregate else RAW_RESOLUTION
+    if config.is_dry_run:
+        log.info(f"DRY RUN: showing head only for {day_str} ({label})")
+        _maybe_show_samples(wu_df, tsi_df)
+        return False, False
+    sink = config.sink
+    if not primary:
+        if sink == 'db':
+            log.info(f"Skip {label} output for {day_str}: only the primary resolution is written to the DB")
+            return False, False
+        sink = 'gcs'
+    # Long-format readings are built at most once and shared by the DB sink and BigQuery staging
+    long = LongReadings(wu_df, tsi_df) if primary else None
+    wrote_wu, wrote_tsi = _sink_data(wu_df, tsi_df, sink, aggregate, interval, allow_db=primary,
+                                     merge=merge, long=long, registry=registry)
+    if primary:
+        try:
+            _write_bq_staging(wu_df, tsi_df, day_str, day_str, long=long, registry=registry)
+        except Exception:
+            log.error(f"Unhandled error while writing BigQuery staging tables for {day_str}", exc_info=True)
+    return wrote_wu, wrote_tsi
+
+
+async def _process_day(day_str: str, config: RunConfig, wu_client: Optional[WUClient], tsi_client: Optional[TSIClient],
+                       tsi_prefetch: Optional[_TSIWindowPrefetch] = None,
+                       registry: Optional[DeploymentRegistry] = None) -> Optional[dict[str, Optional[Watermarks]]]:
+    """Fetch, clean and sink a single day using the run-wide client sessions.
+
+    Each day writes its own partitions/staging tables and its own run metadata row, so days are
+    independent and safe to process concurrently. Blocking clean/sink work runs in a worker
+    thread so other days' fetches keep progressing on the event loop.
+
+    Returns the per-source watermark updates the day earned (see _watermark_update), or None
+    if the day failed.
+    """
+    log.info(f"--- Processing day {day_str} ---")
+    run_id = uuid.uuid4().hex
+    run_started = datetime.utcnow()
+    # Incremental runs merge into the day's object (deduplicated) instead of skipping an existing one
+    merge = config.incremental
+    try:
+        if config.stream and not config.is_dry_run:
+            results = await _stream_day(day_str, wu_client, tsi_client, tsi_prefetch, merge, config.arrow)
+            (wu_rows, wrote_wu, _), (tsi_rows, wrote_tsi, _) = results['WU'], results['TSI']
+            log.info(f"Streamed {day_str}: WU rows={wu_rows} written={wrote_wu}, TSI rows={tsi_rows} written={wrote_tsi}")
+            await asyncio.to_thread(
+                _log_run_metadata,
+                run_id, day_str, day_str, run_started,
+                wu_rows, tsi_rows, wrote_wu, wrote_tsi,
+                config.aggregate, config.agg_interval, config.sink, config.source
+            )
+            return {src: _watermark_update(*result) for src, result in results.items()}
+        fetch_aggregate, fetch_interval = _fetch_params(config)
+        wu_raw, tsi_raw = await _fetch_with_clients(wu_client, tsi_client, day_str, day_str, fetch_aggregate, fetch_interval, tsi_prefetch)
+        log.info(f"Completed fetch for {day_str}. wu_raw rows: {len(wu_raw)}, tsi_raw rows: {len(tsi_raw)}")
+        if tsi_client is not None and tsi_raw.empty:
+            log.warning(f"No TSI data returned for {day_str}")
+        wrote_wu = wrote_tsi = False
+        primary_wrote = (False, False)
+        # One fetch feeds every requested resolution; outputs are built one at a time to bound memory.
+        for idx, resolution in enumerate(config.resolutions or (None,)):
+            out_wu, out_tsi = await asyncio.to_thread(_output_day, day_str, config, wu_raw, tsi_raw, resolution, idx == 0, merge, registry)
+            if idx == 0:
+                primary_wrote = (out_wu, out_tsi)
+            wrote_wu, wrote_tsi = wrote_wu or out_wu, wrote_tsi or out_tsi
+        if config.is_dry_run:
+            return None
+        if not (wrote_wu or wrote_tsi):
+            log.warning(f"No data written to any sink for {day_str}.")
+        else:
+            log.info(f"Data written for {day_str}: WU={wrote_wu}, TSI={wrote_tsi}")
+        run_aggregate, run_interval = _run_labels(config)
+        await asyncio.to_thread(
+            _log_run_metadata,
+            run_id, day_str, day_str, run_started,
+            len(wu_raw), len(tsi_raw), wrote_wu, wrote_tsi,
+            run_aggregate, run_interval, config.sink, config.source
+        )
+        if not config.incremental:
+            return None
+        return {
+            'WU': _watermark_update(len(wu_raw), primary_wrote[0], compute_watermarks(wu_raw, 'WU')),
+            'TSI': _watermark_update(len(tsi_raw), primary_wrote[1], compute_watermarks(tsi_raw, 'TSI')),
+        }
+    except Exception as e:
+        log.error(f"Exception processing {day_str}: {e}", exc_info=True)
+        return None
+
+
+def _contiguous_watermarks(day_results: List[Optional[dict[str, Optional[Watermarks]]]], source: str) -> Watermarks:
+    """Merge a source's watermark updates over the days (in date order) up to its first failed day.
+
+    Stopping at the first failure keeps a later successful day from moving a watermark past
+    data that was never persisted, so the next incremental run re-fetches it.
+    """
+    merged: Watermarks = {}
+    for result in day_results:
+        update = result.get(source) if result is not None else None
+        if update is None:
+            break
+        merged = merge_watermarks(merged, update)
+    return merged
+
+
 async def run_collection_process(
     start_date: datetime | str,
     end_date: datetime | str,
@@ -900,6 +1059,10 @@ async def run_collection_process(
     agg_interval: str = 'h',
     sink: str = 'gcs',
     source: str = 'all',
+    max_concurrent_days: int = 1,
+    tsi_window_days: int = 1,
+    stream: bool = False,
+    resolutions: Optional[tuple[str, ...]] = None,
     config: Optional[RunConfig] = None,
 ):
     """Primary orchestration entrypoint.
@@ -907,56 +1070,84 @@ async def run_collection_process(
     Either supply legacy individual parameters (maintained for backward compatibility & tests)
     or pass a RunConfig via the config parameter (preferred going forward) which reduces the
     CodeScene flagged long argument list.
+
+    Days are processed by a bounded-parallel scheduler: up to ``max_concurrent_days`` days are in
+    flight at once, all sharing one client session per source for the whole range. With
+    ``tsi_window_days`` > 1, TSI is fetched once per multi-day window and split by day locally.
+
+    ``stream`` (raw data, GCS sink only) writes each day's parquet incrementally from per-device
+    batches instead of materializing the day first. The DB sink and BigQuery staging need whole-day
+    frames and are skipped in this mode; load staging from the GCS partitions afterwards.
+
+    ``resolutions`` (e.g. ('raw', '15min', 'h', 'D')) fetches raw data once per day and uploads every
+    rollup to its own agg= partition, replacing one collector run per resolution. It overrides
+    ``aggregate``/``agg_interval``.
+
+    ``config.incremental`` (raw outputs only) loads per-sensor watermarks, fetches only data newer
+    than ``watermark - watermark_lookback`` and advances the watermarks once the data is persisted.
     """
     if config is None:
-        config = RunConfig.from_legacy(start_date, end_date, is_dry_run=is_dry_run, aggregate=aggregate, agg_interval=agg_interval, sink=sink, source=source)
+        config = RunConfig.from_legacy(
+            start_date, end_date, is_dry_run=is_dry_run, aggregate=aggregate, agg_interval=agg_interval,
+            sink=sink, source=source, max_concurrent_days=max_concurrent_days, tsi_window_days=tsi_window_days,
+            stream=stream, resolutions=resolutions
+        )
+    if config.resolutions:
+        config.resolutions = parse_resolutions(','.join(config.resolutions))
+        if config.stream and config.resolutions != (RAW_RESOLUTION,):
+            log.warning("Streaming mode cannot build rollups; falling back to whole-day processing for --resolutions")
+            config.stream = False
+    if config.stream and (config.aggregate or config.sink != 'gcs'):
+        log.warning("Streaming mode supports raw data with --sink gcs only; falling back to whole-day processing")
+        config.stream = False
+    if config.incremental and (config.aggregate or (config.resolutions and config.resolutions != (RAW_RESOLUTION,))):
+        log.warning("Incremental mode collects raw data only; rollups over a partial window would be wrong. Running a full collection")
+        config.incremental = False
     # Local variable aliasing for readability
     start_date = config.start_date
     end_date = config.end_date
     log.info(
-        "Run collection %s -> %s dry=%s aggregate=%s interval=%s sink=%s source=%s",
-        start_date, end_date, config.is_dry_run, config.aggregate, config.agg_interval, config.sink, config.source
+        "Run collection %s -> %s dry=%s aggregate=%s interval=%s sink=%s source=%s max_concurrent_days=%s tsi_window_days=%s stream=%s resolutions=%s",
+        start_date, end_date, config.is_dry_run, config.aggregate, config.agg_interval, config.sink, config.source,
+        config.max_concurrent_days, config.tsi_window_days, config.stream, config.resolutions
     )
 
-    # Refactored: process each day in the range individually
     start_dt = start_date if isinstance(start_date, datetime) else datetime.strptime(start_date, '%Y-%m-%d')
     end_dt = end_date if isinstance(end_date, datetime) else datetime.strptime(end_date, '%Y-%m-%d')
     total_days = (end_dt.date() - start_dt.date()).days + 1
     log.info(f"Processing {total_days} days: {start_dt.date()} to {end_dt.date()}")
-    for i in range(total_days):
-        day = start_dt + timedelta(days=i)
-        day_str = day.strftime('%Y-%m-%d')
-        log.info(f"--- Processing day {day_str} ---")
-        run_id = uuid.uuid4().hex
-        run_started = datetime.utcnow()
-        try:
-            log.info(f"[DEBUG] Starting TSI fetch for all devices on {day_str}")
-            wu_raw, tsi_raw = await _fetch_raw(day_str, day_str, config.source, config.aggregate, config.agg_interval)
-            log.info(f"[DEBUG] Completed TSI fetch for {day_str}. wu_raw rows: {len(wu_raw) if wu_raw is not None else 'None'}, tsi_raw rows: {len(tsi_raw) if tsi_raw is not None else 'None'}")
-            if tsi_raw is not None and hasattr(tsi_raw, 'empty') and tsi_raw.empty:
-                log.warning(f"[DEBUG] No TSI data returned for {day_str}")
-            wu_df, tsi_df = _clean(wu_raw, tsi_raw)
-            if config.is_dry_run:
-                log.info(f"DRY RUN: showing head only for {day_str}")
-                _maybe_show_samples(wu_df, tsi_df)
-                continue
-            wrote_wu, wrote_tsi = _sink_data(wu_df, tsi_df, config.sink, config.aggregate, config.agg_interval)
-            try:
-                _write_bq_staging(wu_df, tsi_df, day_str, day_str)
-            except Exception:
-                log.error(f"Unhandled error while writing BigQuery staging tables for {day_str}", exc_info=True)
-            if not (wrote_wu or wrote_tsi):
-                log.warning(f"No data written to any sink for {day_str}.")
-            else:
-                log.info(f"Data written for {day_str}: WU={wrote_wu}, TSI={wrote_tsi}")
-            _log_run_metadata(
-                run_id, day_str, day_str, run_started,
-                wu_raw, tsi_raw, wu_df, tsi_df,
-                wrote_wu, wrote_tsi,
-                config.aggregate, config.agg_interval, config.sink, config.source
+    day_strs = [(start_dt + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(total_days)]
+    day_slots = asyncio.Semaphore(max(1, config.max_concurrent_days))
+
+    async with AsyncExitStack() as stack:
+        wu_client, tsi_client = await _open_clients(stack, config.source, config.tsi_window_days)
+        watermark_store = None
+        if config.incremental:
+            gcs_cfg = app_config.gcs_config
+            watermark_store = await asyncio.to_thread(
+                build_watermark_store, config.watermark_store, gcs_cfg.get('bucket'), gcs_cfg.get('prefix', 'sensor_readings')
             )
-        except Exception as e:
-            log.error(f"Exception processing {day_str}: {e}", exc_info=True)
+            for src, client in (('WU', wu_client), ('TSI', tsi_client)):
+                if client is not None:
+                    marks = await asyncio.to_thread(watermark_store.load, src)
+                    client.set_watermarks(marks, config.watermark_lookback)
+                    log.info(f"Incremental {src}: {len(marks)} sensor watermarks from {watermark_store.location}")
+        # One deployment map per run (TTL-refreshed), shared by every day's DB sink and staging load
+        registry = DeploymentRegistry.from_env(HotDurhamDB)
+        tsi_prefetch = None
+        if tsi_client is not None and config.tsi_window_days > 1:
+            tsi_prefetch = _TSIWindowPrefetch(tsi_client, day_strs, config.tsi_window_days, *_fetch_params(config))
+
+        async def _bounded(day_str: str):
+            async with day_slots:
+                return await _process_day(day_str, config, wu_client, tsi_client, tsi_prefetch, registry)
+
+        day_results = await asyncio.gather(*(_bounded(d) for d in day_strs))
+        if watermark_store is not None and not config.is_dry_run:
+            for src in ('WU', 'TSI'):
+                updates = _contiguous_watermarks(day_results, src)
+                if updates:
+                    await asyncio.to_thread(watermark_store.advance, src, updates)
     log.info("Collection complete for all days.")
 
 
@@ -971,6 +1162,22 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     p.add_argument('--agg-interval', default='h')
     p.add_argument('--sink', choices=['gcs','db','both'], default='gcs')
     p.add_argument('--source', choices=['all','wu','tsi'], default='all')
+    p.add_argument('--max-concurrent-days', type=int, default=1,
+                   help='Number of days fetched/cleaned/sunk concurrently (client sessions are shared across days)')
+    p.add_argument('--tsi-window-days', type=int, default=1,
+                   help='Days per TSI telemetry request per device; >1 fetches multi-day windows and splits them by day')
+    p.add_argument('--stream', action='store_true',
+                   help='Write raw parquet incrementally per device batch (GCS sink only; skips DB sink and BigQuery staging)')
+    p.add_argument('--arrow', action='store_true',
+                   help='With --stream: parse API responses into Arrow record batches and write them without pandas')
+    p.add_argument('--resolutions', type=parse_resolutions, default=None,
+                   help="Comma-separated outputs from one fetch, e.g. 'raw,15min,h,D' (overrides --aggregate/--agg-interval)")
+    p.add_argument('--incremental', action='store_true',
+                   help='Only fetch data newer than each sensor\'s stored watermark (raw outputs only)')
+    p.add_argument('--watermark-lookback', default=DEFAULT_LOOKBACK,
+                   help='Overlap re-read before each watermark to catch late-arriving points (default: 1h)')
+    p.add_argument('--watermark-store', default=None,
+                   help='Watermark state location: local path or gs://bucket/path.json (default: WATERMARK_STORE env or the GCS prefix)')
     return p.parse_args(argv)
 
 
@@ -999,7 +1206,15 @@ def compute_date_range(args: argparse.Namespace) -> Tuple[datetime, datetime]:
 def main(argv=None):
     args = parse_args(argv or sys.argv[1:])
     start, end = compute_date_range(args)
-    asyncio.run(run_collection_process(start, end, is_dry_run=args.dry_run, aggregate=args.aggregate, agg_interval=args.agg_interval, sink=args.sink, source=args.source))
+    if args.arrow and not args.stream:
+        log.warning("--arrow only applies to --stream runs; ignoring it")
+    config = RunConfig(
+        start_date=start, end_date=end, is_dry_run=args.dry_run, aggregate=args.aggregate, agg_interval=args.agg_interval,
+        sink=args.sink, source=args.source, max_concurrent_days=args.max_concurrent_days, tsi_window_days=args.tsi_window_days,
+        stream=args.stream, arrow=args.arrow, resolutions=args.resolutions, incremental=args.incremental,
+        watermark_lookback=args.watermark_lookback, watermark_store=args.watermark_store
+    )
+    asyncio.run(run_collection_process(start, end, config=config))
 
 
 if __name__ == '__main__':  # pragma: no cover
@@ -0,0 +1,194 @@
+"""Registry of active sensor deployments shared by the DB sink, BigQuery staging and metadata sync.
+
+The long-format sinks need the active deployment of every sensor (deployments JOIN
+sensors_master). ``DeploymentRegistry`` reads that map once and serves it from memory for
+``ttl`` seconds, indexed by (native_sensor_id, sensor_type) for O(1) lookups. Every successful
+read is also written to a local JSON snapshot (default DATA_ROOT/state/deployments.json,
+override with DEPLOYMENT_SNAPSHOT); when Cloud SQL cannot be reached, or DB access is turned off
+with DISABLE_DB_SINK=1, the snapshot is served instead so BigQuery staging keeps working.
+
+DEPLOYMENT_CACHE_TTL (default 15min) sets how long a map is reused before it is re-read.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.config.paths import DATA_ROOT
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = DATA_ROOT / 'state' / 'deployments.json'
+DEFAULT_TTL = '15min'
+MAP_COLUMNS = ['deployment_pk', 'native_sensor_id', 'sensor_type', 'friendly_name', 'location', 'start_date']
+
+DEPLOYMENT_MAP_SQL = """
+    SELECT d.deployment_pk, sm.native_sensor_id, sm.sensor_type, sm.friendly_name, d.location, d.start_date
+    FROM deployments d
+    JOIN sensors_master sm ON d.sensor_fk = sm.sensor_pk
+    WHERE d.end_date IS NULL
+"""
+
+
+class DeploymentMapUnavailable(RuntimeError):
+    """Neither the database nor a local snapshot could provide the deployment map."""
+
+
+@dataclass(slots=True)
+class Deployment:
+    deployment_pk: int
+    native_sensor_id: str
+    sensor_type: str
+    friendly_name: Optional[str] = None
+    location: Optional[str] = None
+    start_date: Optional[date] = None
+
+
+def fetch_deployment_map(db: Any) -> pd.DataFrame:
+    """Active deployments read from the database (columns per MAP_COLUMNS)."""
+    with db.engine.connect() as conn:
+        return pd.read_sql(text(DEPLOYMENT_MAP_SQL), conn)
+
+
+def _optional(value: Any) -> Any:
+    return None if value is None or (not isinstance(value, str) and pd.isna(value)) else value
+
+
+def _as_date(value: Any) -> Optional[date]:
+    value = _optional(value)
+    if value is None:
+        return None
+    if isinstance(value, date) and not isinstance(value, pd.Timestamp):
+        return value
+    parsed = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(parsed) else parsed.date()
+
+
+class DeploymentRegistry:
+    """TTL-cached deployment map with a (native_sensor_id, sensor_type) index and snapshot fallback.
+
+    ``db_factory`` creates the database handle on first use (None: snapshot only). Methods that
+    read the map accept an already open ``db`` to avoid creating another engine.
+    """
+
+    def __init__(self, db_factory: Optional[Callable[[], Any]] = None, ttl: float = 900.0,
+                 snapshot_path: Optional[os.PathLike | str] = None, clock: Callable[[], float] = time.monotonic):
+        self.db_factory = db_factory
+        self.ttl = ttl
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.clock = clock
+        self.source: Optional[str] = None  # 'db' or 'snapshot' once loaded
+        self.loads = 0
+        self._db: Any = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._index: Dict[Tuple[str, str], Deployment] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, db_factory: Optional[Callable[[], Any]] = None) -> "DeploymentRegistry":
+        """Registry configured by DEPLOYMENT_CACHE_TTL / DEPLOYMENT_SNAPSHOT; DISABLE_DB_SINK=1 serves the snapshot only."""
+        try:
+            ttl = pd.Timedelta(os.getenv('DEPLOYMENT_CACHE_TTL', DEFAULT_TTL)).total_seconds()
+        except ValueError:
+            log.warning(f"Ignoring invalid DEPLOYMENT_CACHE_TTL={os.getenv('DEPLOYMENT_CACHE_TTL')!r}")
+            ttl = pd.Timedelta(DEFAULT_TTL).total_seconds()
+        if os.getenv('DISABLE_DB_SINK') == '1':
+            db_factory = None
+        return cls(db_factory, ttl, os.getenv('DEPLOYMENT_SNAPSHOT') or DEFAULT_SNAPSHOT_PATH)
+
+    def frame(self, db: Any = None) -> pd.DataFrame:
+        """The active deployment map, re-read when older than the TTL.
+
+        Raises DeploymentMapUnavailable when the database fails (or is disabled) and there is
+        no snapshot to fall back to.
+        """
+        with self._lock:
+            if self._frame is None or self.clock() - self._loaded_at >= self.ttl:
+                self._load(db)
+            assert self._frame is not None
+            return self._frame
+
+    def lookup(self, native_sensor_id: str, sensor_type: str, db: Any = None) -> Optional[Deployment]:
+        self.frame(db)
+        return self._index.get((str(native_sensor_id), sensor_type))
+
+    def index(self, db: Any = None) -> Dict[Tuple[str, str], Deployment]:
+        self.frame(db)
+        return self._index
+
+    def invalidate(self) -> None:
+        """Force the next read to go to the database (e.g. after deployments were created)."""
+        with self._lock:
+            self._frame = None
+
+    def _load(self, db: Any) -> None:
+        error: Optional[BaseException] = None
+        if db is not None or self.db_factory is not None:
+            try:
+                if db is None:
+                    if self._db is None:
+                        self._db = self.db_factory()  # type: ignore[misc]
+                    db = self._db
+                self._set(fetch_deployment_map(db), 'db')
+                self._save_snapshot()
+                return
+            except Exception as e:
+                error = e
+                log.warning(f"Deployment map query failed ({e}); trying local snapshot")
+        frame = self._read_snapshot()
+        if frame is None:
+            reason = f"database error: {error}" if error else "database access disabled"
+            raise DeploymentMapUnavailable(f"No deployment map available ({reason}; no snapshot at {self.snapshot_path})")
+        self._set(frame, 'snapshot')
+
+    def _set(self, frame: pd.DataFrame, source: str) -> None:
+        frame = frame.reindex(columns=MAP_COLUMNS)
+        index: Dict[Tuple[str, str], Deployment] = {}
+        for pk, sensor_id, sensor_type, friendly, location, start in frame.itertuples(index=False, name=None):
+            index[(str(sensor_id), sensor_type)] = Deployment(
+                int(pk), str(sensor_id), sensor_type, _optional(friendly), _optional(location), _as_date(start)
+            )
+        self._frame, self._index, self.source = frame, index, source
+        self._loaded_at = self.clock()
+        self.loads += 1
+        log.info(f"Deployment map: {len(index)} active deployments from {source}")
+
+    def _save_snapshot(self) -> None:
+        if self.snapshot_path is None or self._frame is None:
+            return
+        records = [
+            {'deployment_pk': d.deployment_pk, 'native_sensor_id': d.native_sensor_id, 'sensor_type': d.sensor_type,
+             'friendly_name': d.friendly_name, 'location': d.location,
+             'start_date': d.start_date.isoformat() if d.start_date else None}
+            for d in self._index.values()
+        ]
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_path.with_suffix(self.snapshot_path.suffix + '.tmp')
+            tmp.write_text(json.dumps({'saved_at': pd.Timestamp.now(tz='UTC').isoformat(), 'deployments': records}, indent=1))
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            log.warning(f"Could not write deployment snapshot {self.snapshot_path}: {e}")
+
+    def _read_snapshot(self) -> Optional[pd.DataFrame]:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return None
+        try:
+            doc = json.loads(self.snapshot_path.read_text())
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(f"Ignoring unreadable deployment snapshot {self.snapshot_path}: {e}")
+            return None
+        log.warning(f"Using deployment snapshot {self.snapshot_path} saved at {doc.get('saved_at')}")
+        return pd.DataFrame(doc.get('deployments', []), columns=MAP_COLUMNS)
@@ -0,0 +1,191 @@
+"""Wide-to-long conversion of cleaned readings, shared by the DB sink and BigQuery staging.
+
+Both sinks store readings as (timestamp, deployment_fk, metric_name, value). Building that
+with ``merge`` + per-column ``pd.to_numeric`` + ``pd.melt`` copies the whole wide frame
+several times. ``melt_readings`` instead resolves each row's deployment once, stacks the
+metric columns into a single float64 NumPy block and flattens it column-major (the row order
+``pd.melt`` produces), with ``metric_name`` as a categorical over the metric columns.
+Duplicate readings are resolved once on the (timestamp, deployment) key of the wide rows,
+before the frame grows by the number of metrics. In aggregated runs only the bucket means are
+readings: the _min/_max/_count/_last statistics next to them are not melted.
+
+``LongReadings`` holds a day's cleaned WU/TSI frames and builds their long form at most once,
+so every sink writing that day reuses the same result.
+
+Long frames are kept compact, since a day holds millions of rows: ``metric_name`` is a
+categorical (one byte code per row), ``deployment_fk`` is int32 (deployments.deployment_pk is
+a SERIAL) and ``value`` is float64, or float32 with LONG_VALUE_DTYPE=float32 (about 7
+significant digits, ample for sensor readings). The sinks widen them only at the boundary.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.data_collection.aggregation import STAT_SUFFIXES
+
+log = logging.getLogger(__name__)
+
+LONG_COLUMNS = ['timestamp', 'deployment_fk', 'metric_name', 'value']
+SOURCES = ('WU', 'TSI')
+# Identifier columns of a cleaned frame that are never metrics
+_ID_COLUMNS = frozenset({'timestamp', 'ts', 'native_sensor_id', 'sensor_type', 'deployment_pk', 'deployment_fk'})
+DEPLOYMENT_DTYPE = 'int32'
+VALUE_DTYPES = ('float64', 'float32')
+
+
+def value_dtype_from_env() -> str:
+    """dtype of the long ``value`` column: LONG_VALUE_DTYPE (float64 or float32, default float64)."""
+    requested = os.getenv('LONG_VALUE_DTYPE', 'float64').strip().lower()
+    if requested not in VALUE_DTYPES:
+        log.warning(f"Ignoring invalid LONG_VALUE_DTYPE={requested!r}; using float64")
+        return 'float64'
+    return requested
+
+
+def empty_long_frame(value_dtype: str = 'float64') -> pd.DataFrame:
+    return pd.DataFrame({
+        'timestamp': pd.Series(dtype='datetime64[ns, UTC]'),
+        'deployment_fk': pd.Series(dtype=DEPLOYMENT_DTYPE),
+        'metric_name': pd.Categorical([]),
+        'value': pd.Series(dtype=value_dtype),
+    })
+
+
+def _is_statistic(col: str, columns: pd.Index) -> bool:
+    """True for an aggregate statistic column (``<metric>_min`` etc. next to the ``<metric>`` mean).
+
+    Raw frames have metrics with these suffixes too (WU pressure_max/pressure_min), but never
+    alongside an unsuffixed column of the same name.
+    """
+    return any(col.endswith(suffix) and col[:-len(suffix)] in columns for suffix in STAT_SUFFIXES)
+
+
+def metric_block(df: pd.DataFrame) -> Tuple[List[str], np.ndarray]:
+    """(metric names, float64 array of shape rows x metrics) for the numeric columns of ``df``.
+
+    Numeric and boolean columns are taken as they are; object columns are kept when at least one
+    value parses as a number. Datetime columns, all-null columns and the statistics of an
+    aggregated frame are not metrics.
+    """
+    names: List[str] = []
+    arrays: List[np.ndarray] = []
+    for col in df.columns:
+        if col in _ID_COLUMNS or not isinstance(col, str) or _is_statistic(col, df.columns):
+            continue
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+            continue
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        if np.isnan(values).all():
+            continue
+        names.append(col)
+        arrays.append(values)
+    if not arrays:
+        return names, np.empty((len(df), 0))
+    return names, np.column_stack(arrays)
+
+
+def melt_readings(df: pd.DataFrame, deployment_map: pd.DataFrame, sensor_type: str,
+                  value_dtype: str = 'float64') -> pd.DataFrame:
+    """Long-format readings of one source's cleaned frame, deduplicated on the reading key.
+
+    Rows are matched to active deployments of ``sensor_type`` by native_sensor_id (unmatched
+    rows are dropped); null values are dropped; for duplicate (timestamp, deployment_fk,
+    metric_name) keys the last occurrence wins. Values are stored as ``value_dtype``.
+    """
+    if df.empty or 'native_sensor_id' not in df.columns or 'timestamp' not in df.columns:
+        return empty_long_frame(value_dtype)
+    if df.columns.duplicated().any():
+        df = df.loc[:, ~df.columns.duplicated()]
+    type_map = deployment_map.loc[deployment_map['sensor_type'] == sensor_type, ['native_sensor_id', 'deployment_pk']]
+    if type_map.empty:
+        log.warning(f"No active deployments for type {sensor_type}")
+        return empty_long_frame(value_dtype)
+    # Row positions joined to deployments (a sensor with several active deployments yields one row per deployment)
+    rows = pd.DataFrame({'native_sensor_id': df['native_sensor_id'].to_numpy(), '_pos': np.arange(len(df))})
+    matched = rows.merge(type_map, on='native_sensor_id', how='inner', sort=False)
+    if matched.empty:
+        log.warning(f"No {sensor_type} rows matched deployments.")
+        return empty_long_frame(value_dtype)
+    names, block = metric_block(df)
+    if not names:
+        return empty_long_frame(value_dtype)
+
+    positions = matched['_pos'].to_numpy()
+    values = block[positions]  # (matched rows, metrics)
+    timestamps = pd.to_datetime(df['timestamp'], utc=True).dt.tz_convert(None).to_numpy()[positions]
+    deployments = matched['deployment_pk'].to_numpy(dtype=DEPLOYMENT_DTYPE)
+    keys = pd.DataFrame({'timestamp': timestamps, 'deployment_fk': deployments})
+    if keys.duplicated().any():
+        # Dedup on the wide rows (not the metrics x longer long frame): per key and metric the last
+        # non-null value wins, exactly as dropna + drop_duplicates(keep='last') on the long rows.
+        collapsed = pd.DataFrame(values).groupby([keys['timestamp'], keys['deployment_fk']], sort=False).last()
+        timestamps = collapsed.index.get_level_values(0).to_numpy()
+        deployments = collapsed.index.get_level_values(1).to_numpy(dtype=DEPLOYMENT_DTYPE)
+        values = collapsed.to_numpy(dtype='float64')
+
+    n_rows, n_metrics = values.shape
+    flat = values.ravel(order='F')  # column-major: every row of metric 0, then metric 1, ...
+    keep = ~np.isnan(flat)
+    return pd.DataFrame({
+        'timestamp': pd.DatetimeIndex(np.tile(timestamps, n_metrics)[keep]).tz_localize('UTC'),
+        'deployment_fk': np.tile(deployments, n_metrics)[keep],
+        'metric_name': pd.Categorical.from_codes(np.repeat(np.arange(n_metrics, dtype='int32'), n_rows)[keep], names),
+        'value': flat[keep].astype(value_dtype, copy=False),
+    })
+
+
+class LongReadings:
+    """A day's cleaned WU/TSI frames and their long form, built at most once for all sinks."""
+
+    def __init__(self, wu_df: pd.DataFrame, tsi_df: pd.DataFrame, value_dtype: Optional[str] = None):
+        self.wide = {'WU': wu_df, 'TSI': tsi_df}
+        self.value_dtype = value_dtype or value_dtype_from_env()
+        self._frames: Optional[Dict[str, pd.DataFrame]] = None
+        self._combined: Optional[pd.DataFrame] = None
+
+    @property
+    def empty(self) -> bool:
+        return all(df.empty for df in self.wide.values())
+
+    @property
+    def built(self) -> bool:
+        return self._frames is not None
+
+    def build(self, deployment_map: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Melt every source against ``deployment_map``; later calls return the first result."""
+        if self._frames is None:
+            self._frames = {src: melt_readings(self.wide[src], deployment_map, src, self.value_dtype) for src in SOURCES}
+        return self._frames
+
+    @property
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Per-source long frames (requires ``build``)."""
+        if self._frames is None:
+            raise RuntimeError("LongReadings.build() has not been called")
+        return self._frames
+
+    def combined(self) -> pd.DataFrame:
+        """All sources' long readings in one frame (requires ``build``)."""
+        if self._combined is None:
+            parts = [df for df in self.frames.values() if not df.empty]
+            if not parts:
+                self._combined = empty_long_frame(self.value_dtype)
+            elif len(parts) == 1:
+                self._combined = parts[0]
+            else:
+                # Same categories on every part, or concat falls back to (much slower) strings
+                categories = union_categoricals([df['metric_name'] for df in parts]).categories
+                parts = [df.assign(metric_name=df['metric_name'].cat.set_categories(categories)) for df in parts]
+                self._combined = pd.concat(parts, ignore_index=True)
+        return self._combined
@@ -0,0 +1,159 @@
+"""Canonical Parquet schemas of the WU/TSI uploads, compiled from config/metrics_manifest.json.
+
+A column's Parquet type used to depend on the data of the day: a measurement no device
+reported was written as a null-typed column (read by BigQuery as INT32), integer-looking floats
+as int64, and so on, which is why the TSI parser filled missing measurements with 0.0 and why
+scripts/normalize_tsi_parquet.py had to rewrite drifted files. ``SchemaRegistry`` compiles one
+``pyarrow.Schema`` per source and layout from the manifest, and every writer (GCSUploader and
+IncrementalParquetWriter) casts its table to it with ``conform_table``. Missing readings are
+stored as real nulls and every file of a source has the same schema.
+
+Manifest entries per source: ``metrics`` (float64 unless overridden in ``metric_types``) and
+``columns``, the typed non-metric columns of a cleaned raw frame. ``native_sensor_id``,
+``timestamp``, ``ts`` and the coordinate ``_f`` copies are added by the collector's cleaning
+step and are always part of the schema. Aggregated uploads (agg=<interval>) hold the key, the
+bucket timestamp and each rolled-up metric with its _min/_max/_count/_last statistics.
+
+METRICS_MANIFEST overrides the manifest path.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from src.config.paths import CONFIG_ROOT
+from src.data_collection.aggregation import DEFAULT_STATS, SOURCE_AGGREGATION
+from src.data_collection.arrow_batches import COORDINATE_PAIRS, TIMESTAMP_TYPE, cleaned_name, number_array, timestamp_array
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = CONFIG_ROOT / 'metrics_manifest.json'
+ARROW_TYPES: Dict[str, pa.DataType] = {
+    'string': pa.string(), 'float64': pa.float64(), 'int64': pa.int64(), 'bool': pa.bool_(), 'timestamp': TIMESTAMP_TYPE,
+}
+IDENTITY_FIELDS = (('native_sensor_id', pa.string()), ('timestamp', TIMESTAMP_TYPE))
+
+
+class SchemaRegistry:
+    """Raw and aggregated upload schemas per source (``schema``), built once from a manifest dict."""
+
+    def __init__(self, manifest: Dict[str, Any]):
+        self._schemas: Dict[Tuple[str, bool], pa.Schema] = {}
+        for source, entry in manifest.items():
+            self._schemas[(source, False)] = _raw_schema(source, entry)
+            self._schemas[(source, True)] = _aggregated_schema(source, entry)
+
+    @classmethod
+    def from_file(cls, path: Optional[os.PathLike | str] = None) -> "SchemaRegistry":
+        """Registry of the manifest at ``path`` (default: METRICS_MANIFEST or config/metrics_manifest.json)."""
+        path = Path(path or os.getenv('METRICS_MANIFEST') or DEFAULT_MANIFEST_PATH)
+        return cls(json.loads(path.read_text()))
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted({source for source, _ in self._schemas})
+
+    def schema(self, source: str, aggregated: bool = False) -> Optional[pa.Schema]:
+        """The upload schema of ``source`` (None for a source the manifest does not describe)."""
+        return self._schemas.get((source, aggregated))
+
+    def conform(self, table: Any, source: str, aggregated: bool = False, label: str = "") -> Any:
+        """``table`` (Table or RecordBatch) cast to the schema of ``source``; unknown sources pass through."""
+        schema = self.schema(source, aggregated)
+        if schema is None:
+            return table
+        conformed, dropped = conform_table(table, schema, label or source)
+        if dropped:
+            log.warning(f"[{label or source}] columns not in the {source} schema dropped: {dropped}")
+        return conformed
+
+
+@lru_cache(maxsize=1)
+def default_registry() -> SchemaRegistry:
+    """The process-wide registry of the configured manifest (read once)."""
+    return SchemaRegistry.from_file()
+
+
+def _field_type(name: str, type_name: str) -> pa.DataType:
+    try:
+        return ARROW_TYPES[type_name]
+    except KeyError:
+        raise ValueError(f"manifest column '{name}' has unknown type '{type_name}' (expected one of {sorted(ARROW_TYPES)})") from None
+
+
+def _coordinate_fields(names: List[str]) -> List[pa.Field]:
+    return [pa.field(f"{name}_f", pa.float64())
+            for pair in COORDINATE_PAIRS if all(name in names for name in pair) for name in pair]
+
+
+def _raw_schema(source: str, entry: Dict[str, Any]) -> pa.Schema:
+    types = entry.get('metric_types', {})
+    fields = [pa.field(name, type) for name, type in IDENTITY_FIELDS]
+    fields += [pa.field(name, _field_type(name, type_name)) for name, type_name in entry.get('columns', {}).items()]
+    fields += [pa.field(name, _field_type(name, types.get(name, 'float64'))) for name in entry['metrics']]
+    fields.append(pa.field('ts', TIMESTAMP_TYPE))
+    fields += _coordinate_fields([f.name for f in fields])
+    return pa.schema(fields)
+
+
+def _aggregated_schema(source: str, entry: Dict[str, Any]) -> pa.Schema:
+    # Columns aggregate_source carries through unaggregated are not in the rollups
+    skipped = {cleaned_name(name, source) for name in SOURCE_AGGREGATION[source][2]} if source in SOURCE_AGGREGATION else set()
+    metrics = [name for name in entry['metrics'] if name not in skipped]
+    fields = [pa.field(name, type) for name, type in IDENTITY_FIELDS]
+    for name in metrics:
+        for stat in DEFAULT_STATS:
+            if stat == 'mean':
+                fields.append(pa.field(name, pa.float64()))
+            else:
+                fields.append(pa.field(f"{name}_{stat}", pa.int64() if stat == 'count' else pa.float64()))
+    fields.append(pa.field('ts', TIMESTAMP_TYPE))
+    fields += _coordinate_fields(metrics)
+    return pa.schema(fields)
+
+
+def _cast(column: Any, type: pa.DataType) -> Tuple[Any, int]:
+    """(column as ``type``, values coerced to null); numbers and timestamps are parsed per value if a cast fails."""
+    if column.type == type:
+        return column, 0
+    try:
+        return column.cast(type), 0
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        pass
+    if pa.types.is_integer(type) or pa.types.is_floating(type):
+        return number_array(column.to_pylist(), type)
+    if type == TIMESTAMP_TYPE and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        return timestamp_array(column.to_pylist())
+    raise ValueError(f"{column.type} values cannot be written as {type}")
+
+
+def conform_table(table: Any, schema: pa.Schema, label: str = "") -> Tuple[pa.Table, List[str]]:
+    """(``table`` cast to ``schema``, names of dropped columns not in ``schema``).
+
+    Missing columns become typed all-null columns and present ones are cast; numeric values that
+    do not parse become nulls (logged). Raises ValueError for a column that cannot be cast at all.
+    """
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    names = table.column_names
+    dropped = [name for name in names if schema.get_field_index(name) < 0]
+    columns = []
+    for field in schema:
+        if field.name not in names:
+            columns.append(pa.nulls(table.num_rows, type=field.type))
+            continue
+        try:
+            column, bad = _cast(table.column(names.index(field.name)), field.type)  # first of duplicate names
+        except ValueError as e:
+            raise ValueError(f"column '{field.name}': {e}") from e
+        if bad:
+            log.warning(f"[{label or 'parquet'}] {bad} unparseable '{field.name}' values stored as null")
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema), dropped
@@ -0,0 +1,163 @@
+"""Per-sensor high-watermarks for incremental collection.
+
+A watermark is the newest timestamp successfully persisted for a sensor (WU stationID /
+TSI device_id). Incremental runs hand them to the clients, which then only request data
+newer than ``watermark - lookback``; the lookback re-reads a short overlap so points that
+reach the API late are still picked up. The re-read rows are merged into the day's GCS object
+on (native_sensor_id, ts) and resolved by the staging MERGE, so they are never stored twice.
+
+State is one small JSON document ``{source: {sensor_id: iso_timestamp}}`` kept in a local
+file or a GCS object. Watermarks only ever move forward.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from src.config.paths import DATA_ROOT
+from src.data_collection.aggregation import SOURCE_AGGREGATION
+
+log = logging.getLogger(__name__)
+
+Watermarks = Dict[str, pd.Timestamp]
+
+DEFAULT_LOOKBACK = '1h'
+DEFAULT_LOCAL_PATH = DATA_ROOT / 'state' / 'watermarks.json'
+
+
+def compute_watermarks(df: Union[pd.DataFrame, pa.RecordBatch], source: str) -> Watermarks:
+    """Newest timestamp per sensor in a raw client frame or Arrow batch (column names per SOURCE_AGGREGATION)."""
+    key, ts_column, _ = SOURCE_AGGREGATION[source]
+    if isinstance(df, pa.RecordBatch):
+        if not df.num_rows or key not in df.schema.names or ts_column not in df.schema.names:
+            return {}
+        newest = pa.Table.from_batches([df]).group_by(key).aggregate([(ts_column, 'max')])
+        return {str(sensor): pd.Timestamp(stamp) for sensor, stamp
+                in zip(newest[key].to_pylist(), newest[f'{ts_column}_max'].to_pylist()) if stamp is not None}
+    if df.empty or key not in df.columns or ts_column not in df.columns:
+        return {}
+    ts = pd.to_datetime(df[ts_column], utc=True, errors='coerce')
+    newest = ts.groupby(df[key].astype(str)).max().dropna()
+    return {sensor: stamp for sensor, stamp in newest.items()}
+
+
+def merge_watermarks(current: Mapping[str, pd.Timestamp], updates: Mapping[str, pd.Timestamp]) -> Watermarks:
+    merged = dict(current)
+    for sensor, stamp in updates.items():
+        if sensor not in merged or stamp > merged[sensor]:
+            merged[sensor] = stamp
+    return merged
+
+
+class WatermarkStore(ABC):
+    """JSON-document watermark store; subclasses provide ``_read``/``_write`` of the raw text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """Where the state is kept, for log messages."""
+
+    @abstractmethod
+    def _read(self) -> Optional[str]:
+        """The stored document, or None when there is none yet."""
+
+    @abstractmethod
+    def _write(self, text: str) -> None:
+        """Replace the stored document with ``text``."""
+
+    def _load_all(self) -> Dict[str, Watermarks]:
+        text = self._read()
+        if not text:
+            return {}
+        try:
+            raw = json.loads(text)
+        except json.JSONDecodeError as e:
+            log.error(f"Ignoring unreadable watermark state at {self.location}: {e}")
+            return {}
+        return {source: {sensor: pd.Timestamp(value) for sensor, value in marks.items()}
+                for source, marks in raw.items()}
+
+    def load(self, source: str) -> Watermarks:
+        with self._lock:
+            return self._load_all().get(source, {})
+
+    def advance(self, source: str, updates: Mapping[str, pd.Timestamp]) -> Watermarks:
+        """Move ``source`` watermarks forward to ``updates`` (older values are ignored); returns the new state."""
+        if not updates:
+            return self.load(source)
+        with self._lock:
+            state = self._load_all()
+            state[source] = merge_watermarks(state.get(source, {}), updates)
+            doc = {src: {sensor: stamp.isoformat() for sensor, stamp in sorted(marks.items())}
+                   for src, marks in state.items()}
+            self._write(json.dumps(doc, indent=2, sort_keys=True))
+        log.info(f"Advanced {len(updates)} {source} watermarks in {self.location}")
+        return state[source]
+
+
+class FileWatermarkStore(WatermarkStore):
+    def __init__(self, path: os.PathLike | str = DEFAULT_LOCAL_PATH):
+        super().__init__()
+        self.path = Path(path)
+
+    @property
+    def location(self) -> str:
+        return str(self.path)
+
+    def _read(self) -> Optional[str]:
+        return self.path.read_text() if self.path.exists() else None
+
+    def _write(self, text: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp.write_text(text)
+        os.replace(tmp, self.path)  # atomic: readers never see a half-written file
+
+
+class GCSWatermarkStore(WatermarkStore):
+    def __init__(self, bucket: str, blob_path: str, client=None):
+        super().__init__()
+        from google.cloud import storage  # lazy import: only needed for GCS state
+
+        self.bucket_name = bucket
+        self.blob_path = blob_path.strip('/')
+        self.client = client or storage.Client()
+        self.bucket = self.client.bucket(bucket)
+
+    @property
+    def location(self) -> str:
+        return f"gs://{self.bucket_name}/{self.blob_path}"
+
+    def _read(self) -> Optional[str]:
+        blob = self.bucket.blob(self.blob_path)
+        return blob.download_as_text() if blob.exists() else None
+
+    def _write(self, text: str) -> None:
+        self.bucket.blob(self.blob_path).upload_from_string(text, content_type='application/json')
+
+
+def build_watermark_store(location: Optional[str] = None, bucket: Optional[str] = None, prefix: str = 'sensor_readings') -> WatermarkStore:
+    """Store at ``location`` (local path or gs://bucket/path.json; default: WATERMARK_STORE env).
+
+    Without an explicit location the state lives next to the data
+    (gs://<bucket>/<prefix>/_state/watermarks.json) when a bucket is configured, else in DATA_ROOT.
+    """
+    location = location or os.getenv('WATERMARK_STORE')
+    if not location and bucket:
+        location = f"gs://{bucket}/{prefix.strip('/')}/_state/watermarks.json"
+    if location and location.startswith('gs://'):
+        bucket_name, _, blob_path = location[len('gs://'):].partition('/')
+        return GCSWatermarkStore(bucket_name, blob_path or 'watermarks.json')
+    return FileWatermarkStore(location or DEFAULT_LOCAL_PATH)
@@ -1,20 +1,33 @@
 import io
 import logging
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional, Union
 
 import pandas as pd
 from google.cloud import storage
+
+from src.storage.parquet_stream import IncrementalParquetWriter
+from src.utils.timestamps import normalize_timestamps
 try:
     import pyarrow as pa
+    import pyarrow.compute as pc
     import pyarrow.parquet as pq
+
+    from src.data_collection.schema_registry import SchemaRegistry, default_registry
 except Exception:  # pragma: no cover - import-time guard
     pa = None
+    pc = None
     pq = None
+    SchemaRegistry = Any  # type: ignore[misc,assignment]
+    default_registry = None
 
 log = logging.getLogger(__name__)
 
 
+# Rows of a rolling daily object are unique on (MERGE_KEY, ts_column)
+MERGE_KEY = "native_sensor_id"
+
+
 @dataclass(slots=True)
 class UploadSpec:
     source: str
@@ -22,6 +35,8 @@ class UploadSpec:
     interval: str = "h"
     ts_column: str = "timestamp"
     extra_suffix: Optional[str] = None
+    # Merge into an existing object (rows deduplicated, new ones win) instead of skipping it
+    merge: bool = False
 
 
 class GCSUploader:
@@ -31,21 +46,29 @@ class GCSUploader:
     (reduces CodeScene argument-count flags and clarifies intent).
     Paths are partitioned by date for efficient BigQuery batch loads.
     Legacy method signature is still supported for backward compatibility.
+    Tables are cast to the source's schema_registry schema (``schemas``, default: the metrics
+    manifest) before they are written, so every file of a source has the same Parquet schema.
+    With ``UploadSpec.merge`` an existing object is a rolling daily partition: it is read, merged
+    with the new rows, deduplicated on (native_sensor_id, ts_column) and rewritten.
     """
 
-    def __init__(self, bucket: str, prefix: str = "sensor_readings", client: Optional[storage.Client] = None):
+    def __init__(self, bucket: str, prefix: str = "sensor_readings", client: Optional[storage.Client] = None,
+                 schemas: Optional[SchemaRegistry] = None):
         if not bucket:
             raise ValueError("GCS bucket must be provided")
         self.bucket_name = bucket
         self.prefix = prefix.strip("/")
         self.client = client or storage.Client()
         self.bucket = self.client.bucket(self.bucket_name)
+        self.schemas = schemas if schemas is not None or default_registry is None else default_registry()
 
     def _build_blob_path(self, df: pd.DataFrame, spec: UploadSpec) -> str:
         if df.empty:
             raise ValueError("Cannot build path for empty DataFrame")
-        ts = pd.to_datetime(df[spec.ts_column]).sort_values().iloc[0]
-        date_str = ts.strftime("%Y-%m-%d")
+        ts = normalize_timestamps(df[spec.ts_column]).min()
+        return self._blob_path_for_date(spec, ts.strftime("%Y-%m-%d"))
+
+    def _blob_path_for_date(self, spec: UploadSpec, date_str: str) -> str:
         agg_part = f"agg={spec.interval}" if spec.aggregated else "agg=raw"
         suffix = f"-{spec.extra_suffix}" if spec.extra_suffix else ""
         filename = f"{spec.source}-{date_str}{suffix}.parquet"
@@ -81,12 +104,13 @@ class GCSUploader:
             return self._build_blob_path(df, spec)
         raise TypeError("Unsupported _make_blob_path invocation pattern")
 
-    def upload_parquet(self, df: pd.DataFrame, source: Optional[str] = None, **legacy_kwargs) -> str:
+    def upload_parquet(self, df: Union[pd.DataFrame, Any], source: Optional[str] = None, **legacy_kwargs) -> str:
         """Write DataFrame as Parquet to GCS. Returns the GCS path.
 
         Preferred use: pass an UploadSpec via spec=...
         Backward-compatible legacy usage: positional/keyword args (source, aggregated, interval, ts_column, extra_suffix)
     Idempotency: by default, skips uploading if the exact blob path already exists. Override with force=True.
+        A pyarrow Table or RecordBatch is written directly, without converting through pandas.
         """
         # Backward compatibility path detection
         spec: UploadSpec
@@ -99,31 +123,71 @@ class GCSUploader:
                 aggregated=legacy_kwargs.get('aggregated', False),
                 interval=legacy_kwargs.get('interval', 'h'),
                 ts_column=legacy_kwargs.get('ts_column', 'timestamp'),
-                extra_suffix=legacy_kwargs.get('extra_suffix')
+                extra_suffix=legacy_kwargs.get('extra_suffix'),
+                merge=legacy_kwargs.get('merge', False),
             )
+        force = legacy_kwargs.get('force', False)
+        if pa is not None and isinstance(df, (pa.Table, pa.RecordBatch)):
+            return self._upload_arrow(df, spec, force)
         if df.empty:
             log.info("Skipping upload: DataFrame is empty.")
             return ""
         # Ensure timestamp column exists and is datetime
         if spec.ts_column not in df.columns:
             raise ValueError(f"DataFrame missing required timestamp column '{spec.ts_column}'")
-        df = df.copy()
         # Cope with duplicate column names which cause pyarrow.Table.from_pandas to fail.
         # Keep the first occurrence for each duplicate column name and warn.
         if df.columns.duplicated().any():
             dup_names = df.columns[df.columns.duplicated()].unique().tolist()
             log.warning(f"Duplicate column names found: {dup_names}. Keeping first occurrence of each and dropping duplicates.")
             df = df.loc[:, ~df.columns.duplicated()]
-        df[spec.ts_column] = pd.to_datetime(df[spec.ts_column], utc=True, errors='coerce')
+        # Shallow copy: only the timestamp column is replaced, the caller's frame is left as is
+        df = df.copy(deep=False)
+        df[spec.ts_column] = normalize_timestamps(df[spec.ts_column])
         df = df.dropna(subset=[spec.ts_column])
         if df.empty:
             log.info("Skipping upload: DataFrame empty after timestamp coercion.")
             return ""
 
-        blob_path = self._build_blob_path(df, spec)
-        blob = self.bucket.blob(blob_path)
+        # Write to in-memory buffer as parquet
+        if pa is None or pq is None:
+            raise RuntimeError("pyarrow is required for Parquet uploads. Please install pyarrow.")
+        return self._write_blob(self._build_blob_path(df, spec),
+                                lambda: self._conform(pa.Table.from_pandas(df, preserve_index=False), spec), force, spec)
 
-        force = legacy_kwargs.get('force', False)
+    def _conform(self, table: Any, spec: UploadSpec) -> Any:
+        if self.schemas is None:
+            return table
+        return self.schemas.conform(table, spec.source, spec.aggregated, label=spec.source)
+
+    def _upload_arrow(self, table: Any, spec: UploadSpec, force: bool) -> str:
+        if isinstance(table, pa.RecordBatch):
+            table = pa.Table.from_batches([table])
+        if spec.ts_column not in table.column_names:
+            raise ValueError(f"Table missing required timestamp column '{spec.ts_column}'")
+        ts = table.column(spec.ts_column)
+        if not pa.types.is_timestamp(ts.type):
+            raise ValueError(f"Timestamp column '{spec.ts_column}' is {ts.type}, expected an Arrow timestamp")
+        if ts.null_count:
+            table = table.filter(pc.is_valid(ts))
+            ts = table.column(spec.ts_column)
+        if table.num_rows == 0:
+            log.info("Skipping upload: table empty after timestamp filtering.")
+            return ""
+        table = self._conform(table, spec)
+        ts = table.column(spec.ts_column)
+        first = pd.Timestamp(pc.min(ts).value, unit=ts.type.unit, tz='UTC')  # Arrow stores UTC epochs
+        return self._write_blob(self._blob_path_for_date(spec, first.strftime("%Y-%m-%d")), lambda: table, force, spec)
+
+    def _merged_with_blob(self, blob: Any, table: Any, spec: UploadSpec) -> Any:
+        """``table`` appended to the rows already in ``blob``, deduplicated on the reading key (last wins)."""
+        existing = self._conform(pq.read_table(io.BytesIO(blob.download_as_bytes())), spec)
+        merged = dedup_last(pa.concat_tables([existing, table], promote_options="permissive"), [MERGE_KEY, spec.ts_column])
+        log.info(f"Merged {table.num_rows} rows into {existing.num_rows} existing rows -> {merged.num_rows} rows")
+        return merged
+
+    def _write_blob(self, blob_path: str, make_table: Any, force: bool, spec: Optional[UploadSpec] = None) -> str:
+        blob = self.bucket.blob(blob_path)
         blob_exists = False
         try:
             # Some test dummies may not implement exists(); treat as non-existent.
@@ -132,17 +196,13 @@ class GCSUploader:
                 blob_exists = bool(exists_method())
         except Exception:  # pragma: no cover - defensive
             blob_exists = False
-        if not force and blob_exists:  # Skip if already present
+        merge = blob_exists and not force and spec is not None and spec.merge
+        if not force and blob_exists and not merge:  # Skip if already present
             log.info(f"Skip upload (exists): gs://{self.bucket_name}/{blob_path}")
             return f"gs://{self.bucket_name}/{blob_path}"
 
-        log.info(f"Uploading Parquet to gs://{self.bucket_name}/{blob_path}... (force={force})")
-
-        # Write to in-memory buffer as parquet
-        if pa is None or pq is None:
-            raise RuntimeError("pyarrow is required for Parquet uploads. Please install pyarrow.")
-
-        table = pa.Table.from_pandas(df)
+        log.info(f"Uploading Parquet to gs://{self.bucket_name}/{blob_path}... (force={force}, merge={merge})")
+        table = self._merged_with_blob(blob, make_table(), spec) if merge else make_table()
         buf = io.BytesIO()
         pq.write_table(table, buf, compression="snappy")
         buf.seek(0)
@@ -150,3 +210,56 @@ class GCSUploader:
         blob.upload_from_file(buf, content_type="application/octet-stream")
         log.info("Upload complete.")
         return f"gs://{self.bucket_name}/{blob_path}"
+
+    def open_parquet_stream(self, spec: UploadSpec, date_str: str, force: bool = False) -> Optional[IncrementalParquetWriter]:
+        """Open an incremental Parquet writer on the ``dt=date_str`` partition blob.
+
+        Batches written to it are streamed to GCS as a resumable upload; the object only
+        appears once the writer is closed. Returns None (idempotent skip) when the blob
+        already exists and ``force`` is False. With ``spec.merge`` an existing blob is not
+        skipped: the batches are buffered in memory (incremental runs write small deltas) and
+        merged into it when the writer is closed.
+        """
+        blob_path = self._blob_path_for_date(spec, date_str)
+        blob = self.bucket.blob(blob_path)
+        exists_method = getattr(blob, 'exists', None)
+        exists = callable(exists_method) and exists_method()
+        schema = self.schemas.schema(spec.source, spec.aggregated) if self.schemas is not None else None
+        label = f"gs://{self.bucket_name}/{blob_path}"
+        if exists and spec.merge and not force:
+            log.info(f"Streaming Parquet into a merge with existing {label}...")
+
+            def merge(data: bytes) -> None:
+                if data:
+                    self._write_blob(blob_path, lambda: pq.read_table(io.BytesIO(data)), False, spec)
+
+            return IncrementalParquetWriter(_MergeOnClose(merge), schema=schema, label=label)
+        if not force and exists:
+            log.info(f"Skip stream upload (exists): {label}")
+            return None
+        log.info(f"Streaming Parquet to {label}... (force={force})")
+        sink = blob.open("wb", content_type="application/octet-stream")
+        return IncrementalParquetWriter(sink, schema=schema, label=label)
+
+
+class _MergeOnClose(io.BytesIO):
+    """In-memory stream sink that hands its Parquet bytes to ``on_close`` when the writer finalizes it."""
+
+    def __init__(self, on_close: Any):
+        super().__init__()
+        self._on_close = on_close
+
+    def close(self) -> None:
+        if not self.closed:
+            data = self.getvalue()
+            super().close()
+            self._on_close(data)
+
+
+def dedup_last(table: Any, keys: list[str]) -> Any:
+    """Rows of ``table`` unique on ``keys``, keeping the last occurrence, in their original order."""
+    if table.num_rows == 0 or any(key not in table.column_names for key in keys):
+        return table
+    indexed = table.append_column("__row", pa.array(range(table.num_rows), type=pa.int64()))
+    last = indexed.group_by(keys, use_threads=False).aggregate([("__row", "max")]).column("__row_max")
+    return table.take(pc.take(last, pc.sort_indices(last)))
@@ -0,0 +1,114 @@
+import logging
+import os
+from typing import Any, BinaryIO, Optional, Union
+
+import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from src.data_collection.schema_registry import conform_table
+except Exception:  # pragma: no cover - import-time guard
+    pa = None
+    pq = None
+
+log = logging.getLogger(__name__)
+
+
+class IncrementalParquetWriter:
+    """Append DataFrame (or pyarrow RecordBatch/Table) batches to one Parquet file as successive row groups.
+
+    Only the current batch is held in memory, so a day of data can be written as it arrives
+    instead of concatenating every device's frame first. The schema is ``schema`` (e.g. a
+    schema_registry upload schema) or else fixed by the first batch; every batch is conformed to
+    it with schema_registry.conform_table (missing columns become nulls, unknown columns are
+    dropped with a warning, types are cast). Without ``schema``, all-null columns in the first
+    batch are widened to string so a later batch carrying values can still be written.
+
+    ``sink`` is a local path or a writable binary file object (e.g. ``Blob.open('wb')``).
+    A file object is closed by ``close()``, which for a GCS blob writer finalizes the upload;
+    ``abort()`` leaves it unfinalized so no partial object is published.
+    """
+
+    def __init__(self, sink: Union[str, BinaryIO], schema: Optional[Any] = None, compression: str = "snappy", label: str = ""):
+        if pa is None or pq is None:
+            raise RuntimeError("pyarrow is required for Parquet uploads. Please install pyarrow.")
+        self.sink = sink
+        self.compression = compression
+        self.label = label or (sink if isinstance(sink, str) else "stream")
+        self.schema = schema
+        self.rows_written = 0
+        self.batches_written = 0
+        self._writer: Optional[Any] = None
+        self._closed = False
+        self._dropped_columns: set[str] = set()
+
+    def _conform(self, table: Any) -> Any:
+        if self.schema is None:
+            fields = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+            self.schema = pa.schema(fields, metadata=table.schema.metadata)
+        table, dropped = conform_table(table, self.schema, self.label)
+        for name in dropped:
+            if name not in self._dropped_columns:
+                self._dropped_columns.add(name)
+                log.warning(f"[{self.label}] column '{name}' not in the stream schema; dropping it")
+        return table
+
+    def write(self, df: Union[pd.DataFrame, Any]) -> int:
+        """Append ``df`` as a new row group; returns the number of rows written.
+
+        Arrow record batches and tables are written as they are, without a pandas conversion.
+        """
+        if self._closed:
+            raise ValueError(f"[{self.label}] writer already closed")
+        if not len(df):
+            return 0
+        if isinstance(df, pa.RecordBatch):
+            table = pa.Table.from_batches([df])
+        elif isinstance(df, pa.Table):
+            table = df
+        else:
+            if df.columns.duplicated().any():
+                df = df.loc[:, ~df.columns.duplicated()]
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        table = self._conform(table)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.sink, self.schema, compression=self.compression)
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+        self.batches_written += 1
+        return table.num_rows
+
+    def close(self) -> int:
+        """Write the Parquet footer and finalize the sink; returns total rows written."""
+        if self._closed:
+            return self.rows_written
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+        if not isinstance(self.sink, str):
+            self.sink.close()
+        log.info(f"[{self.label}] wrote {self.rows_written} rows in {self.batches_written} row groups")
+        return self.rows_written
+
+    def abort(self) -> None:
+        """Discard the output: remove a partial local file, never finalize a file object."""
+        if self._closed:
+            return
+        self._closed = True
+        if isinstance(self.sink, str):
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self.sink):
+                os.remove(self.sink)
+        log.warning(f"[{self.label}] stream aborted after {self.rows_written} rows; output discarded")
+
+    def __enter__(self) -> "IncrementalParquetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
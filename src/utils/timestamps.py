@@ -0,0 +1,117 @@
+"""Vectorized timestamp normalization shared by the collector, GCS uploads and BigQuery loads.
+
+Timestamps reach the sinks as timezone-aware or naive datetimes, ISO strings, or epoch
+numbers in seconds, milliseconds, microseconds or nanoseconds. ``normalize_timestamps``
+turns any of these into a ``datetime64[ns, UTC]`` Series with whole-array operations: the
+epoch unit is picked from each value's magnitude with NumPy masks, strings go through a
+single ``pd.to_datetime``, and naive values are taken as UTC. Unparseable values become NaT.
+
+``epoch_timestamp_sql`` renders the same magnitude rule as a BigQuery expression so that
+SQL-side conversions (scripts/materialize_partitions.py) agree with the Python ones.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# (unit, smallest magnitude read in that unit); anything smaller is seconds. A current epoch
+# is ~1.7e9 s = 1.7e12 ms = 1.7e15 us = 1.7e18 ns, so each bound sits well between two units.
+EPOCH_UNIT_BOUNDS = (('ns', 1e17), ('us', 1e14), ('ms', 1e11))
+_NS_PER_UNIT = {'ns': 1, 'us': 1_000, 'ms': 1_000_000, 's': 1_000_000_000}
+_MAX_NS = float(np.iinfo(np.int64).max)
+_NAT = np.iinfo(np.int64).min
+_NUMERIC_KINDS = frozenset({'integer', 'floating', 'mixed-integer-float', 'decimal'})
+
+
+def epoch_to_datetime(values: Any) -> pd.DatetimeIndex:
+    """UTC DatetimeIndex from epoch numbers, detecting the unit of each value by magnitude."""
+    arr = np.asarray(values)
+    floats = arr.astype('float64')
+    magnitude = np.abs(floats)
+    conditions = [magnitude >= bound for _, bound in EPOCH_UNIT_BOUNDS]
+    scale = np.select(conditions, [_NS_PER_UNIT[unit] for unit, _ in EPOCH_UNIT_BOUNDS], _NS_PER_UNIT['s'])
+    valid = np.isfinite(floats) & (magnitude * scale < _MAX_NS)
+    with np.errstate(over='ignore', invalid='ignore'):
+        if np.issubdtype(arr.dtype, np.integer):
+            ns = arr.astype('int64') * scale  # exact for integer epochs
+        else:
+            ns = np.round(floats * scale).astype('int64')
+    ns = np.where(valid, ns, _NAT)
+    return pd.DatetimeIndex(ns.view('datetime64[ns]')).tz_localize('UTC')
+
+
+def normalize_timestamps(values: Any) -> pd.Series:
+    """``values`` (Series or array-like) as a ``datetime64[ns, UTC]`` Series; unparseable -> NaT."""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if series.empty:
+        return pd.Series(pd.DatetimeIndex([], tz='UTC'), index=series.index, name=series.name)
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(series):
+        out = series.dt.tz_localize('UTC') if series.dt.tz is None else series.dt.tz_convert('UTC')
+        return out.astype('datetime64[ns, UTC]')
+    if pd.api.types.is_bool_dtype(series):
+        return pd.Series(pd.NaT, index=series.index, name=series.name, dtype='datetime64[ns, UTC]')
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.Series(epoch_to_datetime(series.to_numpy(dtype='float64', na_value=np.nan)
+                                           if series.hasnans else series.to_numpy()),
+                         index=series.index, name=series.name)
+
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind in _NUMERIC_KINDS:
+        numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        return pd.Series(epoch_to_datetime(numbers), index=series.index, name=series.name)
+    if kind in ('string', 'datetime', 'datetime64', 'date', 'empty'):
+        return _parse(series)
+    # Mixed object column (e.g. epoch ints next to ISO strings): split by element type once.
+    is_number = np.fromiter(
+        (isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_)) for v in series),
+        dtype=bool, count=len(series),
+    )
+    out = _parse(series.where(~is_number))
+    if is_number.any():
+        numbers = pd.to_numeric(series[is_number], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        out[is_number] = epoch_to_datetime(numbers)
+    return out
+
+
+def _parse(series: pd.Series) -> pd.Series:
+    parsed = pd.to_datetime(series, utc=True, errors='coerce')
+    if parsed.isna().sum() > series.isna().sum():
+        # The inferred format did not fit every row; parse formats per element for those
+        retry = parsed.isna() & series.notna()
+        parsed[retry] = pd.to_datetime(series[retry], utc=True, errors='coerce', format='mixed')
+    return parsed.astype('datetime64[ns, UTC]')
+
+
+def drop_invalid_timestamps(df: pd.DataFrame, column: str, label: Optional[str] = None) -> pd.DataFrame:
+    """``df`` with ``column`` normalized to UTC and rows whose timestamp is unparseable removed."""
+    normalized = normalize_timestamps(df[column])
+    invalid = normalized.isna()
+    if invalid.any():
+        samples = df.loc[invalid, column].head().tolist()
+        log.warning(f"Dropped {int(invalid.sum())} rows with invalid timestamps{f' for {label}' if label else ''} "
+                    f"(raw samples={samples})")
+    return df.assign(**{column: normalized}).loc[~invalid]
+
+
+def utc_timestamp_strings(ts: pd.Series) -> np.ndarray:
+    """Naive UTC 'YYYY-MM-DD HH:MM:SS' strings (second precision) for a normalized Series."""
+    seconds = ts.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+    return np.char.replace(np.datetime_as_string(seconds, unit='s'), 'T', ' ').astype(object)
+
+
+def epoch_timestamp_sql(column: str) -> str:
+    """BigQuery expression converting integer epoch ``column`` to TIMESTAMP with the same unit rule."""
+    value = f"CAST({column} AS INT64)"
+    cases = {
+        'ns': f"TIMESTAMP_MICROS(DIV({value}, 1000))",
+        'us': f"TIMESTAMP_MICROS({value})",
+        'ms': f"TIMESTAMP_MILLIS({value})",
+    }
+    whens = " ".join(f"WHEN ABS({value}) >= {int(bound)} THEN {cases[unit]}" for unit, bound in EPOCH_UNIT_BOUNDS)
+    return f"CASE {whens} ELSE TIMESTAMP_SECONDS({value}) END"
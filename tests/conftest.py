@@ -5,3 +5,42 @@ import sys
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
+
+
+import httpx  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from src.data_collection.clients.base_client import BaseClient  # noqa: E402
+from src.data_collection.clients.rate_limit import RetryPolicy  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state_files(tmp_path, monkeypatch):
+    """Keep deployment snapshots written during tests out of the repository's data/ directory."""
+    monkeypatch.setenv('DEPLOYMENT_SNAPSHOT', str(tmp_path / 'deployments.json'))
+
+
+class StubClient(BaseClient):
+    """Concrete BaseClient for exercising the shared request machinery."""
+
+    async def fetch_data(self, **kwargs) -> pd.DataFrame:  # pragma: no cover - not used
+        return pd.DataFrame()
+
+
+@pytest.fixture
+def make_client():
+    """Factory for a StubClient on https://api.test whose requests are answered by ``handler``.
+
+    Defaults to no rate limiting and two immediate retries; keyword arguments go to BaseClient.
+    Tests close the client themselves (``await client.aclose()``).
+    """
+    def make(handler=None, **kwargs) -> StubClient:
+        kwargs.setdefault('rate_limit', None)
+        kwargs.setdefault('retry_policy', RetryPolicy(max_retries=2, base_delay=0.0))
+        client = StubClient('https://api.test', **kwargs)
+        if handler is not None:
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    return make
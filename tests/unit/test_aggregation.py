@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_collection.aggregation import aggregate_frame, floor_timestamps
+
+
+def _raw():
+    ts = pd.to_datetime(['2025-08-26T00:05Z', '2025-08-26T00:40Z', '2025-08-26T01:10Z',
+                         '2025-08-26T00:20Z', '2025-08-26T00:50Z'], utc=True)
+    return pd.DataFrame({
+        'device_id': ['A', 'A', 'A', 'B', 'B'],
+        'timestamp': ts,
+        'pm2_5': [1.0, 3.0, 5.0, 10.0, np.nan],
+        'is_indoor': [True] * 5,
+        'epoch': [1, 2, 3, 4, 5],
+    })
+
+
+def test_aggregate_frame_computes_all_stats_per_bucket():
+    out = aggregate_frame(_raw(), 'device_id', 'timestamp', 'h', exclude=('epoch',))
+    assert list(out.columns) == ['device_id', 'timestamp', 'pm2_5', 'pm2_5_min', 'pm2_5_max', 'pm2_5_count', 'pm2_5_last']
+    a0 = out[(out.device_id == 'A') & (out.timestamp == pd.Timestamp('2025-08-26T00:00Z'))].iloc[0]
+    assert (a0.pm2_5, a0.pm2_5_min, a0.pm2_5_max, a0.pm2_5_count, a0.pm2_5_last) == (2.0, 1.0, 3.0, 2, 3.0)
+    b0 = out[out.device_id == 'B'].iloc[0]
+    assert b0.pm2_5_count == 1 and b0.pm2_5_last == 10.0
+    assert len(out) == 3
+
+
+def test_mean_matches_legacy_resample():
+    rng = np.random.default_rng(0)
+    ts = pd.date_range('2025-08-26', periods=600, freq='min', tz='UTC')
+    df = pd.DataFrame({'device_id': np.repeat(['A', 'B', 'C'], 200), 'timestamp': ts, 'v': rng.random(600)})
+    legacy = df.set_index('timestamp').groupby('device_id').resample('15min').agg({'v': 'mean'}).reset_index().dropna()
+    new = aggregate_frame(df, 'device_id', 'timestamp', '15min', stats=('mean',))
+    pd.testing.assert_frame_equal(new.reset_index(drop=True), legacy.reset_index(drop=True), check_dtype=False)
+
+
+@pytest.mark.parametrize('interval,expected', [('D', '2025-08-26'), ('W', '2025-08-25'), ('MS', '2025-08-01')])
+def test_floor_timestamps_fixed_and_calendar_intervals(interval, expected):
+    floored = floor_timestamps(pd.Series(pd.to_datetime(['2025-08-26T13:45Z'])), interval)
+    assert floored.iloc[0] == pd.Timestamp(expected, tz='UTC')
@@ -62,3 +62,112 @@ async def test_tsi_client_fetch_data_success(mocker):
     assert 'timestamp' in df.columns, "Timestamp column should be present after rename"
     assert (df['device_id'] == '12345').all(), "All rows should have the test device id"
     assert df.iloc[0]['mcpm2x5'] == 15.5
+
+
+@pytest.mark.asyncio
+async def test_clients_share_pooled_http_client(mocker):
+    """A shared pooled client is reused by both clients and left open for its owner."""
+    from src.data_collection.clients.http_pool import HTTPPoolConfig, build_async_client
+
+    mocker.patch('src.data_collection.clients.wu_client.get_wu_stations', return_value=[])
+    mocker.patch('src.data_collection.clients.tsi_client.get_tsi_devices', return_value=[])
+    async with build_async_client(HTTPPoolConfig(max_connections=5, read_timeout=12.0)) as shared:
+        assert shared.timeout.read == 12.0
+        async with WUClient(api_key='k', http_client=shared) as wu, \
+                TSIClient(client_id='i', client_secret='s', auth_url='https://fake', http_client=shared) as tsi:
+            assert wu.client is shared and tsi.client is shared
+        assert not shared.is_closed
+
+
+@pytest.mark.asyncio
+async def test_tsi_token_is_cached_and_refreshed_after_401(mocker):
+    """Concurrent fetches share one OAuth round trip; a 401 triggers one refresh and a replay."""
+    import asyncio
+    import httpx
+
+    mocker.patch('src.data_collection.clients.tsi_client.get_tsi_devices', return_value=[])
+    issued = []
+    telemetry_auth = []
+
+    def handler(request):
+        if request.url.path.endswith('/auth'):
+            issued.append(f"tok{len(issued)}")
+            return httpx.Response(200, json={'access_token': issued[-1], 'expires_in': '3599'})
+        telemetry_auth.append(request.headers['Authorization'])
+        if request.headers['Authorization'] == 'Bearer tok0':
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    async with TSIClient(client_id='i', client_secret='s', auth_url='https://fake-tsi.com/auth',
+                         base_url='https://fake-tsi.com/api', http_client=shared) as client:
+        results = await asyncio.gather(*(client._authenticate() for _ in range(5)))
+        assert all(results) and issued == ['tok0']
+        assert await client._request('GET', 'telemetry', headers=client.headers) == []
+    assert issued == ['tok0', 'tok1']
+    assert telemetry_auth == ['Bearer tok0', 'Bearer tok1']
+    assert client.token_manager.refresh_count == 2
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_short_lived_token_is_reused_within_its_lifetime():
+    """A token living no longer than the refresh margin is still cached (margin capped at half its lifetime)."""
+    from src.data_collection.clients.token_manager import BearerTokenManager
+
+    async def fetch():
+        return 'short', 30.0
+
+    manager = BearerTokenManager(fetch, refresh_margin=60.0)
+    tokens = [await manager.get_token() for _ in range(5)]
+    assert tokens == ['short'] * 5
+    assert manager.refresh_count == 1 and not manager.expiring()
+
+
+@pytest.mark.asyncio
+async def test_tsi_window_mode_fetches_multi_day_windows(mocker):
+    """With max_window_days=3 a 5-day range needs 2 requests per device; rows split back per day."""
+    from datetime import datetime, timedelta
+    from src.data_collection.clients.tsi_client import split_by_day
+
+    start = (datetime.utcnow() - timedelta(days=10)).date()
+    days = [(start + timedelta(days=i)).isoformat() for i in range(5)]
+    mocker.patch('src.data_collection.clients.tsi_client.get_tsi_devices', return_value=['dev-1'])
+    client = TSIClient(client_id='i', client_secret='s', auth_url='https://fake', max_window_days=3)
+    client.headers = {'Authorization': 'Bearer t'}
+    mocker.patch.object(client, '_authenticate', return_value=True)
+    calls = []
+
+    async def fake_request(method, endpoint, params=None, headers=None, json_data=None, breaker_key=None):
+        calls.append((params['start_date'], params['end_date']))
+        first = datetime.strptime(params['start_date'], '%Y-%m-%dT%H:%M:%SZ')
+        last = datetime.strptime(params['end_date'], '%Y-%m-%dT%H:%M:%SZ')
+        n_days = (last - first).days
+        return [{'cloud_timestamp': f"{(first + timedelta(days=i)).date()}T12:00:00Z",
+                 'sensors': [{'measurements': [{'name': 'PM 2.5', 'data': {'value': float(i)}}]}]}
+                for i in range(n_days)]
+
+    mocker.patch.object(client, '_request', side_effect=fake_request)
+    df = await client.fetch_data(days[0], days[-1])
+    assert len(calls) == 2
+    by_day = split_by_day(df)
+    assert sorted(by_day) == days
+    assert all(len(frame) == 1 for frame in by_day.values())
+
+
+@pytest.mark.asyncio
+async def test_wu_iter_batches_yields_one_frame_per_station_day(mocker):
+    """iter_batches streams per-request frames instead of one concatenated frame."""
+    async def fake_request(method, endpoint, params=None, headers=None, json_data=None, breaker_key=None):
+        day = params['date']
+        return {'observations': [{'stationID': params['stationId'], 'obsTimeUtc': f"{day[:4]}-{day[4:6]}-{day[6:]}T12:00:00Z",
+                                  'tempAvg': 20.0}]}
+
+    mocker.patch('src.data_collection.clients.wu_client.get_wu_stations', return_value=[{'stationId': 'S1'}, {'stationId': 'S2'}])
+    client = WUClient(api_key='k', base_url='https://fake-wu.com')
+    mocker.patch.object(client, '_request', side_effect=fake_request)
+    batches = [df async for df in client.iter_batches('2025-07-26', '2025-07-27')]
+    assert len(batches) == 4
+    assert all(len(df) == 1 for df in batches)
+    assert sorted((df['stationID'].iloc[0], str(df['obsTimeUtc'].iloc[0].date())) for df in batches) == [
+        ('S1', '2025-07-26'), ('S1', '2025-07-27'), ('S2', '2025-07-26'), ('S2', '2025-07-27')]
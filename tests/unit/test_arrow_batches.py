@@ -0,0 +1,120 @@
+import io
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.data_collection.arrow_batches import clean_record_batch
+from src.data_collection.clients.replay import SyntheticAPI
+from src.data_collection.clients.tsi_client import TSIClient
+from src.data_collection.clients.tsi_parser import TSI_RAW_SCHEMA
+from src.data_collection.clients.wu_client import WUClient
+from src.data_collection.clients.wu_parser import WU_RAW_SCHEMA, WUDecodeError, decode_observations_batch
+from src.data_collection.daily_data_collector import clean_and_transform_data
+from src.data_collection.watermarks import compute_watermarks, merge_watermarks
+from src.storage.gcs_uploader import GCSUploader
+from src.storage.parquet_stream import IncrementalParquetWriter
+
+
+async def _batches(source, arrow):
+    api = SyntheticAPI(tsi_interval='5min')
+    async with httpx.AsyncClient(transport=api.transport()) as http_client:
+        if source == 'WU':
+            client = WUClient(api_key='k', base_url='https://wu.test/v2/pws', http_client=http_client)
+            client.stations = [{'stationId': 'KST1'}, {'stationId': 'KST2'}]
+        else:
+            client = TSIClient(client_id='id', client_secret='s', auth_url='https://tsi.test/oauth/token',
+                               base_url='https://tsi.test/api', http_client=http_client)
+            client.device_ids = ['dev-1', 'dev-2']
+        async with client:
+            client.rate_limiter = None
+            kwargs = {'arrow': True} if arrow else {}
+            return [batch async for batch in client.iter_batches('2025-08-25', '2025-08-25', **kwargs)]
+
+
+def _as_rows(table: pa.Table, key: str) -> pd.DataFrame:
+    return pd.DataFrame(table.to_pydict()).sort_values([key, 'timestamp']).reset_index(drop=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('source, schema', [('WU', WU_RAW_SCHEMA), ('TSI', TSI_RAW_SCHEMA)])
+async def test_arrow_batches_match_dataframe_path(source, schema):
+    frames = await _batches(source, arrow=False)
+    batches = await _batches(source, arrow=True)
+    assert batches and all(isinstance(b, pa.RecordBatch) and b.schema == schema for b in batches)
+
+    cleaned = pa.Table.from_batches([clean_record_batch(b, source) for b in batches])
+    expected = pa.Table.from_pandas(pd.concat([clean_and_transform_data(f, source) for f in frames], ignore_index=True),
+                                    preserve_index=False)
+    assert set(expected.column_names) <= set(cleaned.column_names)  # extra: all-null model fields the payload lacks
+    got, want = _as_rows(cleaned, 'native_sensor_id'), _as_rows(expected, 'native_sensor_id')
+    pd.testing.assert_frame_equal(got[want.columns], want, check_dtype=False)
+    assert cleaned.schema.field('timestamp').type == pa.timestamp('ns', tz='UTC')
+    marks = [{}, {}]
+    for i, parts in enumerate((frames, batches)):
+        for part in parts:
+            marks[i] = merge_watermarks(marks[i], compute_watermarks(part, source))
+    assert marks[0] == marks[1] and len(marks[1]) == 2
+
+
+def test_clean_record_batch_projects_without_copying():
+    ts = pa.array([1_756_166_400_000_000_000, None], type=pa.timestamp('ns', tz='UTC'))
+    batch = pa.RecordBatch.from_arrays(
+        [ts, pa.array(['K1', 'K1']), pa.array([70.5, None]), pa.array([35.9, 35.9]), pa.array([-78.9, -78.9])],
+        names=['obsTimeUtc', 'stationID', 'tempAvg', 'lat', 'lon'],
+    )
+    cleaned = clean_record_batch(batch, 'WU')
+    assert cleaned.schema.names == ['timestamp', 'native_sensor_id', 'temperature', 'lat', 'lon', 'ts', 'lat_f', 'lon_f']
+    for raw, clean in (('tempAvg', 'temperature'), ('obsTimeUtc', 'ts'), ('lat', 'lat_f')):
+        assert cleaned.column(cleaned.schema.get_field_index(clean)).buffers()[1].address == \
+            batch.column(batch.schema.get_field_index(raw)).buffers()[1].address
+
+
+def test_decode_observations_batch_validates_like_dataframe_path():
+    payload = {'observations': [
+        {'stationID': 'K1', 'obsTimeUtc': '2025-08-26T00:04:59Z', 'qcStatus': 1, 'imperial': {'tempAvg': '71.5', 'tempHigh': 'n/a'}},
+    ]}
+    batch = decode_observations_batch(payload, 'K1')
+    row = batch.to_pylist()[0]
+    assert row['tempAvg'] == 71.5 and row['tempHigh'] is None and row['qcStatus'] == 1
+    assert batch.schema == WU_RAW_SCHEMA
+    with pytest.raises(WUDecodeError, match="missing required field 'obsTimeUtc'"):
+        decode_observations_batch({'observations': [{'stationID': 'K1'}]})
+    with pytest.raises(WUDecodeError, match="unparseable 'obsTimeUtc'"):
+        decode_observations_batch({'observations': [{'stationID': 'K1', 'obsTimeUtc': 'yesterday'}]})
+
+
+def test_writer_and_uploader_take_arrow_without_pandas():
+    batch = clean_record_batch(decode_observations_batch({'observations': [
+        {'stationID': 'K1', 'obsTimeUtc': '2025-08-26T00:04:59Z'}, {'stationID': 'K1', 'obsTimeUtc': '2025-08-26T01:04:59Z'},
+    ]}), 'WU')
+    sink = io.BytesIO()
+    sink.close = lambda: None  # keep the buffer readable after the writer finalizes it
+    with IncrementalParquetWriter(sink) as writer:
+        writer.write(batch)
+        writer.write(batch.slice(1))
+    assert pq.read_table(io.BytesIO(sink.getvalue())).num_rows == 3
+
+    uploaded = {}
+
+    class Blob:
+        def __init__(self, path):
+            self.path = path
+
+        def exists(self):
+            return False
+
+        def upload_from_file(self, buf, **_):
+            uploaded[self.path] = pq.read_table(buf)
+
+    class Client:
+        def bucket(self, _):
+            return type('Bucket', (), {'blob': staticmethod(Blob)})()
+
+    uploader = GCSUploader(bucket='b', client=Client())  # type: ignore[arg-type]
+    path = uploader.upload_parquet(pa.Table.from_batches([batch]), source='WU', ts_column='ts')
+    assert path.endswith('source=WU/agg=raw/dt=2025-08-26/WU-2025-08-26.parquet')
+    (table,) = uploaded.values()
+    assert table.num_rows == 2 and table.schema.metadata is None  # no pandas metadata: never went through pandas
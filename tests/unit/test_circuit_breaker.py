@@ -0,0 +1,94 @@
+import httpx
+import pytest
+
+from src.data_collection.clients.circuit_breaker import CircuitBreaker
+from src.data_collection.clients.rate_limit import RetryPolicy
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_trips_probes_and_backs_off(tmp_path):
+    clock = _Clock()
+    breaker = CircuitBreaker('api.test', threshold=2, cooldown=60, max_cooldown=100, state_path=tmp_path / 'cb.json', clock=clock)
+    for _ in range(2):
+        assert breaker.allow('dev-1')
+        breaker.record_failure('dev-1')
+    assert not breaker.allow('dev-1')
+    assert breaker.allow('dev-2')
+
+    clock.now += 61
+    assert breaker.allow('dev-1')  # half-open probe
+    assert not breaker.allow('dev-1')  # only one probe at a time
+    breaker.record_failure('dev-1')
+    clock.now += 61
+    assert not breaker.allow('dev-1')  # cooldown doubled to 100s (capped)
+    clock.now += 40
+    assert breaker.allow('dev-1')
+    breaker.record_success('dev-1')
+    assert breaker.allow('dev-1') and breaker.snapshot()['open'] == []
+
+
+def test_breaker_state_persists_between_runs(tmp_path):
+    clock = _Clock()
+    path = tmp_path / 'cb.json'
+    first = CircuitBreaker('api.test', threshold=1, cooldown=3600, state_path=path, clock=clock)
+    first.record_failure('dead-station')
+    first.save()
+    CircuitBreaker('other.host', threshold=1, state_path=path, clock=clock).save()
+
+    clock.now += 60
+    second = CircuitBreaker('api.test', threshold=1, cooldown=3600, state_path=path, clock=clock)
+    assert not second.allow('dead-station')
+    assert second.snapshot() == {'open': ['dead-station'], 'short_circuited': 1}
+
+
+@pytest.mark.asyncio
+async def test_request_short_circuits_sensor_after_timeouts(tmp_path, make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.params['device_id'])
+        if request.url.params['device_id'] == 'offline':
+            raise httpx.ConnectTimeout('timed out', request=request)
+        return httpx.Response(200, json=[{'ok': True}])
+
+    breaker = CircuitBreaker('api.test', threshold=2, state_path=tmp_path / 'cb.json')
+    client = make_client(handler, retry_policy=RetryPolicy(max_retries=1, base_delay=0.0), circuit_breaker=breaker)
+    for device in ('offline', 'offline', 'offline', 'online'):
+        await client._request('GET', 'telemetry', params={'device_id': device}, breaker_key=device)
+    await client.aclose()
+
+    assert calls == ['offline'] * 4 + ['online']  # two failed requests x 2 attempts, then skipped
+    assert client.metrics_snapshot()['circuit_breaker'] == {'open': ['offline'], 'short_circuited': 1}
+    assert 'offline' in (tmp_path / 'cb.json').read_text()
+
+
+@pytest.mark.asyncio
+async def test_probe_answered_with_client_error_does_not_block_the_sensor(tmp_path, make_client):
+    clock = _Clock()
+    breaker = CircuitBreaker('api.test', threshold=1, cooldown=60, state_path=tmp_path / 'cb.json', clock=clock)
+    breaker.record_failure('s')
+    clock.now += 61
+    client = make_client(lambda request: httpx.Response(404), circuit_breaker=breaker)
+    assert await client._request('GET', 'telemetry', breaker_key='s') is None  # the probe
+    await client.client.aclose()
+
+    assert breaker.allow('s')  # probing again, not short-circuited forever
+    breaker.release('s')
+    assert breaker.allow('s')
+
+
+@pytest.mark.asyncio
+async def test_exhausted_throttling_retries_do_not_count_against_the_sensor(tmp_path, make_client):
+    breaker = CircuitBreaker('api.test', threshold=1, state_path=tmp_path / 'cb.json')
+    client = make_client(lambda request: httpx.Response(429, headers={'Retry-After': '0'}), circuit_breaker=breaker)
+    assert await client._request('GET', 'telemetry', breaker_key='busy') is None
+    await client.client.aclose()
+
+    assert breaker.allow('busy') and breaker.snapshot()['open'] == []
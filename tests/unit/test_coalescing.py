@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_flight(make_client):
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        calls.append(request.url.params['date'])
+        await release.wait()
+        return httpx.Response(200, json={'date': request.url.params['date']})
+
+    client = make_client(handler)
+    other = make_client(handler)
+    tasks = [asyncio.ensure_future(client._request('GET', 'x', params={'date': '20250826', 'apiKey': str(i)})) for i in range(3)]
+    tasks.append(asyncio.ensure_future(other._request('GET', 'x', params={'date': '20250826'})))
+    tasks.append(asyncio.ensure_future(client._request('GET', 'x', params={'date': '20250827'})))
+    await asyncio.sleep(0.01)
+    tasks[0].cancel()  # the first caller going away must not cancel the shared request
+    release.set()
+    results = await asyncio.gather(*tasks[1:])
+
+    assert sorted(calls) == ['20250826', '20250827']
+    assert results[0] is results[1] is results[2]
+    assert client.coalesced + other.coalesced == 3
+    await client.client.aclose()
+    await other.client.aclose()
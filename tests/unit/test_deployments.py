@@ -0,0 +1,90 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from src.data_collection import daily_data_collector as dc
+from src.data_collection.deployments import DeploymentMapUnavailable, DeploymentRegistry
+
+MAP = pd.DataFrame({
+    'deployment_pk': [1, 2],
+    'native_sensor_id': ['KST1', 'dev-1'],
+    'sensor_type': ['WU', 'TSI'],
+    'friendly_name': ['Station 1', 'dev-1'],
+    'location': ['Park', 'dev-1'],
+    'start_date': [date(2025, 1, 1), date(2025, 2, 1)],
+})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(monkeypatch):
+    calls = []
+
+    def fake_read_sql(sql, conn):
+        calls.append(sql)
+        return MAP.copy()
+    monkeypatch.setattr(pd, 'read_sql', fake_read_sql)
+    handle = MagicMock()
+    handle.calls = calls
+    return handle
+
+
+def test_registry_caches_for_ttl_and_indexes_by_sensor(db, tmp_path):
+    clock = Clock()
+    registry = DeploymentRegistry(lambda: db, ttl=60, snapshot_path=tmp_path / 'd.json', clock=clock)
+    assert registry.lookup('KST1', 'WU').deployment_pk == 1
+    assert registry.lookup('KST1', 'TSI') is None
+    registry.frame()
+    assert len(db.calls) == 1 and registry.source == 'db'
+    clock.now = 61
+    registry.frame()
+    assert len(db.calls) == 2
+    registry.invalidate()
+    registry.frame()
+    assert len(db.calls) == 3
+
+
+def test_snapshot_serves_when_db_fails_or_is_disabled(db, tmp_path, monkeypatch):
+    snapshot = tmp_path / 'd.json'
+    DeploymentRegistry(lambda: db, snapshot_path=snapshot).frame()  # writes the snapshot
+
+    def broken():
+        raise RuntimeError('Cloud SQL unreachable')
+    fallback = DeploymentRegistry(broken, snapshot_path=snapshot)
+    assert fallback.lookup('dev-1', 'TSI').start_date == date(2025, 2, 1)
+    assert fallback.source == 'snapshot'
+
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    monkeypatch.setenv('DEPLOYMENT_SNAPSHOT', str(snapshot))
+    disabled = DeploymentRegistry.from_env(broken)
+    assert disabled.db_factory is None
+    assert disabled.frame()['deployment_pk'].tolist() == [1, 2]
+
+    with pytest.raises(DeploymentMapUnavailable):
+        DeploymentRegistry(broken, snapshot_path=tmp_path / 'missing.json').frame()
+
+
+def test_ensure_metadata_skips_sensors_already_current(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(dc, '_build_sensor_catalog', lambda: {
+        ('KST1', 'WU'): {'native_sensor_id': 'KST1', 'sensor_type': 'WU', 'friendly_name': 'Station 1',
+                         'location': 'Park', 'start_date': date(2025, 3, 1)},
+        ('KST2', 'WU'): {'native_sensor_id': 'KST2', 'sensor_type': 'WU', 'friendly_name': 'Station 2',
+                         'location': 'Lake', 'start_date': date(2025, 3, 1)},
+    })
+    registry = DeploymentRegistry(lambda: db, snapshot_path=tmp_path / 'd.json')
+    conn = db.engine.begin.return_value.__enter__.return_value
+    conn.execute.return_value.fetchone.return_value = None
+    dc._ensure_deployment_metadata(db, pd.DataFrame(), pd.DataFrame(), registry)
+    params = [call.args[1] for call in conn.execute.call_args_list if len(call.args) > 1]
+    assert {p.get('native_sensor_id') for p in params if 'native_sensor_id' in p} == {'KST2'}
+    registry.frame()
+    assert len(db.calls) == 2  # the registry is re-read after metadata writes
@@ -59,4 +59,11 @@ def test_upload_parquet_invokes_blob():
     if getattr(uploader, 'pa', None) is None:  # pragma: no cover - executed only when pyarrow missing
         pass
     path = uploader.upload_parquet(df, source='WU', aggregated=False, interval='h', ts_column='timestamp')
-    assert path.startswith('gs://b/sensor_readings/source=WU/agg=raw')
\ No newline at end of file
+    assert path.startswith('gs://b/sensor_readings/source=WU/agg=raw')
+
+def test_upload_parquet_partitions_epoch_timestamps_by_their_date():
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({'timestamp': [1756166400 + 3600 * i for i in range(3)], 'value': [1.0, 2.0, 3.0]})
+    uploader = GCSUploader(bucket='b', prefix='sensor_readings', client=DummyClient())  # type: ignore[arg-type]
+    uri = uploader.upload_parquet(df, 'WU')
+    assert '/dt=2025-08-26/' in uri
@@ -0,0 +1,29 @@
+import httpx
+import pytest
+
+from src.data_collection.clients.json_decode import default_decoder, orjson
+
+
+@pytest.mark.asyncio
+async def test_request_decodes_bytes_with_pluggable_decoder_and_records_stats(make_client):
+    seen = []
+
+    def decoder(body: bytes):
+        seen.append(body)
+        return {'decoded': len(body)}
+
+    client = make_client(lambda request: httpx.Response(200, content=b'{"a": [1, 2, 3]}'), decoder=decoder)
+    assert await client._request('GET', 'x') == {'decoded': 16}
+    assert seen == [b'{"a": [1, 2, 3]}']
+    stats = client.metrics_snapshot()['decode']
+    assert stats['requests'] == 1 and stats['bytes'] == 16
+    await client.client.aclose()
+
+
+def test_default_decoder_honours_override(monkeypatch):
+    monkeypatch.setenv('API_JSON_DECODER', 'json')
+    assert default_decoder()[0] == 'json'
+    monkeypatch.delenv('API_JSON_DECODER')
+    name, decode = default_decoder()
+    assert name == ('orjson' if orjson is not None else 'json')
+    assert decode(b'{"x": 1}') == {'x': 1}
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_collection.aggregation import aggregate_source
+from src.data_collection.daily_data_collector import _staging_day_frames
+from src.data_collection.long_format import LongReadings, melt_readings
+
+DEPLOYMENTS = pd.DataFrame({
+    'deployment_pk': [10, 11, 20],
+    'native_sensor_id': ['KST1', 'KST2', 'dev-1'],
+    'sensor_type': ['WU', 'WU', 'TSI'],
+})
+
+
+def _wu():
+    ts = pd.to_datetime(['2025-08-26T00:00Z', '2025-08-26T01:00Z', '2025-08-26T00:00Z', '2025-08-26T01:00Z', '2025-08-26T01:00Z'], utc=True)
+    return pd.DataFrame({
+        'native_sensor_id': ['KST1', 'KST1', 'KST2', 'KST9', 'KST1'],
+        'timestamp': ts,
+        'ts': ts,
+        'temperature': [70.0, np.nan, 65.0, 60.0, 72.0],
+        'humidity': ['55', '56', 'n/a', '50', '57'],
+        'obsTimeLocal': ['2025-08-25 20:00:00'] * 5,
+        'empty': [np.nan] * 5,
+    })
+
+
+def _legacy(df, deployment_map, typ):
+    merged = df.merge(deployment_map[deployment_map.sensor_type == typ], on='native_sensor_id', how='inner')
+    merged = merged.rename(columns={'deployment_pk': 'deployment_fk'})
+    id_vars = ['timestamp', 'deployment_fk']
+    numeric = []
+    for col in merged.columns:
+        if col in id_vars + ['native_sensor_id', 'sensor_type', 'ts']:
+            continue
+        coerced = pd.to_numeric(merged[col], errors='coerce')
+        if coerced.notna().any():
+            merged[col] = coerced
+            numeric.append(col)
+    long_df = pd.melt(merged, id_vars=id_vars, value_vars=numeric, var_name='metric_name', value_name='value')
+    return long_df.dropna(subset=['value']).drop_duplicates(subset=['timestamp', 'deployment_fk', 'metric_name'], keep='last')
+
+
+def test_melt_matches_legacy_melt_and_dedups_keeping_last():
+    out = melt_readings(_wu(), DEPLOYMENTS, 'WU')
+    assert list(out.columns) == ['timestamp', 'deployment_fk', 'metric_name', 'value']
+    assert isinstance(out['metric_name'].dtype, pd.CategoricalDtype)
+    assert set(out['metric_name'].cat.categories) == {'temperature', 'humidity'}  # no datetime/all-null/string columns
+    key = ['deployment_fk', 'metric_name', 'timestamp']
+    legacy = _legacy(_wu(), DEPLOYMENTS, 'WU').sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        out.astype({'metric_name': str}).sort_values(key).reset_index(drop=True),
+        legacy[list(out.columns)],
+        check_dtype=False,
+    )
+    # KST1 01:00 appears twice: the later row (72.0) wins, the unmatched KST9 row is dropped
+    row = out[(out.deployment_fk == 10) & (out.metric_name == 'temperature') & (out.timestamp == pd.Timestamp('2025-08-26T01:00Z'))]
+    assert row['value'].tolist() == [72.0]
+    assert 60.0 not in out['value'].tolist()
+
+
+def test_long_readings_build_once_and_combine_sources():
+    tsi = pd.DataFrame({
+        'native_sensor_id': ['dev-1'],
+        'timestamp': pd.to_datetime(['2025-08-26T00:15Z'], utc=True),
+        'pm2_5': [3.5],
+        'is_indoor': [False],
+    })
+    long = LongReadings(_wu(), tsi)
+    assert not long.built
+    frames = long.build(DEPLOYMENTS)
+    assert long.build(DEPLOYMENTS.iloc[:0]) is frames  # later sinks reuse the first build
+    combined = long.combined()
+    assert len(combined) == len(frames['WU']) + len(frames['TSI'])
+    assert isinstance(combined['metric_name'].dtype, pd.CategoricalDtype)
+    tsi_rows = combined[combined.deployment_fk == 20].set_index('metric_name')['value']
+    assert tsi_rows.to_dict() == {'pm2_5': 3.5, 'is_indoor': 0.0}
+
+
+def test_melt_without_matching_deployments_is_empty():
+    out = melt_readings(_wu(), DEPLOYMENTS[DEPLOYMENTS.sensor_type == 'TSI'], 'WU')
+    assert out.empty and list(out.columns) == ['timestamp', 'deployment_fk', 'metric_name', 'value']
+
+
+def test_long_frames_are_compact(monkeypatch):
+    out = melt_readings(_wu(), DEPLOYMENTS, 'WU')
+    assert out['deployment_fk'].dtype == 'int32' and out['value'].dtype == 'float64'
+    compact = ['deployment_fk', 'metric_name', 'value']
+    empty = melt_readings(_wu().iloc[:0], DEPLOYMENTS, 'WU')
+    assert [str(t) for t in empty[compact].dtypes] == [str(t) for t in out[compact].dtypes]
+
+    monkeypatch.setenv('LONG_VALUE_DTYPE', 'float32')
+    long = LongReadings(_wu(), pd.DataFrame())
+    long.build(DEPLOYMENTS)
+    combined = long.combined()
+    assert combined['value'].dtype == 'float32' and combined['deployment_fk'].dtype == 'int32'
+    np.testing.assert_allclose(combined['value'].to_numpy(), out['value'].to_numpy())
+
+    monkeypatch.setenv('LONG_VALUE_DTYPE', 'float16')
+    assert LongReadings(_wu(), pd.DataFrame()).value_dtype == 'float64'
+
+
+def test_staging_frames_keep_compact_dtypes_through_bigquery_parquet(tmp_path):
+    bigquery = pytest.importorskip('google.cloud.bigquery')
+    from google.cloud.bigquery import _pandas_helpers
+    import pyarrow.parquet as pq
+
+    long = LongReadings(_wu(), pd.DataFrame(), value_dtype='float32')
+    long.build(DEPLOYMENTS)
+    long_df = long.combined()
+    long_df = pd.concat([long_df, long_df.assign(timestamp=long_df['timestamp'] + pd.Timedelta(days=1, seconds=0.5))],
+                        ignore_index=True)
+    days = dict(_staging_day_frames(long_df, 'WU'))
+    assert sorted(days) == [pd.Timestamp('2025-08-26').date(), pd.Timestamp('2025-08-27').date()]
+    day_df = days[pd.Timestamp('2025-08-27').date()]
+    assert isinstance(day_df['metric_name'].dtype, pd.CategoricalDtype)
+    assert day_df['deployment_fk'].dtype == 'int32' and day_df['value'].dtype == 'float32'
+    assert day_df['timestamp'].min() == pd.Timestamp('2025-08-27T00:00Z')  # truncated to whole seconds
+
+    schema = [bigquery.SchemaField('timestamp', 'TIMESTAMP'), bigquery.SchemaField('deployment_fk', 'INT64'),
+              bigquery.SchemaField('metric_name', 'STRING'), bigquery.SchemaField('value', 'FLOAT64')]
+    path = tmp_path / 'load.parquet'
+    _pandas_helpers.dataframe_to_parquet(day_df, schema, str(path))
+    types = {f.name: str(f.type) for f in pq.read_schema(path)}
+    assert types == {'timestamp': 'timestamp[us, tz=UTC]', 'deployment_fk': 'int64', 'metric_name': 'string', 'value': 'double'}
+    assert 'RLE_DICTIONARY' in pq.ParquetFile(path).metadata.row_group(0).column(2).encodings
+
+
+def test_aggregated_day_melts_only_the_bucket_means():
+    raw = pd.DataFrame({
+        'stationID': ['KST1'] * 4,
+        'obsTimeUtc': pd.to_datetime(['2025-08-26T00:05Z', '2025-08-26T00:35Z', '2025-08-26T01:05Z', '2025-08-26T01:35Z'], utc=True),
+        'temperature': [70.0, 72.0, 68.0, 66.0],
+        'pressure_max': [30.1, 30.2, 30.0, 29.9],
+    })
+    wide = aggregate_source(raw, 'WU', 'h').rename(columns={'stationID': 'native_sensor_id', 'obsTimeUtc': 'timestamp'})
+    assert 'temperature_count' in wide.columns and 'pressure_max_max' in wide.columns
+    out = melt_readings(wide, DEPLOYMENTS, 'WU')
+    assert set(out['metric_name'].cat.categories) == {'temperature', 'pressure_max'}
+    assert out.loc[out.metric_name == 'temperature', 'value'].tolist() == [71.0, 67.0]
+    # A raw frame's own _max/_min metrics are still readings
+    raw_out = melt_readings(_wu().assign(pressure_max=30.0), DEPLOYMENTS, 'WU')
+    assert 'pressure_max' in set(raw_out['metric_name'].cat.categories)
@@ -54,3 +54,283 @@ def test_run_collection_process_dry(monkeypatch, capsys):
     asyncio.run(dc.run_collection_process(datetime(2025,8,26), datetime(2025,8,26), sink='gcs', source='all', is_dry_run=True))
     captured = capsys.readouterr()
     assert 'WU sample' in captured.out
+
+
+def test_run_collection_process_concurrent_days_share_clients(monkeypatch):
+    opened = {'WU': 0, 'TSI': 0}
+    fetched_days = []
+
+    class CountingWU(DummyWU):
+        async def __aenter__(self):
+            opened['WU'] += 1
+            return self
+        async def fetch_data(self, start, end, **k):
+            fetched_days.append(start)
+            return await super().fetch_data()
+
+    class CountingTSI(DummyTSI):
+        async def __aenter__(self):
+            opened['TSI'] += 1
+            return self
+
+    uploader = DummyUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: CountingWU())
+    monkeypatch.setattr(dc, 'TSIClient', lambda **cfg: CountingTSI())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc, 'HotDurhamDB', DummyDB)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    asyncio.run(dc.run_collection_process('2025-08-24', '2025-08-26', sink='gcs', source='all', max_concurrent_days=2))
+    assert opened == {'WU': 1, 'TSI': 1}
+    assert sorted(fetched_days) == ['2025-08-24', '2025-08-25', '2025-08-26']
+    # one WU + one TSI upload per day
+    assert len(uploader.uploads) == 6
+
+
+def test_run_collection_process_tsi_window_fetches_once(monkeypatch):
+    tsi_calls = []
+
+    class WindowTSI(DummyTSI):
+        async def fetch_data(self, start, end, **k):
+            tsi_calls.append((start, end))
+            return pd.DataFrame({
+                'device_id': ['D1'] * 3,
+                'timestamp': pd.to_datetime(['2025-08-24T01:00Z', '2025-08-25T01:00Z', '2025-08-26T01:00Z']),
+                'pm2_5': [1.0, 2.0, 3.0],
+            })
+
+    uploader = DummyUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: DummyWU())
+    monkeypatch.setattr(dc, 'TSIClient', lambda **cfg: WindowTSI())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    asyncio.run(dc.run_collection_process('2025-08-24', '2025-08-26', sink='gcs', source='tsi',
+                                          max_concurrent_days=3, tsi_window_days=3))
+    assert tsi_calls == [('2025-08-24', '2025-08-26')]
+    assert uploader.uploads == [('TSI', 1)] * 3
+
+
+def test_run_collection_process_stream_writes_batches_incrementally(monkeypatch):
+    import io
+    import pytest
+    pq = pytest.importorskip('pyarrow.parquet')
+    from src.storage.parquet_stream import IncrementalParquetWriter
+
+    class StreamingWU(DummyWU):
+        async def fetch_data(self, *a, **k):
+            raise AssertionError("stream mode must not materialize the whole day")
+        async def iter_batches(self, start, end):
+            for station in ('S1', 'S2', 'S3'):
+                yield pd.DataFrame({'stationID': [station] * 2, 'tempAvg': [20.0, 21.0],
+                                    'obsTimeUtc': pd.to_datetime([f'{start}T01:00:00Z', f'{start}T02:00:00Z'])})
+
+    class StreamingTSI(DummyTSI):
+        async def iter_batches(self, start, end):
+            return
+            yield
+
+    buffers = {}
+
+    class StreamUploader(DummyUploader):
+        def open_parquet_stream(self, spec, date_str, force=False):
+            buf = buffers[(spec.source, date_str)] = io.BytesIO()
+            buf.close = lambda: None  # keep readable after the writer finalizes it
+            return IncrementalParquetWriter(buf)
+
+    uploader = StreamUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: StreamingWU())
+    monkeypatch.setattr(dc, 'TSIClient', lambda **cfg: StreamingTSI())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc, 'HotDurhamDB', DummyDB)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    asyncio.run(dc.run_collection_process('2025-08-26', '2025-08-27', sink='gcs', source='all', stream=True))
+
+    assert sorted(buffers) == [('WU', '2025-08-26'), ('WU', '2025-08-27')]
+    assert uploader.uploads == []
+    buf = buffers[('WU', '2025-08-26')]
+    buf.seek(0)
+    parquet = pq.ParquetFile(buf)
+    assert parquet.metadata.num_row_groups == 3
+    assert sorted(parquet.read().to_pandas()['native_sensor_id'].unique()) == ['S1', 'S2', 'S3']
+
+
+def test_run_collection_process_stream_arrow_writes_record_batches(monkeypatch):
+    import io
+    import pytest
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    from src.data_collection.clients.wu_parser import decode_observations_batch
+    from src.storage.parquet_stream import IncrementalParquetWriter
+
+    class ArrowWU(DummyWU):
+        async def iter_batches(self, start, end, arrow=False):
+            assert arrow, "--arrow must request RecordBatches from the client"
+            for station in ('S1', 'S2'):
+                yield decode_observations_batch({'observations': [
+                    {'stationID': station, 'obsTimeUtc': f'{start}T01:00:00Z', 'imperial': {'tempAvg': 70}},
+                ]}, station)
+
+    written = []
+
+    class ArrowOnlyWriter(IncrementalParquetWriter):
+        def write(self, batch):
+            assert isinstance(batch, pa.RecordBatch), "Arrow batches must reach the writer unconverted"
+            return super().write(batch)
+
+    class StreamUploader(DummyUploader):
+        def open_parquet_stream(self, spec, date_str, force=False):
+            buf = io.BytesIO()
+            buf.close = lambda: None  # keep readable after the writer finalizes it
+            written.append(buf)
+            return ArrowOnlyWriter(buf)
+
+    uploader = StreamUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: ArrowWU())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc, 'HotDurhamDB', DummyDB)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    config = dc.RunConfig('2025-08-26', '2025-08-26', sink='gcs', source='wu', stream=True, arrow=True)
+    asyncio.run(dc.run_collection_process(None, None, config=config))
+
+    (buf,) = written
+    table = pq.read_table(io.BytesIO(buf.getvalue()))
+    assert sorted(table.column('native_sensor_id').to_pylist()) == ['S1', 'S2']
+    assert table.column('temperature').to_pylist() == [70.0, 70.0]
+
+
+def test_run_collection_process_multi_resolution_single_fetch(monkeypatch):
+    fetches = []
+
+    class MinuteWU(DummyWU):
+        async def fetch_data(self, start, end, **k):
+            fetches.append(('WU', k))
+            ts = pd.date_range(f'{start}T00:00Z', periods=180, freq='min')
+            return pd.DataFrame({'stationID': 'S1', 'obsTimeUtc': ts, 'tempAvg': range(180)})
+
+    class MinuteTSI(DummyTSI):
+        async def fetch_data(self, start, end, **k):
+            fetches.append(('TSI', k))
+            ts = pd.date_range(f'{start}T00:00Z', periods=180, freq='min')
+            return pd.DataFrame({'device_id': 'D1', 'timestamp': ts, 'pm2_5': 1.0})
+
+    class RecordingUploader(DummyUploader):
+        def upload_parquet(self, df, source, aggregated, interval, ts_column, **kw):
+            self.uploads.append((source, interval if aggregated else 'raw', len(df)))
+
+    uploader = RecordingUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: MinuteWU())
+    monkeypatch.setattr(dc, 'TSIClient', lambda **cfg: MinuteTSI())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc, 'HotDurhamDB', DummyDB)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    asyncio.run(dc.run_collection_process('2025-08-26', '2025-08-26', sink='gcs', source='all',
+                                          resolutions=dc.parse_resolutions('h,raw,15min,D,h')))
+
+    assert fetches == [('WU', {}), ('TSI', {})]
+    assert sorted(uploader.uploads) == sorted([
+        (src, res, rows) for src in ('WU', 'TSI') for res, rows in (('raw', 180), ('h', 3), ('15min', 12), ('D', 1))])
+
+
+def test_run_collection_process_incremental_advances_watermarks(monkeypatch, tmp_path):
+    calls = []
+
+    class MarkedWU(DummyWU):
+        watermarks = {}
+        def set_watermarks(self, marks, lookback):
+            calls.append(('WU', dict(marks), lookback))
+        async def fetch_data(self, start, end, **k):
+            ts = pd.date_range(f'{start}T00:00Z', periods=3, freq='h')
+            return pd.DataFrame({'stationID': 'S1', 'obsTimeUtc': ts, 'tempAvg': 1.0})
+
+    class MarkedTSI(DummyTSI):
+        def set_watermarks(self, marks, lookback):
+            calls.append(('TSI', dict(marks), lookback))
+        async def fetch_data(self, start, end, **k):
+            if start == '2025-08-25':
+                raise RuntimeError('boom')
+            ts = pd.date_range(f'{start}T00:00Z', periods=2, freq='h')
+            return pd.DataFrame({'device_id': 'D1', 'timestamp': ts, 'pm2_5': 1.0})
+
+    uploader = DummyUploader()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: MarkedWU())
+    monkeypatch.setattr(dc, 'TSIClient', lambda **cfg: MarkedTSI())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: uploader)
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    store = dc.build_watermark_store(str(tmp_path / 'wm.json'))
+    store.advance('TSI', {'D1': pd.Timestamp('2025-08-23T00:00Z')})
+    config = dc.RunConfig('2025-08-24', '2025-08-26', sink='gcs', incremental=True,
+                          watermark_lookback='30min', watermark_store=str(tmp_path / 'wm.json'))
+    asyncio.run(dc.run_collection_process(config.start_date, config.end_date, config=config))
+
+    assert ('TSI', {'D1': pd.Timestamp('2025-08-23T00:00Z')}, '30min') in calls
+    # 08-25 failed, so only 08-24 may advance the watermarks even though 08-26 was written
+    assert store.load('WU') == {'S1': pd.Timestamp('2025-08-24T02:00Z')}
+    assert store.load('TSI') == {'D1': pd.Timestamp('2025-08-24T01:00Z')}
+
+
+class _GCSObjects:
+    """In-memory bucket for GCSUploader: objects persist across runs as Parquet bytes by path."""
+    def __init__(self):
+        self.objects = {}
+    def bucket(self, _):
+        return self
+    def blob(self, path):
+        import io
+        objects = self.objects
+        class Blob:
+            def exists(self):
+                return path in objects
+            def download_as_bytes(self):
+                return objects[path]
+            def upload_from_file(self, buf, **_):
+                objects[path] = buf.read()
+            def open(self, *_, **__):
+                buf = io.BytesIO()
+                close = buf.close
+                def finalize():
+                    objects[path] = buf.getvalue()
+                    close()
+                buf.close = finalize
+                return buf
+        return Blob()
+
+
+def test_second_incremental_run_merges_into_the_days_object(monkeypatch, tmp_path):
+    import io
+    import pytest
+    pq = pytest.importorskip('pyarrow.parquet')
+    from src.storage.gcs_uploader import GCSUploader
+
+    hours = {'run': [0, 1, 2]}
+
+    class IncrementalWU(DummyWU):
+        def set_watermarks(self, marks, lookback):
+            pass
+        def _frame(self, start):
+            ts = [pd.Timestamp(f'{start}T00:00Z') + pd.Timedelta(hours=h) for h in hours['run']]
+            return pd.DataFrame({'stationID': 'S1', 'obsTimeUtc': ts, 'tempAvg': [float(h) + len(hours['run']) for h in hours['run']]})
+        async def fetch_data(self, start, end, **k):
+            return self._frame(start)
+        async def iter_batches(self, start, end):
+            yield self._frame(start)
+
+    gcs = _GCSObjects()
+    monkeypatch.setattr(dc, 'WUClient', lambda **cfg: IncrementalWU())
+    monkeypatch.setattr(dc, '_build_uploader', lambda bucket, prefix: GCSUploader(bucket, prefix, client=gcs))
+    monkeypatch.setattr(dc.app_config, 'gcs_bucket', 'test-bucket')
+    monkeypatch.setenv('DISABLE_DB_SINK', '1')
+    for stream in (False, True):
+        gcs.objects.clear()
+        for run_hours in ([0, 1, 2], [1, 2, 3, 4]):  # the second run re-reads the lookback overlap (01:00, 02:00)
+            hours['run'] = run_hours
+            config = dc.RunConfig('2025-08-26', '2025-08-26', sink='gcs', source='wu', stream=stream, incremental=True,
+                                  watermark_store=str(tmp_path / f'wm-{stream}.json'))
+            asyncio.run(dc.run_collection_process(config.start_date, config.end_date, config=config))
+
+        assert list(gcs.objects) == ['sensor_readings/source=WU/agg=raw/dt=2025-08-26/WU-2025-08-26.parquet']
+        df = pq.read_table(io.BytesIO(next(iter(gcs.objects.values())))).to_pandas()
+        assert df['ts'].dt.hour.tolist() == [0, 1, 2, 3, 4]  # one row per reading, no duplicates
+        assert df['temperature'].tolist() == [3.0, 5.0, 6.0, 7.0, 8.0]  # re-read readings take the newest values
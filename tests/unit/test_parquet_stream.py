@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from src.storage.parquet_stream import IncrementalParquetWriter  # noqa: E402
+
+
+def _batch(device: str, start: str, n: int = 3, **extra):
+    df = pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='min', tz='UTC'),
+        'native_sensor_id': device,
+        'pm2_5': [float(i) for i in range(n)],
+    })
+    for name, value in extra.items():
+        df[name] = value
+    return df
+
+
+def test_batches_become_row_groups_with_conformed_schema(tmp_path):
+    path = str(tmp_path / 'day.parquet')
+    with IncrementalParquetWriter(path) as writer:
+        writer.write(_batch('D1', '2025-08-26T00:00:00Z', model=None))
+        # later batch: extra column dropped, missing pm2_5 filled with nulls, model values kept
+        second = _batch('D2', '2025-08-26T01:00:00Z', model='8143', unexpected=1).drop(columns=['pm2_5'])
+        writer.write(second)
+        writer.write(pd.DataFrame())
+    assert writer.rows_written == 6
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 2
+    df = parquet.read().to_pandas()
+    assert list(df.columns) == ['timestamp', 'native_sensor_id', 'pm2_5', 'model']
+    assert df['pm2_5'].isna().sum() == 3
+    assert df['model'].isna().sum() == 3 and (df['model'].iloc[3:] == '8143').all()
+    assert str(df['timestamp'].dt.tz) == 'UTC'
+
+
+def test_abort_discards_partial_output(tmp_path):
+    path = tmp_path / 'day.parquet'
+    with pytest.raises(RuntimeError):
+        with IncrementalParquetWriter(str(path)) as writer:
+            writer.write(_batch('D1', '2025-08-26T00:00:00Z'))
+            raise RuntimeError("fetch failed")
+    assert not path.exists()
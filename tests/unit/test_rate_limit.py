@@ -0,0 +1,75 @@
+import httpx
+import pytest
+
+from src.data_collection.clients.rate_limit import TokenBucket, parse_retry_after
+
+
+def test_token_bucket_reserves_in_order():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.01)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('garbage') is None
+
+
+@pytest.mark.asyncio
+async def test_request_retries_throttled_and_transient_errors(make_client):
+    responses = iter([
+        httpx.Response(429, headers={'Retry-After': '0'}),
+        httpx.Response(503),
+        httpx.Response(200, json={'ok': True}),
+    ])
+    client = make_client(lambda request: next(responses))
+    assert await client._request('GET', 'x') == {'ok': True}
+    await client.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_request_gives_up_without_retrying_client_errors(make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    client = make_client(handler)
+    assert await client._request('GET', 'x') is None
+    assert len(calls) == 1
+    await client.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_grows_when_healthy_and_halves_on_throttle():
+    from src.data_collection.clients.adaptive_limiter import (
+        OUTCOME_OK, OUTCOME_THROTTLED, AdaptiveConcurrencyLimiter,
+    )
+
+    limiter = AdaptiveConcurrencyLimiter(2, max_limit=8, latency_target=1.0)
+    for _ in range(10):
+        epoch = await limiter.acquire()
+        limiter.release(0.1, OUTCOME_OK, epoch)
+    assert limiter.window > 2
+    grown = limiter.window
+    epochs = [await limiter.acquire() for _ in range(2)]
+    for epoch in epochs:
+        limiter.release(0.1, OUTCOME_THROTTLED, epoch)
+    # Both throttles belong to the same congestion event -> a single multiplicative cut
+    assert limiter.window == max(1, int(grown * 0.5))
+    assert limiter.snapshot()['throttled'] == 2
+
+
+@pytest.mark.asyncio
+async def test_request_reports_throttle_to_limiter(make_client):
+    responses = iter([httpx.Response(429, headers={'Retry-After': '0'}), httpx.Response(200, json=[])])
+    client = make_client(lambda request: next(responses))
+    assert await client._request('GET', 'x') == []
+    metrics = client.metrics_snapshot()
+    assert metrics['throttled'] == 1 and metrics['ok'] == 1 and metrics['retries'] == 1
+    await client.client.aclose()
@@ -0,0 +1,67 @@
+import gzip
+
+import httpx
+import pytest
+
+from src.data_collection.clients.rate_limit import RetryPolicy
+from src.data_collection.clients.http_pool import HTTPPoolConfig
+from src.data_collection.clients.replay import (
+    FixtureArchive, RecordingTransport, ReplayTransport, SyntheticAPI, transport_from_env,
+)
+from src.data_collection.clients.tsi_client import TSIClient
+from src.data_collection.clients.wu_client import WUClient
+
+
+def _wu(http_client) -> WUClient:
+    client = WUClient(api_key='secret-key', base_url='https://api.weather.com/v2/pws', http_client=http_client)
+    client.stations = [{'stationId': 'KSYN1'}, {'stationId': 'KSYN2'}]
+    client.rate_limiter = None
+    return client
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_wu_without_credentials(tmp_path):
+    path = tmp_path / 'wu.jsonl.gz'
+    recorder = RecordingTransport(FixtureArchive(path), inner=SyntheticAPI().transport())
+    async with httpx.AsyncClient(transport=recorder) as http_client:
+        async with _wu(http_client) as client:
+            recorded = await client.fetch_data('2025-08-26', '2025-08-26')
+    assert len(recorded) == 48
+    assert b'secret-key' not in gzip.decompress(path.read_bytes())
+
+    replay = ReplayTransport(FixtureArchive.load(path))
+    async with httpx.AsyncClient(transport=replay) as http_client:
+        async with _wu(http_client) as client:
+            replayed = await client.fetch_data('2025-08-26', '2025-08-26')
+            missing = await client.fetch_data('2025-08-27', '2025-08-27')
+    assert replayed.sort_values(['stationID', 'obsTimeUtc']).reset_index(drop=True).equals(
+        recorded.sort_values(['stationID', 'obsTimeUtc']).reset_index(drop=True))
+    assert missing.empty and len(replay.misses) == 2
+
+
+@pytest.mark.asyncio
+async def test_synthetic_tsi_survives_injected_errors():
+    api = SyntheticAPI(error_rate=0.2, throttle_rate=0.1, tsi_interval='h', seed=3)
+    async with httpx.AsyncClient(transport=api.transport()) as http_client:
+        async with TSIClient(client_id='id', client_secret='s', auth_url='https://tsi.test/oauth/token',
+                             base_url='https://tsi.test/api', http_client=http_client) as client:
+            client.device_ids = ['dev-1', 'dev-2', 'dev-3']
+            client.rate_limiter = None
+            client.retry_policy = RetryPolicy(max_retries=10, base_delay=0.0)
+            df = await client.fetch_data('2025-08-25', '2025-08-26')
+    assert len(df) == 3 * 2 * 24
+    assert api.counts['429'] + api.counts['503'] > 0
+    assert client.retries == api.counts['429'] + api.counts['503']
+
+
+def test_recording_forwards_through_the_configured_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv('API_RECORD_ARCHIVE', str(tmp_path / 'live.jsonl.gz'))
+    monkeypatch.setenv('HTTP_MAX_CONNECTIONS', '7')
+    monkeypatch.setenv('HTTP_MAX_KEEPALIVE', '3')
+    monkeypatch.setenv('HTTP_KEEPALIVE_EXPIRY', '12')
+    config = HTTPPoolConfig.from_env()
+    for recorder in (transport_from_env(config), RecordingTransport(FixtureArchive(tmp_path / 'default.jsonl.gz'))):
+        assert isinstance(recorder, RecordingTransport)
+        pool = recorder.inner._pool  # httpx ignores client-level limits once a transport is given
+        assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 12.0)
+
@@ -0,0 +1,66 @@
+import os
+
+import httpx
+import pandas as pd
+import pytest
+
+from src.data_collection.clients.rate_limit import RetryPolicy
+from src.data_collection.clients.response_cache import ResponseCache, request_key, window_end
+
+
+def test_request_key_ignores_param_order_and_credentials():
+    a = request_key('GET', 'history/hourly', {'stationId': 'S1', 'date': '20250826', 'apiKey': 'one'})
+    b = request_key('get', '/history/hourly', {'apiKey': 'two', 'date': '20250826', 'stationId': 'S1'})
+    assert a == b
+    assert a != request_key('GET', 'history/hourly', {'stationId': 'S1', 'date': '20250827'})
+
+
+def test_window_end_and_cacheability(tmp_path):
+    assert window_end({'date': '20250826'}) == pd.Timestamp('2025-08-27', tz='UTC')
+    assert window_end({'endDate': '2025-08-26'}) == pd.Timestamp('2025-08-27', tz='UTC')
+    assert window_end({'end_date': '2025-08-27T00:00:00Z'}) == pd.Timestamp('2025-08-27', tz='UTC')
+    assert window_end({'stationId': 'S1'}) is None
+
+    cache = ResponseCache(tmp_path, settle='2h')
+    assert cache.is_cacheable({'date': '20250826'}, now=pd.Timestamp('2025-08-27T03:00Z'))
+    assert not cache.is_cacheable({'date': '20250826'}, now=pd.Timestamp('2025-08-27T01:00Z'))
+    assert not cache.is_cacheable({'stationId': 'S1'})
+
+
+def test_lru_eviction_by_size_survives_restart(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10_000)
+    bodies = {key: os.urandom(3000) for key in ('a' * 64, 'b' * 64, 'c' * 64)}  # incompressible: ~3 KB each
+    for key, body in bodies.items():
+        cache.put(key, body)
+    assert cache.get('a' * 64) == bodies['a' * 64]
+    cache.put('d' * 64, os.urandom(3000))
+
+    assert cache.evictions >= 1
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) is not None
+
+    reopened = ResponseCache(tmp_path, max_bytes=10_000)
+    assert reopened.snapshot()['entries'] == cache.snapshot()['entries']
+
+
+@pytest.mark.asyncio
+async def test_request_replays_closed_windows_from_cache(tmp_path, make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={'observations': [{'n': len(calls)}]})
+
+    cache = ResponseCache(tmp_path)
+    client = make_client(handler, retry_policy=RetryPolicy(max_retries=0), response_cache=cache)
+
+    past = {'stationId': 'S1', 'date': '20200101', 'apiKey': 'k'}
+    assert await client._request('GET', 'history/hourly', params=past) == {'observations': [{'n': 1}]}
+    assert await client._request('GET', 'history/hourly', params={**past, 'apiKey': 'rotated'}) == {'observations': [{'n': 1}]}
+    today = {'stationId': 'S1', 'date': pd.Timestamp.now(tz='UTC').strftime('%Y%m%d')}
+    await client._request('GET', 'history/hourly', params=today)
+    await client._request('GET', 'history/hourly', params=today)
+
+    assert len(calls) == 3
+    assert client.metrics_snapshot()['response_cache']['hits'] == 1
+    await client.client.aclose()
@@ -0,0 +1,121 @@
+import io
+import json
+import logging
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.data_collection.aggregation import aggregate_source
+from src.data_collection.clients.replay import SyntheticAPI
+from src.data_collection.clients.tsi_client import TSIClient
+from src.data_collection.clients.wu_client import WUClient
+from src.data_collection.daily_data_collector import clean_and_transform_data
+from src.data_collection.schema_registry import SchemaRegistry, default_registry
+from src.storage.gcs_uploader import GCSUploader, UploadSpec
+
+
+class _Blob:
+    def __init__(self, store, path):
+        self.store, self.path = store, path
+
+    def exists(self):
+        return False
+
+    def upload_from_file(self, buf, **_):
+        self.store[self.path] = pq.read_table(buf)
+
+    def open(self, *_, **__):
+        buf = self.store[self.path] = io.BytesIO()
+        buf.close = lambda: None  # keep readable after the writer finalizes it
+        return buf
+
+
+def _uploader():
+    store = {}
+
+    class Client:
+        def bucket(self, _):
+            return type('Bucket', (), {'blob': staticmethod(lambda path: _Blob(store, path))})()
+
+    return GCSUploader(bucket='b', client=Client()), store  # type: ignore[arg-type]
+
+
+async def _raw_frames():
+    api = SyntheticAPI(tsi_interval='5min')
+    async with httpx.AsyncClient(transport=api.transport()) as http_client:
+        wu = WUClient(api_key='k', base_url='https://wu.test/v2/pws', http_client=http_client)
+        wu.stations = [{'stationId': 'KST1'}]
+        tsi = TSIClient(client_id='id', client_secret='s', auth_url='https://tsi.test/oauth/token',
+                        base_url='https://tsi.test/api', http_client=http_client)
+        tsi.device_ids = ['dev-1']
+        async with wu, tsi:
+            wu.rate_limiter = tsi.rate_limiter = None
+            return {'WU': await wu.fetch_data('2025-08-25', '2025-08-25'),
+                    'TSI': await tsi.fetch_data('2025-08-25', '2025-08-25')}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('aggregated', [False, True])
+async def test_uploads_carry_the_registry_schema_without_dropping_columns(aggregated, caplog):
+    frames = await _raw_frames()
+    uploader, store = _uploader()
+    with caplog.at_level(logging.WARNING):
+        for source, raw in frames.items():
+            df = clean_and_transform_data(aggregate_source(raw, source, 'h') if aggregated else raw, source)
+            uploader.upload_parquet(df, source=source, aggregated=aggregated, interval='h', ts_column='ts')
+    assert 'dropped' not in caplog.text
+    tables = {path.split('/')[1].removeprefix('source='): table for path, table in store.items()}
+    for source, table in tables.items():
+        assert table.schema.equals(default_registry().schema(source, aggregated))
+        assert table.num_rows > 0 and table.column('native_sensor_id').null_count == 0
+
+
+def test_tsi_days_without_a_measurement_keep_the_same_schema():
+    def day(date, pm25):
+        return clean_and_transform_data(pd.DataFrame({
+            'device_id': ['D1', 'D1'], 'timestamp': pd.to_datetime([f'{date}T00:00Z', f'{date}T01:00Z']),
+            'pm2_5': pm25, 'is_indoor': [False, True],
+        }), 'TSI')
+
+    uploader, store = _uploader()
+    uploader.upload_parquet(day('2025-08-25', [3.5, 4.0]), source='TSI', ts_column='ts')
+    uploader.upload_parquet(day('2025-08-26', [None, None]), source='TSI', ts_column='ts')
+    first, second = store.values()
+    assert first.schema.equals(second.schema)
+    assert second.schema.field('pm2_5').type == pa.float64() and second.column('pm2_5').null_count == 2
+    assert second.column('co2_ppm').null_count == 2  # never reported: typed nulls, not zeros
+
+
+def test_stream_writer_uses_the_registry_schema_from_the_first_batch():
+    uploader, store = _uploader()
+    spec = UploadSpec(source='TSI', ts_column='ts')
+    with uploader.open_parquet_stream(spec, '2025-08-26') as writer:
+        first = pd.DataFrame({'native_sensor_id': ['D1'], 'ts': pd.to_datetime(['2025-08-26T00:00Z']), 'model': [None]})
+        writer.write(first)
+        writer.write(first.assign(model='8143', pm2_5='7.5'))
+    (buf,) = store.values()
+    table = pq.read_table(io.BytesIO(buf.getvalue()))
+    assert table.schema.equals(default_registry().schema('TSI'))
+    assert table.column('model').to_pylist() == [None, '8143']
+    assert table.column('pm2_5').to_pylist() == [None, 7.5]
+
+
+def test_registry_reads_column_types_from_the_manifest(tmp_path):
+    manifest = {'X': {'native_id_field': 'id', 'timestamp_field': 'time', 'columns': {'flag': 'bool'},
+                      'metrics': {'level': 'Level', 'status': 'Status'}, 'metric_types': {'status': 'int64'}}}
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(manifest))
+    registry = SchemaRegistry.from_file(path)
+    assert registry.sources == ['X']
+    assert [(f.name, str(f.type)) for f in registry.schema('X')] == [
+        ('native_sensor_id', 'string'), ('timestamp', 'timestamp[ns, tz=UTC]'), ('flag', 'bool'),
+        ('level', 'double'), ('status', 'int64'), ('ts', 'timestamp[ns, tz=UTC]'),
+    ]
+    assert registry.schema('X', aggregated=True).field('level_count').type == pa.int64()
+    assert registry.schema('Y') is None
+    manifest['X']['columns'] = {'flag': 'boolean'}
+    with pytest.raises(ValueError, match="unknown type 'boolean'"):
+        SchemaRegistry(manifest)
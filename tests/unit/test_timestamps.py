@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.timestamps import epoch_timestamp_sql, normalize_timestamps, utc_timestamp_strings
+
+EXPECTED = pd.Timestamp('2025-08-26T00:00:00Z')
+
+
+@pytest.mark.parametrize('value', [1756166400, 1756166400_000, 1756166400_000_000, 1756166400_000_000_000, 1756166400.0])
+def test_epoch_unit_detected_per_value(value):
+    out = normalize_timestamps(pd.Series([value, np.nan] if isinstance(value, float) else [value]))
+    assert out.iloc[0] == EXPECTED
+    assert str(out.dtype) == 'datetime64[ns, UTC]'
+
+
+def test_strings_naive_and_aware_datetimes_normalize_to_utc():
+    strings = normalize_timestamps(pd.Series(['2025-08-26T02:00:00+02:00', '2025-08-26 00:00:00', None, 'garbage']))
+    assert strings.iloc[:2].tolist() == [EXPECTED, EXPECTED]
+    assert strings.iloc[2:].isna().all()
+    naive = normalize_timestamps(pd.Series(pd.to_datetime(['2025-08-26 00:00'])))
+    aware = normalize_timestamps(pd.Series(pd.to_datetime(['2025-08-25 20:00']).tz_localize('America/New_York')))
+    assert naive.iloc[0] == aware.iloc[0] == EXPECTED
+
+
+def test_mixed_object_column_and_out_of_range_epochs():
+    mixed = pd.Series([1756166400, '2025-08-26T00:00:00Z', pd.Timestamp('2025-08-26'), None, 5e10], dtype=object, index=list('abcde'))
+    out = normalize_timestamps(mixed)
+    assert out.index.tolist() == list('abcde')
+    assert out.iloc[:3].tolist() == [EXPECTED] * 3
+    assert out.iloc[3:].isna().all()  # missing, and an epoch beyond the datetime64 range
+
+
+def test_utc_timestamp_strings_and_sql_share_bounds():
+    ts = normalize_timestamps(pd.Series([1756166400, 1756170061]))
+    assert utc_timestamp_strings(ts).tolist() == ['2025-08-26 00:00:00', '2025-08-26 01:01:01']
+    sql = epoch_timestamp_sql('t.ts')
+    assert 'WHEN ABS(CAST(t.ts AS INT64)) >= 100000000000 THEN TIMESTAMP_MILLIS' in sql
+    assert sql.endswith('ELSE TIMESTAMP_SECONDS(CAST(t.ts AS INT64)) END')
@@ -0,0 +1,84 @@
+import json
+
+import httpx
+import pandas as pd
+import pytest
+
+from src.data_collection.clients.json_decode import JSONArrayStream
+from src.data_collection.clients.replay import SyntheticAPI
+from src.data_collection.clients.response_cache import ResponseCache
+from src.data_collection.clients.tsi_client import TSIClient
+from src.data_collection.clients.tsi_parser import COLUMN_ORDER, parse_telemetry
+
+
+def _record(ts, measurements, serial='SN1'):
+    return {
+        'cloud_timestamp': ts,
+        'cloud_account_id': 'acct',
+        'model': '8143',
+        'metadata': {'location': {'latitude': 35.9, 'longitude': -78.9}, 'is_indoor': None, 'is_public': True},
+        'sensors': [{'serial': serial, 'measurements': [
+            {'name': name, 'data': {'value': value}} for name, value in measurements.items()
+        ]}],
+    }
+
+
+def test_parse_telemetry_maps_names_to_typed_columns():
+    records = [
+        _record('2025-08-26T00:00:00Z', {'PM 2.5': 12.5, 'Temperature': '21.0', 'Unknown': 1.0}),
+        {'metadata': {}},  # no timestamp -> skipped
+        _record('2025-08-26T00:01:00.5Z', {'PM 2.5': None, 'VOC': 0.2}),
+    ]
+    df = parse_telemetry(records, 'dev-1')
+    assert list(df.columns) == list(COLUMN_ORDER)
+    assert len(df) == 2
+    assert str(df['timestamp'].dt.tz) == 'UTC'
+    # measurements a record does not carry are missing, not zero
+    assert df['pm2_5'].tolist()[0] == 12.5 and pd.isna(df['pm2_5'].iloc[1])
+    assert df['temperature'].tolist()[0] == 21.0 and pd.isna(df['temperature'].iloc[1])
+    assert pd.isna(df['voc_mgm3'].iloc[0]) and df['voc_mgm3'].iloc[1] == 0.2
+    assert df['co2_ppm'].isna().all() and df['co2_ppm'].dtype == 'float64'
+    assert (df['device_id'] == 'dev-1').all() and (df['serial'] == 'SN1').all()
+    assert df['is_indoor'].dtype == bool and not df['is_indoor'].any()
+    assert pd.api.types.is_float_dtype(df['latitude'])
+
+
+def test_parse_telemetry_without_timestamps_returns_none():
+    assert parse_telemetry([{'sensors': []}], 'dev-1') is None
+
+
+def test_json_array_stream_splits_elements_across_any_chunking():
+    doc = json.dumps([_record('2025-08-26T00:00:00Z', {'PM 2.5': 1.5}), 12, -2.5e3, 'é', None, [1]]).encode()
+    for size in (1, 5, 64, len(doc)):
+        stream = JSONArrayStream()
+        items = [item for offset in range(0, len(doc), size) for item in stream.feed(doc[offset:offset + size])]
+        assert items + stream.close() == json.loads(doc)
+
+    truncated = JSONArrayStream()
+    truncated.feed(doc[:-5])
+    with pytest.raises(json.JSONDecodeError):
+        truncated.close()
+    error = JSONArrayStream()
+    error.feed(b'{"error": "bad device"}')
+    assert error.close() == [{'error': 'bad device'}]
+
+
+@pytest.mark.asyncio
+async def test_stream_parse_matches_whole_body_parse(tmp_path):
+    async def fetch(stream_parse, cache=None):
+        async with httpx.AsyncClient(transport=SyntheticAPI(tsi_interval='min').transport()) as http_client:
+            async with TSIClient(client_id='id', client_secret='s', auth_url='https://tsi.test/oauth/token',
+                                 base_url='https://tsi.test/api', http_client=http_client, stream_parse=stream_parse) as client:
+                client.rate_limiter = None
+                client.response_cache = cache
+                client.device_ids = ['dev-1']
+                return await client.fetch_data('2025-08-25', '2025-08-25')
+
+    whole = await fetch(False)
+    cache = ResponseCache(tmp_path)
+    streamed = await fetch(True, cache)
+    replayed = await fetch(True, cache)
+    assert len(whole) == 1440
+    pd.testing.assert_frame_equal(streamed, whole)
+    pd.testing.assert_frame_equal(replayed, whole)
+    assert cache.stores == 1 and cache.hits == 1
@@ -0,0 +1,52 @@
+import asyncio
+
+import pandas as pd
+
+from src.data_collection.clients.wu_client import WUClient
+from src.data_collection.watermarks import FileWatermarkStore, compute_watermarks, build_watermark_store
+
+
+def test_file_store_advances_monotonically(tmp_path):
+    store = FileWatermarkStore(tmp_path / 'state' / 'watermarks.json')
+    assert store.load('WU') == {}
+    store.advance('WU', {'S1': pd.Timestamp('2025-08-26T12:00Z'), 'S2': pd.Timestamp('2025-08-26T08:00Z')})
+    store.advance('WU', {'S1': pd.Timestamp('2025-08-26T06:00Z'), 'S2': pd.Timestamp('2025-08-26T09:00Z')})
+    store.advance('TSI', {'D1': pd.Timestamp('2025-08-25T00:00Z')})
+
+    reloaded = FileWatermarkStore(tmp_path / 'state' / 'watermarks.json')
+    assert reloaded.load('WU') == {'S1': pd.Timestamp('2025-08-26T12:00Z'), 'S2': pd.Timestamp('2025-08-26T09:00Z')}
+    assert reloaded.load('TSI') == {'D1': pd.Timestamp('2025-08-25T00:00Z')}
+
+
+def test_compute_watermarks_and_store_location(tmp_path, monkeypatch):
+    df = pd.DataFrame({'device_id': ['D1', 'D1', 'D2'],
+                       'timestamp': ['2025-08-26T01:00Z', '2025-08-26T03:00Z', None]})
+    assert compute_watermarks(df, 'TSI') == {'D1': pd.Timestamp('2025-08-26T03:00Z')}
+    monkeypatch.delenv('WATERMARK_STORE', raising=False)
+    assert build_watermark_store(str(tmp_path / 'wm.json')).location == str(tmp_path / 'wm.json')
+
+
+def test_wu_request_skips_and_filters_before_watermark():
+    client = WUClient(api_key='k', base_url='https://fake-wu.com')
+    fetched = []
+
+    async def fake_fetch_one(station_id, date_str, *a, **kw):
+        fetched.append(date_str)
+        ts = pd.date_range(f'{date_str}T00:00Z', periods=24, freq='h')
+        return pd.DataFrame({'stationID': station_id, 'obsTimeUtc': ts, 'tempAvg': 1.0})
+
+    client._fetch_one = fake_fetch_one
+    client.set_watermarks({'S1': pd.Timestamp('2025-08-26T12:00Z')}, lookback='1h')
+
+    async def run():
+        old = await client._fetch_request(('S1', '2025-08-25', None))
+        same_day = await client._fetch_request(('S1', '2025-08-26', None))
+        other = await client._fetch_request(('S2', '2025-08-25', None))
+        return old, same_day, other
+
+    old, same_day, other = asyncio.run(run())
+    assert old is None and client.watermark_skips == 1
+    assert fetched == ['2025-08-26', '2025-08-25']
+    assert same_day['obsTimeUtc'].min() == pd.Timestamp('2025-08-26T11:00Z')
+    assert len(same_day) == 13
+    assert len(other) == 24
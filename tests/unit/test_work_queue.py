@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.data_collection.clients.work_queue import WorkQueue, recent_first
+
+
+def test_workers_bound_live_coroutines_and_results_complete():
+    live = {'now': 0, 'peak': 0}
+
+    async def handler(item):
+        live['now'] += 1
+        live['peak'] = max(live['peak'], live['now'])
+        await asyncio.sleep(0)
+        live['now'] -= 1
+        return None if item % 10 == 0 else item
+
+    async def main():
+        queue = WorkQueue(handler, workers=4)
+        results = [r async for r in queue.run(range(1000), total=1000)]
+        return queue, results
+
+    queue, results = asyncio.run(main())
+    assert live['peak'] <= 4
+    assert sorted(results) == [i for i in range(1000) if i % 10]
+    assert queue.snapshot()['completed'] == 1000 and queue.snapshot()['pending'] == 0
+
+
+def test_recent_dates_are_scheduled_first():
+    order = []
+
+    async def handler(day):
+        order.append(day)
+        return day
+
+    days = ['2025-08-01', '2025-08-03', '2025-08-02', '2025-07-31']
+
+    async def main():
+        return [r async for r in WorkQueue(handler, workers=1).run(days, priority=recent_first)]
+
+    asyncio.run(main())
+    assert order == ['2025-08-03', '2025-08-02', '2025-08-01', '2025-07-31']
+
+
+def test_failure_propagates_and_early_close_cancels_outstanding_work():
+    cancelled = []
+
+    async def slow(item):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+
+    async def failing(item):
+        if item == 3:
+            raise ValueError("boom")
+        return item
+
+    async def main():
+        with pytest.raises(ValueError):
+            [r async for r in WorkQueue(failing, workers=2).run(range(10))]
+        gen = WorkQueue(slow, workers=3).run(range(10))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(gen.__anext__(), 0.05)
+        await gen.aclose()
+
+    asyncio.run(main())
+    assert len(cancelled) == 3
+
+
+def test_client_sums_work_queues_of_concurrent_fan_outs(make_client):
+    client = make_client()
+    release = asyncio.Event()
+
+    async def handler(item):
+        await release.wait()
+        return [item]
+
+    async def drain(items, desc):
+        return [r async for r in client._iter_work(items, handler, desc)]
+
+    async def main():
+        days = [asyncio.ensure_future(drain(range(3), 'day 1')), asyncio.ensure_future(drain(range(5), 'day 2'))]
+        await asyncio.sleep(0.01)
+        running = client.metrics_snapshot()['work_queue']
+        release.set()
+        await asyncio.gather(*days)
+        await client.aclose()
+        return running, client.metrics_snapshot()['work_queue']
+
+    running, finished = asyncio.run(main())
+    assert running['running'] == 2 and running['total'] == 8 and running['pending'] == 8
+    assert finished['runs'] == 2 and finished['running'] == 0
+    assert finished['total'] == finished['completed'] == 8 and finished['pending'] == 0
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from src.data_collection.clients.wu_parser import WUDecodeError, decode_observations, decode_observations_strict
+
+PAYLOAD = {'observations': [
+    {'stationID': 'KNCDURHA1', 'obsTimeUtc': '2025-08-26T00:59:57Z', 'epoch': 1756169997, 'humidityAvg': 80,
+     'qcStatus': 1, 'imperial': {'tempAvg': 75.2, 'tempHigh': 77, 'elev': 400}},
+    {'stationID': 'KNCDURHA1', 'obsTimeUtc': '2025-08-26T01:59:57Z', 'epoch': 1756173597, 'humidityAvg': None,
+     'qcStatus': 1, 'imperial': {'tempAvg': 74.0, 'tempHigh': 75.5, 'elev': 400}},
+]}
+
+
+def test_fast_decode_matches_strict_path():
+    fast = decode_observations(PAYLOAD)
+    strict = decode_observations_strict(PAYLOAD)
+    assert list(fast.columns) == list(strict.columns)
+    assert fast['elev'].tolist() == [400, 400]
+    assert str(fast['obsTimeUtc'].dt.tz) == 'UTC'
+    for col in ['tempAvg', 'tempHigh', 'humidityAvg', 'epoch', 'qcStatus']:
+        pd.testing.assert_series_equal(fast[col], pd.to_numeric(strict[col]), check_dtype=False)
+    pd.testing.assert_series_equal(fast['obsTimeUtc'], pd.to_datetime(strict['obsTimeUtc'], utc=True), check_dtype=False)
+
+
+def test_fast_decode_rejects_missing_required_fields():
+    with pytest.raises(WUDecodeError):
+        decode_observations({'observations': [{'obsTimeUtc': '2025-08-26T00:00:00Z'}]})
+    with pytest.raises(WUDecodeError):
+        decode_observations({'observations': [{'stationID': 'S', 'obsTimeUtc': 'not-a-date'}]})
+    with pytest.raises(WUDecodeError):
+        decode_observations(None)